@@ -2,7 +2,7 @@
 Configuration management using pydantic. Supports YAML + env overrides.
 Includes persona, observability, and research settings.
 """
-from typing import List, Literal, Dict
+from typing import List, Literal, Dict, Optional
 from pathlib import Path
 import yaml
 import os
@@ -62,12 +62,159 @@ class ClaudeConfig(BaseModel):
     timeout_seconds: int = Field(default=300, ge=30, le=3600, description="API timeout")
 
 
+class ExecutorConfig(BaseModel):
+    """ReAct executor configuration"""
+    conversation_mode: Literal["full", "incremental"] = Field(
+        default="incremental",
+        description="full: resend the whole transcript each step; incremental: resume the CLI session and send only new observations"
+    )
+    history_token_budget: Optional[int] = Field(
+        default=30000, ge=1000,
+        description="Token budget for the ReAct transcript; older turns are compacted beyond it, and an incremental "
+                    "CLI session that outgrows it is re-seeded with the compacted transcript (None: never compact)"
+    )
+    keep_last_turns: int = Field(default=4, ge=0, description="Most recent ReAct turns always kept verbatim")
+    compacted_summary_chars: int = Field(default=200, ge=0, description="Characters kept from each compacted entry")
+    spill_threshold_chars: int = Field(
+        default=8000, ge=0,
+        description="Tool outputs longer than this are saved to a scratch file and previewed (0: never spill)"
+    )
+    spill_preview_head_chars: int = Field(default=1500, ge=0, description="Leading characters kept in a spilled preview")
+    spill_preview_tail_chars: int = Field(default=500, ge=0, description="Trailing characters kept in a spilled preview")
+    scratch_dir: str = Field(default=".scratch", description="Per-task scratch area for spilled outputs (relative to work_dir; removed when the task ends)")
+    max_parallel_actions: int = Field(
+        default=4, ge=1, le=16,
+        description="Max Action/Action Input pairs executed from one response (1: one action per step)"
+    )
+
+
+class ToolSandboxConfig(BaseModel):
+    """Process isolation for sync tools (reusable worker processes)"""
+    enabled: bool = Field(default=True, description="Run sync tools in sandbox worker processes")
+    max_workers: int = Field(default=4, ge=1, le=64, description="Maximum number of sandbox worker processes")
+    max_tasks_per_worker: int = Field(default=100, ge=1, description="Tool calls served before a worker is recycled")
+    memory_limit_mb: int = Field(default=4096, ge=0, description="Address-space limit per worker in MB (0 = unlimited, Unix only)")
+    cpu_limit_seconds: int = Field(default=120, ge=0, description="CPU time limit per tool call (0 = unlimited, Unix only)")
+    max_output_chars: int = Field(default=1_000_000, ge=0, description="Longer string results are truncated (0 = unlimited)")
+    start_method: Literal["spawn", "forkserver", "fork"] = Field(default="spawn", description="multiprocessing start method for workers")
+    inline_tools: List[str] = Field(default_factory=list, description="Sync tools that always run in-process")
+
+
+class WorkspaceSearchConfig(BaseModel):
+    """In-memory index behind the search_workspace tool"""
+    max_file_kb: int = Field(default=1024, ge=1, description="Files larger than this are not indexed")
+    max_files: int = Field(default=20000, ge=1, description="Maximum number of files indexed per work dir")
+
+
+class ShellConfig(BaseModel):
+    """run_command execution"""
+    default_timeout_seconds: float = Field(default=30.0, gt=0, description="Timeout for commands that do not pass their own")
+    max_timeout_seconds: float = Field(default=300.0, gt=0, le=600, description="Upper bound for per-call timeouts")
+    output_head_bytes: int = Field(default=6000, ge=0, description="Leading output bytes kept per stream")
+    output_tail_bytes: int = Field(default=4000, ge=0, description="Trailing output bytes kept per stream")
+    session_enabled: bool = Field(
+        default=True,
+        description="Allow run_command(session=true) to reuse a persistent per-executor bash session"
+    )
+    session_idle_timeout_seconds: float = Field(
+        default=300.0, ge=0,
+        description="Close a persistent session idle this long; the next command starts a fresh one (0: never)"
+    )
+
+
+class ToolsConfig(BaseModel):
+    """Tool execution configuration"""
+    max_workers: int = Field(default=8, ge=1, le=64, description="Thread pool size for running sync tools off the event loop")
+    default_timeout_seconds: float = Field(default=120.0, gt=0, description="Timeout for tools without their own timeout")
+    timeouts: Dict[str, float] = Field(default_factory=dict, description="Per-tool timeout overrides {tool_name: seconds}")
+    memo_scope: Literal["off", "task", "session"] = Field(
+        default="task",
+        description="Serve repeated cacheable tool calls (read_file, web_search) from a memo per task or per session"
+    )
+    sandbox: ToolSandboxConfig = Field(default_factory=ToolSandboxConfig, description="Process isolation for sync tools")
+    search: WorkspaceSearchConfig = Field(default_factory=WorkspaceSearchConfig, description="Workspace search index")
+    shell: ShellConfig = Field(default_factory=ShellConfig, description="run_command execution")
+
+
+class CliPoolConfig(BaseModel):
+    """Warm Claude CLI process pool behind run_claude_prompt"""
+    enabled: bool = Field(default=False, description="Serve LLM calls from pre-warmed CLI processes")
+    size: int = Field(default=2, ge=1, le=32, description="Idle processes kept per (model, permission_mode, cwd)")
+    max_uses: int = Field(default=1, ge=1, le=1000, description="Requests served before a process is recycled")
+    max_idle_seconds: float = Field(
+        default=600.0, ge=10,
+        description="A background reaper recycles processes idle this long; keys unused this long stop being prewarmed"
+    )
+    spawn_timeout_seconds: float = Field(default=90.0, ge=5, description="Timeout for CLI start-up and handshake")
+    max_total_processes: int = Field(
+        default=8, ge=1, le=128,
+        description="Hard cap on idle + spawning + in-use pooled processes across all keys (each distinct appended "
+                    "system prompt is its own key); calls beyond it run as one-shot processes"
+    )
+
+
+class SchedulerConfig(BaseModel):
+    """Global priority scheduler for all run_claude_prompt calls"""
+    enabled: bool = Field(default=True, description="Route LLM calls through the shared scheduler")
+    max_concurrent: int = Field(default=4, ge=1, le=64, description="Global cap on in-flight LLM calls")
+    per_model_limits: Dict[str, int] = Field(
+        default_factory=dict,
+        description="Per-model cap on in-flight calls {model: limit}"
+    )
+    priorities: Dict[str, int] = Field(
+        default_factory=dict,
+        description="Override call-class priorities {call_class: priority}, lower runs first"
+    )
+    aging_seconds: float = Field(default=30.0, ge=0, description="Waiting this long raises priority by one level (0 = off)")
+
+
+class ResponseCacheConfig(BaseModel):
+    """On-disk cache for deterministic run_claude_prompt calls"""
+    enabled: bool = Field(default=False, description="Serve repeated prompts from the on-disk cache")
+    cache_dir: Optional[str] = Field(default=None, description="Cache directory (default: <logs_dir>/cache/llm_responses)")
+    max_entries: int = Field(default=2000, ge=1, description="Max cached responses (LRU eviction)")
+    max_size_mb: float = Field(default=200.0, gt=0, description="Max total cache size in MB (LRU eviction)")
+    ttl_hours: float = Field(default=168.0, gt=0, description="Entry time-to-live in hours")
+    call_classes: List[str] = Field(
+        default_factory=lambda: ["decomposer", "assembler", "validator", "researcher"],
+        description="Call classes whose responses may be cached"
+    )
+
+
+class CoalescingConfig(BaseModel):
+    """Single-flight coalescing of identical in-flight LLM requests"""
+    enabled: bool = Field(default=True, description="Share one request among identical concurrent calls")
+
+
+class HedgingConfig(BaseModel):
+    """Hedged LLM requests triggered by per-call-class latency percentiles"""
+    enabled: bool = Field(default=False, description="Launch a second attempt when a call exceeds the latency percentile")
+    percentile: float = Field(default=95.0, gt=0, le=100, description="Latency percentile that triggers a hedge")
+    min_samples: int = Field(default=20, ge=1, description="Samples needed per call class before hedging")
+    window_size: int = Field(default=200, ge=1, description="Rolling latency window per call class")
+    min_delay_seconds: float = Field(default=15.0, ge=0, description="Never hedge earlier than this")
+    max_delay_seconds: Optional[float] = Field(default=None, gt=0, description="Always hedge after this (None: no cap)")
+    call_classes: List[str] = Field(
+        default_factory=lambda: ["planner"],
+        description="Call classes that may be hedged (empty: all); keep side-effecting classes such as executor out"
+    )
+
+
 class PerformanceConfig(BaseModel):
     use_incremental_sync: bool = Field(default=True, description="Use incremental sync")
     exclude_patterns: List[str] = Field(
-        default_factory=lambda: ["*.pyc", "__pycache__", ".git", "*.log"],
+        default_factory=lambda: ["*.pyc", "__pycache__", ".git", "*.log", ".scratch"],
         description="Exclude patterns"
     )
+    snapshot_rescan_interval_seconds: float = Field(
+        default=2.0, ge=0,
+        description="Minimum seconds between directory snapshot rescans for external changes (writes via tools apply immediately)"
+    )
+    cli_pool: CliPoolConfig = Field(default_factory=CliPoolConfig)
+    scheduler: SchedulerConfig = Field(default_factory=SchedulerConfig)
+    response_cache: ResponseCacheConfig = Field(default_factory=ResponseCacheConfig)
+    coalescing: CoalescingConfig = Field(default_factory=CoalescingConfig)
+    hedging: HedgingConfig = Field(default_factory=HedgingConfig)
 
 
 class PersonaConfig(BaseModel):
@@ -83,9 +230,52 @@ class ObservabilityConfig(BaseModel):
     enable_cost_log: bool = Field(default=True, description="Log cost/time per iteration (best-effort)")
 
 
+class SearchCacheConfig(BaseModel):
+    """Persistent web_search result cache shared across processes and sessions"""
+    enabled: bool = Field(default=True, description="Serve repeated web searches from the on-disk cache")
+    cache_dir: Optional[str] = Field(default=None, description="Cache directory (default: <logs_dir>/cache/web_search)")
+    max_entries: int = Field(default=5000, ge=1, description="Max cached searches (LRU eviction)")
+    max_size_mb: float = Field(default=100.0, gt=0, description="Max total cache size in MB (LRU eviction)")
+    ttl_hours: float = Field(default=24.0, gt=0, description="Entry time-to-live in hours")
+
+
+class SearchBatchConfig(BaseModel):
+    """Concurrent multi-query search (web_search_batch, deep research rounds)"""
+    max_concurrency: int = Field(default=4, ge=1, le=32, description="Queries in flight at once (also the HTTP connection pool size)")
+    query_timeout_seconds: float = Field(default=30.0, gt=0, le=120, description="Timeout per query")
+    max_queries: int = Field(default=8, ge=1, le=50, description="Max queries per batch")
+
+
+class FixtureProviderConfig(BaseModel):
+    """Offline search provider serving an on-disk corpus (benchmarks, load tests)"""
+    corpus_dir: Optional[str] = Field(default=None, description="Directory of JSON / Markdown fixture documents")
+    latency_ms: float = Field(default=0.0, ge=0, description="Latency injected into every query")
+    latency_jitter_ms: float = Field(default=0.0, ge=0, description="Extra random latency (uniform, up to this value)")
+
+
+class ResearchCacheConfig(BaseModel):
+    """ResearcherAgent result cache: memory LRU, on-disk entries and near-duplicate query matching"""
+    enabled: bool = Field(default=True, description="Reuse research summaries for repeated queries")
+    cache_dir: Optional[str] = Field(default=None, description="Cache directory (default: <logs_dir>/cache/research)")
+    ttl_hours: float = Field(default=24.0, gt=0, description="Entry time-to-live in hours")
+    max_entries: int = Field(default=1000, ge=1, description="Max cached summaries (LRU eviction)")
+    max_size_mb: float = Field(default=50.0, gt=0, description="Max total cache size in MB (LRU eviction)")
+    memory_entries: int = Field(default=128, ge=1, description="Summaries also kept in memory")
+    near_duplicate: bool = Field(default=True, description="Match rephrased queries by token similarity")
+    similarity_threshold: float = Field(
+        default=0.9, ge=0.5, le=1.0,
+        description="Min Jaccard similarity of normalised query tokens for a near-duplicate hit "
+                    "(queries that differ in a number or proper noun never match)"
+    )
+
+
 class ResearchConfig(BaseModel):
-    provider: str = Field(default="tavily", description="Search provider")
+    provider: Literal["tavily", "fixture"] = Field(default="tavily", description="Search provider")
     enabled: bool = Field(default=True, description="Enable research agent features")
+    search_cache: SearchCacheConfig = Field(default_factory=SearchCacheConfig, description="web_search result cache")
+    batch: SearchBatchConfig = Field(default_factory=SearchBatchConfig, description="Batched multi-query search")
+    fixture: FixtureProviderConfig = Field(default_factory=FixtureProviderConfig, description="Offline fixture provider")
+    cache: ResearchCacheConfig = Field(default_factory=ResearchCacheConfig, description="Research result cache")
 
 
 class CostControlConfig(BaseModel):
@@ -114,6 +304,8 @@ class WorkflowConfig(BaseModel):
     json_parser: JsonParserConfig = Field(default_factory=JsonParserConfig)
     logging: LoggingConfig = Field(default_factory=LoggingConfig)
     claude: ClaudeConfig = Field(default_factory=ClaudeConfig)
+    executor: ExecutorConfig = Field(default_factory=ExecutorConfig)
+    tools: ToolsConfig = Field(default_factory=ToolsConfig)
     performance: PerformanceConfig = Field(default_factory=PerformanceConfig)
     persona: PersonaConfig = Field(default_factory=PersonaConfig)
     observability: ObservabilityConfig = Field(default_factory=ObservabilityConfig)
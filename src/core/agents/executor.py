@@ -1,21 +1,63 @@
 """
 Executor Agent (ReAct Engine)
 Executes specific sub-tasks using the ReAct pattern.
+
+Conversation modes (executor.conversation_mode):
+- full: every step resends system prompt, task and the whole history.
+- incremental: the first step sends the full transcript; later steps resume
+  the same CLI session and send only the new observation. If the session
+  cannot be resumed the task falls back to full mode.
+
+Full transcripts are compacted to executor.history_token_budget (see
+ReActTranscript); bytes saved are logged per step. In incremental mode, once
+the resumed session would exceed the budget it is dropped and a new session
+is seeded with the compacted transcript. Both emit executor_history_compacted. Large tool outputs are
+spilled to per-task scratch files and only previewed in the transcript
+(see ObservationSpiller); the scratch files are removed when the task ends.
+
+A response may contain several Action/Action Input pairs (up to
+executor.max_parallel_actions). Read-only tools in such a batch run
+concurrently; observations are returned together in the order requested.
+Tools run through the registry's async path, off the event loop; repeated
+cacheable calls within a task are served from the registry's tool memo, and
+run_command(session=true) reuses one persistent shell per executor until
+close() (or the shell's idle timeout).
+
+The process working directory is never changed: work_dir is bound as the
+task's workspace (src.core.workspace) and tools resolve relative paths
+against it, so several executors can run in one process.
+
+The system prompt (ReAct rules, tool descriptions, persona, working directory
+and the stable part of a PromptLayout task) is sent as a cacheable system
+prompt that stays byte-identical across steps; only the transcript changes.
 """
+import asyncio
 import json
 import re
-import os
-from typing import Dict, Any, Tuple, Optional, List
+from typing import Dict, Any, Tuple, Optional, List, Union
 from pathlib import Path
 from datetime import datetime
 
 from src.utils.logger import get_logger
+from src.core.events import EventType
+from src.core.llm.telemetry import emit_llm_event
 from src.core.tool_registry import registry
+from src.core.shell_session import bind_shell_session, new_shell_session, reset_shell_session
+from src.core.tool_memo import bind_tool_memo, reset_tool_memo
+from src.core.workspace import bind_workspace, reset_workspace
 from src.core.agents.persona import PersonaEngine
+from src.core.agents.observation_spill import ObservationSpiller
+from src.core.agents.react_transcript import ReActTranscript
 from src.core.agents.sdk_client import run_claude_prompt
+from src.core.llm.call_context import CallClass
+from src.core.llm.prompt_layout import PromptLayout, Stability
 
 logger = get_logger()
 FINAL_ANSWER_PATTERN = re.compile(r"(?im)^\s*(?:#+\s*)?Final Answer\s*:?\s*")
+ACTION_LINE_PATTERN = re.compile(r"(?m)^\s*Action:\s*(.+)$")
+
+# Tools without side effects; a batch made only of these runs concurrently
+PARALLEL_SAFE_TOOLS = {"read_file", "list_dir", "web_search", "web_search_batch", "search_workspace"}
 
 REACT_SYSTEM_PROMPT = """
 You are a task executor. Use the ReAct format:
@@ -42,6 +84,26 @@ Thought: I have completed the task and saved all required files.
 Final Answer: [brief summary of what was saved to files]
 """
 
+BATCH_ACTIONS_PROMPT = """
+BATCHING: When you need several INDEPENDENT lookups (e.g. multiple web_search or read_file calls),
+you may put up to {max_actions} Action / Action Input pairs in one response:
+
+Thought: [what you want to do]
+Action: web_search
+Action Input: {{"query": "first query"}}
+Action: web_search
+Action Input: {{"query": "second query"}}
+
+They run in parallel and all observations are returned together, in the same order.
+Never batch actions that depend on each other's results.
+For several searches on one topic, a single web_search_batch call ({{"queries": ["...", "..."]}})
+returns one merged, deduplicated source list instead.
+"""
+
+# Rendered system-prompt prefixes, shared by all executors:
+# (registry version, allowed tools, max parallel actions, persona prompt) -> prefix
+_SYSTEM_PREFIX_CACHE: Dict[Tuple[int, frozenset, int, str], str] = {}
+
 
 class ExecutorAgent:
     def __init__(
@@ -55,6 +117,10 @@ class ExecutorAgent:
         max_retries: int = 3,
         retry_delay: float = 2.0,
         allowed_tools: Optional[List[str]] = None,
+        conversation_mode: Optional[str] = None,
+        history_token_budget: Optional[int] = None,
+        keep_last_turns: Optional[int] = None,
+        max_parallel_actions: Optional[int] = None,
     ):
         self.work_dir = work_dir
 
@@ -69,11 +135,40 @@ class ExecutorAgent:
         self.max_retries = max_retries
         self.retry_delay = retry_delay
         self.allowed_tools = allowed_tools
+        executor_config = self._load_executor_config()
+        self.conversation_mode = conversation_mode or executor_config.conversation_mode
+        self.history_token_budget = (
+            history_token_budget if history_token_budget is not None else executor_config.history_token_budget
+        )
+        self.keep_last_turns = keep_last_turns if keep_last_turns is not None else executor_config.keep_last_turns
+        self.compacted_summary_chars = executor_config.compacted_summary_chars
+        self.max_parallel_actions = max(
+            1, max_parallel_actions if max_parallel_actions is not None else executor_config.max_parallel_actions
+        )
+        self.spill_config = {
+            "scratch_dir": executor_config.scratch_dir,
+            "threshold_chars": executor_config.spill_threshold_chars,
+            "head_chars": executor_config.spill_preview_head_chars,
+            "tail_chars": executor_config.spill_preview_tail_chars,
+        }
+
+        # Persistent shell for run_command(session=true), started on first use;
+        # closed by close() or after shell.session_idle_timeout_seconds idle
+        self._shell_session = None
 
         # Trace tracking
         self.current_task = None
         self.react_history = []
-        
+        self.compaction_stats = None
+
+    @staticmethod
+    def _load_executor_config():
+        from src.config import ExecutorConfig, get_config
+        try:
+            return get_config().executor
+        except Exception:  # pylint: disable=broad-except
+            return ExecutorConfig(conversation_mode="full")
+
     def set_persona(self, persona_name: str):
         """Sets the persona for the agent"""
         if self.persona_engine.switch_persona(persona_name):
@@ -82,28 +177,20 @@ class ExecutorAgent:
             logger.warning(f"⚠️ Persona not found: {persona_name}")
 
     def _get_tool_descriptions(self) -> str:
-        schemas = registry.get_all_schemas()
-        allowed = set(self.allowed_tools) if self.allowed_tools else None
-        if allowed:
-            filtered = [s for s in schemas if s["name"] in allowed]
-            if filtered:
-                schemas = filtered
-            else:
-                logger.warning("Allowed tools configured but none matched registry; falling back to all tools.")
-        desc = []
-        for s in schemas:
-            desc.append(f"- {s['name']}: {s['description']}")
-            input_schema = s.get("input_schema", {})
-            if input_schema:
-                compact_schema = {
-                    "type": "object",
-                    "properties": input_schema.get("properties", {})
-                }
-                required = input_schema.get("required", [])
-                if required:
-                    compact_schema["required"] = required
-                desc.append(f"  Input JSON: {json.dumps(compact_schema, separators=(',', ':'))}")
-        return "\n".join(desc)
+        return registry.render_tool_descriptions(self.allowed_tools)
+
+    def _get_system_prefix(self) -> str:
+        """ReAct instructions + tool descriptions + persona prompt, memoised per tool set and persona"""
+        persona_prompt = self.persona_engine.get_system_prompt()
+        key = (registry.version, frozenset(self.allowed_tools or ()), self.max_parallel_actions, persona_prompt)
+        prefix = _SYSTEM_PREFIX_CACHE.get(key)
+        if prefix is None:
+            base_system_prompt = REACT_SYSTEM_PROMPT.format(tool_descriptions=self._get_tool_descriptions())
+            if self.max_parallel_actions > 1:
+                base_system_prompt += BATCH_ACTIONS_PROMPT.format(max_actions=self.max_parallel_actions)
+            prefix = f"{base_system_prompt}\n\n{persona_prompt}"
+            _SYSTEM_PREFIX_CACHE[key] = prefix
+        return prefix
 
     def _parse_action(self, text: str) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
         """Parses the Action and Action Input from text"""
@@ -137,6 +224,71 @@ class ExecutorAgent:
             logger.error(f"Failed to parse JSON args: {input_str[:200]}...")
             return action, None
 
+    def _parse_actions(self, text: str) -> List[Tuple[str, Optional[Dict[str, Any]]]]:
+        """Parses every Action / Action Input pair from text (batched tool calls)"""
+        from src.utils.json_utils import extract_json
+
+        matches = list(ACTION_LINE_PATTERN.finditer(text))
+        actions = []
+        for index, match in enumerate(matches):
+            segment_end = matches[index + 1].start() if index + 1 < len(matches) else len(text)
+            segment = text[match.end():segment_end]
+            input_match = re.search(r"Action Input:\s*(.+)", segment, re.DOTALL)
+            args = extract_json(input_match.group(1).strip()) if input_match else None
+            actions.append((match.group(1).strip(), args if isinstance(args, dict) else None))
+        return actions
+
+    async def _execute_batch(
+        self,
+        step: int,
+        actions: List[Tuple[str, Optional[Dict[str, Any]]]],
+        spiller: ObservationSpiller,
+    ) -> str:
+        """
+        Runs a batch of tool calls and returns their observations in request order.
+
+        Actions whose Action Input is missing or invalid JSON (args None) are not
+        run; each gets an error observation while the valid ones still run.
+        """
+        batch = actions[:self.max_parallel_actions]
+        skipped = actions[self.max_parallel_actions:]
+
+        async def _run_one(index: int, action: str, args: Optional[Dict[str, Any]]) -> str:
+            if args is None:
+                logger.warning(f"Action [{index}/{len(batch)}] {action}: Action Input missing or invalid JSON")
+                return (
+                    f"Error: the Action Input for {action} was missing or invalid JSON, so this action "
+                    "was not run. Restate it with valid JSON if it is still needed."
+                )
+            logger.info(f"Calling Tool [{index}/{len(batch)}]: {action}")
+            try:
+                result = await registry.execute_async(action, args)
+                return spiller.process(step, action, args, str(result), index=index)
+            except Exception as e:  # pylint: disable=broad-except
+                return f"Error executing tool: {str(e)}"
+
+        if all(action in PARALLEL_SAFE_TOOLS for action, args in batch if args is not None):
+            outputs = await asyncio.gather(*(
+                _run_one(index, action, args) for index, (action, args) in enumerate(batch, 1)
+            ))
+        else:
+            # Side-effecting tools keep the requested order
+            outputs = [await _run_one(index, action, args) for index, (action, args) in enumerate(batch, 1)]
+
+        parts = []
+        for index, ((action, args), output) in enumerate(zip(batch, outputs), 1):
+            call = json.dumps(args, ensure_ascii=False) if args is not None else "(invalid Action Input)"
+            if len(call) > 200:
+                call = call[:200] + "..."
+            parts.append(f"Observation [{index}/{len(batch)}] {action} {call}:\n{output}")
+        if skipped:
+            parts.append(
+                f"System: {len(skipped)} more action(s) skipped ("
+                + ", ".join(action for action, _ in skipped)
+                + f"); at most {self.max_parallel_actions} actions run per step. Request them again if still needed."
+            )
+        return "\n\n".join(parts)
+
     def _extract_final_answer(self, text: str) -> Optional[str]:
         """Extracts a final answer block, allowing common markdown variants."""
         match = FINAL_ANSWER_PATTERN.search(text)
@@ -168,8 +320,22 @@ class ExecutorAgent:
         keywords = ("verify", "check", "validate", "audit", "review")
         return any(keyword in lowered for keyword in keywords)
 
-    async def execute_task(self, task_description: str) -> str:
-        """Executes a single sub-task"""
+    async def close(self):
+        """Release the executor's persistent shell session (a later task starts a new one)."""
+        if self._shell_session is not None:
+            session, self._shell_session = self._shell_session, None
+            await session.close()
+
+    async def execute_task(self, task_description: Union[str, PromptLayout]) -> str:
+        """
+        Executes a single sub-task
+
+        task_description may be a PromptLayout: its stable segments (e.g. a role's
+        full prompt) join the cacheable system prompt, the rest becomes the Task.
+        """
+        task_layout = PromptLayout.of(task_description, CallClass.EXECUTOR)
+        task_prefix, task_text = task_layout.split()
+        task_description = task_layout.render()
         logger.info(f"🤖 Executor started task: {task_description}")
 
         # Record for trace
@@ -183,30 +349,44 @@ class ExecutorAgent:
         required_files = self._extract_required_files(task_description)
         enforce_required_files = bool(required_files) and not self._is_verification_task(task_description)
 
-        # CRITICAL: Change process working directory to match work_dir
-        # This ensures all file operations using relative paths are relative to work_dir
-        original_cwd = work_dir_path
-        os.chdir(work_dir_path)
-        logger.info(f"📂 Set CWD to work_dir: {work_dir_path}")
+        # Bind work_dir as this task's workspace: tools resolve relative paths
+        # against it instead of the process CWD, so executors can run concurrently
+        workspace_token = bind_workspace(work_dir_path)
+        # Repeated cacheable tool calls within this task are served from a memo
+        memo_token = bind_tool_memo(registry.task_memo())
+        # run_command(session=true) reuses this executor's shell across tasks
+        if self._shell_session is None:
+            self._shell_session = new_shell_session(work_dir_path)
+        shell_token = bind_shell_session(self._shell_session)
+        spiller: Optional[ObservationSpiller] = None
 
         try:
-            tool_desc = self._get_tool_descriptions()
-
-            persona_prompt = self.persona_engine.get_system_prompt()
-            base_system_prompt = REACT_SYSTEM_PROMPT.format(tool_descriptions=tool_desc)
+            system_prefix = self._get_system_prefix()
 
             # Add work directory instruction to system prompt
             # IMPORTANT: Use forward slashes for JSON compatibility
             work_dir_str = str(work_dir_path).replace('\\', '/')
             work_dir_instruction = f"\n\n## Working Directory\nAll file operations should use paths relative to: {self.work_dir}\nWhen using write_file or read_file, use RELATIVE paths like 'filename.md' or 'subdir/filename.md'\nDO NOT use absolute paths. Always use forward slashes (/) in paths for JSON compatibility."
-            full_system_prompt = f"{base_system_prompt}\n\n{persona_prompt}{work_dir_instruction}"
-
-            history = [
-                f"System: {full_system_prompt}",
-                f"Task: {task_description}"
-            ]
-
-            current_prompt = "\n\n".join(history)
+            # Stable layers go to the cacheable system prompt, identical on every step
+            system_layout = (
+                PromptLayout(CallClass.EXECUTOR)
+                .add("react_system", system_prefix, Stability.STATIC)
+                .add("working_directory", work_dir_instruction, Stability.SESSION)
+                .add("task_context", task_prefix, Stability.SESSION)
+            )
+            full_system_prompt = system_layout.render()
+
+            transcript = ReActTranscript(
+                None,
+                task_text,
+                token_budget=self.history_token_budget,
+                keep_last_turns=self.keep_last_turns,
+                summary_chars=self.compacted_summary_chars,
+            )
+            self.compaction_stats = transcript.stats
+            spiller = ObservationSpiller(str(work_dir_path), **self.spill_config)
+            incremental = self.conversation_mode == "incremental"
+            cli_session_id: Optional[str] = None
             step = 0
             no_action_count = 0
             max_no_action = 5
@@ -216,25 +396,89 @@ class ExecutorAgent:
                 step += 1
                 logger.info(f"🔄 ReAct Step {step}/{self.max_steps}")
 
+                if incremental and cli_session_id and transcript.session_over_budget():
+                    # A resumed session keeps everything it was sent; re-seed a fresh
+                    # session with the compacted transcript instead of growing it
+                    session_tokens = transcript.session_tokens()
+                    transcript.stats.reseeds += 1
+                    logger.info(
+                        f"🗜️ CLI session at ~{session_tokens} tokens exceeds history budget "
+                        f"{self.history_token_budget}; re-seeding with compacted transcript"
+                    )
+                    emit_llm_event(
+                        EventType.EXECUTOR_HISTORY_COMPACTED,
+                        step=step,
+                        reason="reseed",
+                        session_tokens=session_tokens,
+                        token_budget=self.history_token_budget,
+                    )
+                    cli_session_id = None
+
+                resume_session_id = cli_session_id if incremental else None
+                if resume_session_id:
+                    current_prompt = transcript.render_pending()
+                else:
+                    current_prompt = transcript.render_full()
+                    if transcript.stats.last_bytes_saved:
+                        logger.info(
+                            f"🗜️ History compacted: saved {transcript.stats.last_bytes_saved} bytes "
+                            f"(prompt {len(current_prompt)} chars, total saved {transcript.stats.total_bytes_saved})"
+                        )
+                        emit_llm_event(
+                            EventType.EXECUTOR_HISTORY_COMPACTED,
+                            step=step,
+                            reason="compact",
+                            bytes_saved=transcript.stats.last_bytes_saved,
+                            prompt_chars=len(current_prompt),
+                            total_bytes_saved=transcript.stats.total_bytes_saved,
+                        )
+
                 try:
-                    response_text, _ = await run_claude_prompt(
-                        current_prompt,
-                        "./", 
-                        # self.work_dir,
+                    step_prompt = (
+                        PromptLayout(CallClass.EXECUTOR)
+                        .add("system", full_system_prompt, Stability.STATIC)
+                        .add("conversation", current_prompt, Stability.VOLATILE)
+                    )
+                    response_text, result_message = await run_claude_prompt(
+                        step_prompt,
+                        str(work_dir_path),
                         model=self.model,
                         permission_mode=self.permission_mode,
                         timeout=self.timeout_seconds,
                         max_retries=self.max_retries,
                         retry_delay=self.retry_delay,
+                        # The CLI session of an incremental conversation belongs to this task alone
+                        use_pool=not incremental,
+                        use_cache=not incremental,
+                        use_coalescing=not incremental,
+                        resume_session_id=resume_session_id,
+                        call_class=CallClass.EXECUTOR,
                     )
-
-                    # Record for trace
-                    self.react_history.append(response_text)
-
                 except Exception as exc:  # pylint: disable=broad-except
+                    if resume_session_id:
+                        logger.warning(f"Resuming CLI session failed ({exc}); falling back to full transcript mode")
+                        incremental = False
+                        step -= 1
+                        continue
                     logger.error(f"Executor Claude query failed: {exc}")
                     return f"Error: {exc}"
 
+                if incremental:
+                    if result_message is None or result_message.is_error or not result_message.session_id:
+                        if resume_session_id:
+                            logger.warning("Resumed CLI session returned an error; falling back to full transcript mode")
+                            incremental = False
+                            step -= 1
+                            continue
+                        logger.warning("No CLI session id returned; using full transcript mode")
+                        incremental = False
+                    else:
+                        cli_session_id = result_message.session_id
+                        transcript.mark_delivered(None if resume_session_id else current_prompt)
+
+                # Record for trace
+                self.react_history.append(response_text)
+
                 logger.debug(f"Claude Response:\n{response_text}")
 
                 # Debug: Log response to help diagnose "No action detected" issue
@@ -253,12 +497,11 @@ class ExecutorAgent:
                     if enforce_required_files:
                         if tool_calls == 0:
                             logger.warning("Final Answer provided but no tools were called.")
-                            history.append(response_text.strip())
-                            history.append(
+                            transcript.add_turn(
+                                response_text,
                                 "System: You must call the appropriate tools before finalizing. "
                                 "Use web_search/read_file/write_file as needed."
                             )
-                            current_prompt = "\n\n".join(history)
                             no_action_count += 1
                             if no_action_count >= max_no_action:
                                 logger.error("Repeated invalid responses without tool use. Aborting.")
@@ -273,13 +516,12 @@ class ExecutorAgent:
                         ]
                         if missing:
                             logger.warning(f"Final Answer provided but required files missing: {missing}")
-                            history.append(response_text.strip())
-                            history.append(
+                            transcript.add_turn(
+                                response_text,
                                 "System: Missing required files: "
                                 + ", ".join(missing)
                                 + ". Use write_file to create them before finalizing."
                             )
-                            current_prompt = "\n\n".join(history)
                             no_action_count += 1
                             if no_action_count >= max_no_action:
                                 logger.error("Repeated invalid responses without required files. Aborting.")
@@ -291,6 +533,26 @@ class ExecutorAgent:
                     logger.info(f"Task Completed: {final_answer}")
                     return final_answer
 
+                actions = self._parse_actions(response_text)
+                if len(actions) > 1:
+                    logger.info(f"🧩 Batch of {len(actions)} actions: {[name for name, _ in actions]}")
+                    valid_calls = sum(1 for _, args in actions[:self.max_parallel_actions] if args is not None)
+                    if valid_calls:
+                        no_action_count = 0
+                        tool_calls += valid_calls
+                    else:
+                        no_action_count += 1
+                    observation = await self._execute_batch(step, actions, spiller)
+                    transcript.add_turn(
+                        response_text,
+                        observation,
+                        action="batch[" + ", ".join(name for name, _ in actions) + "]",
+                    )
+                    if no_action_count >= max_no_action:
+                        logger.error("Repeated batches without a valid Action Input. Aborting.")
+                        return f"Error: No valid Action Input after {no_action_count} consecutive steps."
+                    continue
+
                 action, args = self._parse_action(response_text)
 
                 # Debug: Log parsing results
@@ -304,33 +566,34 @@ class ExecutorAgent:
                     logger.info(f"Calling Tool: {action}")
                     result = None
                     try:
-                        result = registry.execute(action, args)
-                        observation = f"\nObservation: {result}\n"
+                        result = await registry.execute_async(action, args)
+                        observation = f"\nObservation: {spiller.process(step, action, args, str(result))}\n"
                     except Exception as e:  # pylint: disable=broad-except
                         observation = f"\nObservation: Error executing tool: {str(e)}\n"
 
                     logger.debug(f"Tool Result: {result}")
 
-                    history.append(response_text.strip())
-                    history.append(observation.strip())
-                    current_prompt = "\n\n".join(history)
+                    transcript.add_turn(response_text, observation, action=action, args=args)
 
                 else:
                     no_action_count += 1
                     if action and args is None:
                         logger.warning("Action Input missing or invalid JSON.")
-                        history.append(response_text.strip())
-                        history.append("System: I saw an Action but the Action Input was missing or invalid JSON. Please restate the tool call using Action and Action Input with valid JSON.")
-                        current_prompt = "\n\n".join(history)
+                        transcript.add_turn(
+                            response_text,
+                            "System: I saw an Action but the Action Input was missing or invalid JSON. Please restate the tool call using Action and Action Input with valid JSON."
+                        )
                     elif "Thought:" in response_text and not action:
-                        history.append(response_text.strip())
-                        history.append("System: I did not see a valid 'Action:' and 'Action Input:'. Please format your tool call correctly.")
-                        current_prompt = "\n\n".join(history)
+                        transcript.add_turn(
+                            response_text,
+                            "System: I did not see a valid 'Action:' and 'Action Input:'. Please format your tool call correctly."
+                        )
                     else:
                         logger.warning("No action detected and no Final Answer.")
-                        history.append(response_text.strip())
-                        history.append("System: Please continue. If done, say 'Final Answer:'.")
-                        current_prompt = "\n\n".join(history)
+                        transcript.add_turn(
+                            response_text,
+                            "System: Please continue. If done, say 'Final Answer:'."
+                        )
                     if no_action_count >= max_no_action:
                         logger.error("Repeated invalid responses without Action/Final Answer. Aborting.")
                         return f"Error: No valid Action/Final Answer after {no_action_count} consecutive steps."
@@ -338,10 +601,11 @@ class ExecutorAgent:
             return "Error: Max steps reached without completion."
 
         finally:
-            # Ensure CWD stays at work_dir for validation
-            # (original_cwd is set to work_dir_path to keep validation working)
-            os.chdir(original_cwd)
-            logger.info(f"📂 Ensured CWD at work_dir: {original_cwd}")
+            if spiller is not None:
+                spiller.cleanup()
+            reset_shell_session(shell_token)
+            reset_tool_memo(memo_token)
+            reset_workspace(workspace_token)
 
     def export_react_trace(
         self,
@@ -375,6 +639,14 @@ class ExecutorAgent:
                 "",
                 f"**Timestamp**: {datetime.now().isoformat()}",
                 f"**Session**: {session_id}",
+            ]
+            if self.compaction_stats and (self.compaction_stats.compactions or self.compaction_stats.reseeds):
+                content.append(
+                    f"**History Compaction**: {self.compaction_stats.compactions} steps, "
+                    f"{self.compaction_stats.total_bytes_saved} bytes saved, "
+                    f"{self.compaction_stats.reseeds} session re-seeds"
+                )
+            content += [
                 "",
                 "---",
                 "",
@@ -0,0 +1,112 @@
+"""
+Observation Spill - 大型工具输出落盘
+
+超过阈值的工具输出不再整段写入 ReAct 记录：
+- 完整输出写入工作目录下的每任务临时目录（如 .scratch/<task_id>/step003_run_command.txt）
+- 记录中只保留开头 / 结尾预览和文件句柄，模型可用 read_file 按行或字节分页读取
+- 整文件 read_file 的输出直接引用原文件，不再复制
+- 任务结束时 cleanup() 删除该任务的临时目录（句柄只在本任务的记录中出现）
+"""
+import shutil
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from src.utils.logger import get_logger
+
+logger = get_logger()
+
+
+class ObservationSpiller:
+    """把大型工具输出写入临时文件，并返回带句柄的预览"""
+
+    def __init__(
+        self,
+        work_dir: str,
+        scratch_dir: str = ".scratch",
+        threshold_chars: int = 8000,
+        head_chars: int = 1500,
+        tail_chars: int = 500,
+    ):
+        """
+        Args:
+            work_dir: 工作目录（句柄为相对该目录的路径）
+            scratch_dir: 临时目录（相对 work_dir）
+            threshold_chars: 超过该字符数的输出会落盘
+            head_chars: 预览保留的开头字符数
+            tail_chars: 预览保留的结尾字符数
+        """
+        self.work_dir = Path(work_dir).resolve()
+        task_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        self.scratch_dir = Path(scratch_dir)
+        self.task_dir = self.scratch_dir / task_id
+        self.threshold_chars = threshold_chars
+        self.head_chars = head_chars
+        self.tail_chars = tail_chars
+        self.spilled = 0
+        self.bytes_spilled = 0
+
+    def process(
+        self,
+        step: int,
+        action: str,
+        args: Optional[Dict[str, Any]],
+        output: str,
+        index: Optional[int] = None,
+    ) -> str:
+        """返回写入 ReAct 记录的内容（小输出原样返回；index 区分同一步中的批量调用）"""
+        if self.threshold_chars <= 0 or len(output) <= self.threshold_chars:
+            return output
+
+        handle = self._existing_file_handle(action, args)
+        if handle is None:
+            handle = self._write(step, action, output, index)
+            if handle is None:
+                return output
+
+        self.spilled += 1
+        self.bytes_spilled += len(output.encode("utf-8"))
+        line_count = output.count("\n") + 1
+        omitted = len(output) - self.head_chars - self.tail_chars
+        return (
+            f"[{action} output is {len(output)} chars / {line_count} lines; full output: {handle}]\n"
+            f"{output[:self.head_chars]}\n"
+            f"... [{omitted} chars omitted] ...\n"
+            f"{output[-self.tail_chars:] if self.tail_chars else ''}\n"
+            f"[To see more, call read_file with path=\"{handle}\" and offset/limit "
+            f"(unit \"lines\" or \"bytes\") to page through it]"
+        )
+
+    @staticmethod
+    def _existing_file_handle(action: str, args: Optional[Dict[str, Any]]) -> Optional[str]:
+        """整文件 read_file：直接引用原文件"""
+        if action != "read_file" or not args or not args.get("path"):
+            return None
+        if args.get("offset") or args.get("limit"):
+            return None
+        return str(args["path"]).replace("\\", "/")
+
+    def _write(self, step: int, action: str, output: str, index: Optional[int]) -> Optional[str]:
+        suffix = f"_{index}" if index is not None else ""
+        relative = self.task_dir / f"step{step:03d}{suffix}_{action}.txt"
+        try:
+            target = self.work_dir / relative
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_text(output, encoding="utf-8")
+        except OSError as e:
+            logger.warning(f"Failed to spill {action} output to scratch file: {e}")
+            return None
+        return relative.as_posix()
+
+    def cleanup(self):
+        """删除本任务的临时文件；临时目录为空时一并删除"""
+        task_dir = self.work_dir / self.task_dir
+        if task_dir.exists():
+            shutil.rmtree(task_dir, ignore_errors=True)
+            logger.debug(f"Removed scratch files of {self.spilled} spilled outputs: {task_dir}")
+        try:
+            (self.work_dir / self.scratch_dir).rmdir()
+        except OSError:
+            # 不存在或仍有其他任务的文件
+            pass
@@ -10,18 +10,14 @@ from pydantic import BaseModel
 
 from src.utils.logger import get_logger
 from src.core.agents.sdk_client import run_claude_prompt
+from src.core.llm.call_context import CallClass
+from src.core.llm.prompt_layout import PromptLayout, Stability
 
 logger = get_logger()
 
-PLANNER_SYSTEM_PROMPT = """You are a Planner. Break this goal into sub-tasks:
-
-Goal: {goal}
-
-Current Plan:
-{plan_state}
-
-Required output files (use exact filenames):
-{required_files}
+# Prompt segments, ordered from most to least stable (see PromptLayout):
+# rules are fixed, goal / required files are fixed per planner, plan state changes every call
+PLANNER_SYSTEM_PROMPT = """You are a Planner. Break the goal below into sub-tasks.
 
 Rules:
 - Create 3-7 atomic sub-tasks if plan is empty
@@ -30,11 +26,21 @@ Rules:
 - Ensure the plan includes producing all required files
 - Output ONLY JSON
 
-{{
-    "plan": [{{"id": 1, "task": "...", "status": "pending"}}],
+{
+    "plan": [{"id": 1, "task": "...", "status": "pending"}],
     "next_task": "...",
     "is_complete": false
-}}
+}
+"""
+
+PLANNER_GOAL_PROMPT = """Goal: {goal}
+
+Required output files (use exact filenames):
+{required_files}
+"""
+
+PLANNER_STATE_PROMPT = """Current Plan:
+{plan_state}
 """
 
 
@@ -118,20 +124,15 @@ class PlannerAgent:
         self.last_result = last_result
 
         plan_state = json.dumps([t.model_dump() for t in self.plan.tasks], indent=2)
-        try:
-            required_files_str = "\n".join(f"- {f}" for f in self.required_files) or "None."
-            prompt = PLANNER_SYSTEM_PROMPT.format(
-                goal=self.goal,
-                plan_state=plan_state,
-                required_files=required_files_str,
-            )
-        except KeyError as e:
-            logger.error(f"Failed to format planner prompt: {e}")
-            logger.error("Check for single braces '{' in PLANNER_SYSTEM_PROMPT that should be double braces '{{'")
-            raise e
-
+        required_files_str = "\n".join(f"- {f}" for f in self.required_files) or "None."
+        prompt = (
+            PromptLayout(CallClass.PLANNER)
+            .add("planner_rules", PLANNER_SYSTEM_PROMPT, Stability.STATIC)
+            .add("goal", PLANNER_GOAL_PROMPT.format(goal=self.goal, required_files=required_files_str), Stability.SESSION)
+            .add("plan_state", PLANNER_STATE_PROMPT.format(plan_state=plan_state), Stability.VOLATILE)
+        )
         if last_result:
-            prompt += f"\n\nLast Executor Result: {last_result}"
+            prompt.add("last_result", f"Last Executor Result: {last_result}", Stability.VOLATILE)
 
         try:
             response_text, _ = await run_claude_prompt(
@@ -142,6 +143,7 @@ class PlannerAgent:
                 timeout=dynamic_timeout,  # Use dynamic timeout
                 max_retries=self.max_retries,
                 retry_delay=self.retry_delay,
+                call_class=CallClass.PLANNER,
             )
 
             # Store response for trace
@@ -0,0 +1,199 @@
+"""
+ReAct Transcript - ReAct对话记录
+
+保存 ExecutorAgent 一次任务中的系统提示、任务和每一轮 (模型回复, 后续消息)，
+并按对话模式渲染下一次要发送的 prompt：
+- full: 每一步发送完整记录（System + Task + 全部历史）
+- incremental: 首步发送完整记录，之后续接同一 CLI 会话，只发送模型尚未看到的新消息
+
+完整记录超出 token 预算时进行压缩：System 和 Task 原样保留，最近 K 轮原样保留，
+更早的 Observation（必要时连同模型回复）替换为简短摘要，并记录节省的字节数。
+incremental 模式下续接的会话无法压缩：会话累计内容（种子 prompt + 之后的回复和消息）
+超出预算时 session_over_budget() 为真，调用方应放弃该会话，用压缩后的完整记录开启新会话（重新播种）。
+"""
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数（约 4 字符 / token）"""
+    return len(text) // 4
+
+
+@dataclass
+class ReActTurn:
+    """一轮 ReAct 交互：模型回复 + 随后发给模型的消息（Observation / System 提示）"""
+    response: str
+    message: str
+    action: Optional[str] = None
+    args: Optional[Dict[str, Any]] = None
+
+
+@dataclass
+class CompactionStats:
+    """历史压缩统计"""
+    compactions: int = 0
+    last_bytes_saved: int = 0
+    total_bytes_saved: int = 0
+    reseeds: int = 0
+
+    def to_dict(self) -> Dict:
+        return {
+            "compactions": self.compactions,
+            "last_bytes_saved": self.last_bytes_saved,
+            "total_bytes_saved": self.total_bytes_saved,
+            "reseeds": self.reseeds,
+        }
+
+
+class ReActTranscript:
+    """ReAct 对话记录"""
+
+    def __init__(
+        self,
+        system_prompt: Optional[str],
+        task: str,
+        *,
+        token_budget: Optional[int] = None,
+        keep_last_turns: int = 4,
+        summary_chars: int = 200,
+    ):
+        """
+        Args:
+            system_prompt: 系统提示（始终原样保留；None 表示系统提示单独发送，不计入记录）
+            task: 任务描述（始终原样保留）
+            token_budget: 完整记录的 token 预算（None 表示不压缩）
+            keep_last_turns: 始终原样保留的最近轮数
+            summary_chars: 压缩后每条摘要保留的开头字符数
+        """
+        self.system_prompt = system_prompt
+        self.task = task
+        self.token_budget = token_budget
+        self.keep_last_turns = max(0, keep_last_turns)
+        self.summary_chars = summary_chars
+        self.turns: List[ReActTurn] = []
+        self.stats = CompactionStats()
+        # 已送达模型的轮数（incremental 模式下这些轮次的消息无需重发）
+        self._delivered = 0
+        # 当前 CLI 会话的种子：播种时的轮数和种子 prompt 的 token 数
+        self._seed_turns = 0
+        self._seed_tokens = 0
+
+    def add_turn(
+        self,
+        response: str,
+        message: str,
+        action: Optional[str] = None,
+        args: Optional[Dict[str, Any]] = None,
+    ):
+        """追加一轮交互（工具调用轮次附带 action / args，用于生成压缩摘要）"""
+        self.turns.append(
+            ReActTurn(response=response.strip(), message=message.strip(), action=action, args=args)
+        )
+
+    def entries(self) -> List[str]:
+        """完整记录（与旧版 history 列表格式一致）"""
+        entries = self._head()
+        for turn in self.turns:
+            entries.append(turn.response)
+            entries.append(turn.message)
+        return entries
+
+    def _head(self) -> List[str]:
+        head = [f"Task: {self.task}"]
+        if self.system_prompt is not None:
+            head.insert(0, f"System: {self.system_prompt}")
+        return head
+
+    def render_full(self) -> str:
+        """渲染完整记录；超出 token 预算时压缩较早的轮次"""
+        full = "\n\n".join(self.entries())
+        self.stats.last_bytes_saved = 0
+        if self.token_budget is None or estimate_tokens(full) <= self.token_budget:
+            return full
+
+        compacted = self._compact()
+        saved = len(full.encode("utf-8")) - len(compacted.encode("utf-8"))
+        if saved > 0:
+            self.stats.compactions += 1
+            self.stats.last_bytes_saved = saved
+            self.stats.total_bytes_saved += saved
+        return compacted
+
+    def _compact(self) -> str:
+        """压缩较早的轮次直到不超出预算（不更新统计）"""
+        head = self._head()
+        pairs = [[turn.response, turn.message] for turn in self.turns]
+        compactable = max(0, len(pairs) - self.keep_last_turns)
+
+        def _render() -> str:
+            return "\n\n".join(head + [entry for pair in pairs for entry in pair])
+
+        # 先压缩旧 Observation，仍超出预算再压缩旧的模型回复（均从最旧开始）
+        for index in range(compactable):
+            pairs[index][1] = self._summarize_message(self.turns[index])
+            if estimate_tokens(_render()) <= self.token_budget:
+                break
+        else:
+            for index in range(compactable):
+                pairs[index][0] = self._summarize_text(self.turns[index].response)
+                if estimate_tokens(_render()) <= self.token_budget:
+                    break
+        return _render()
+
+    def _summarize_text(self, text: str) -> str:
+        if len(text) <= self.summary_chars:
+            return text
+        return f"{text[:self.summary_chars]}... [{len(text) - self.summary_chars} chars omitted]"
+
+    def _summarize_message(self, turn: ReActTurn) -> str:
+        if len(turn.message) <= self.summary_chars:
+            return turn.message
+        if turn.action:
+            call = turn.action
+            if turn.args is not None:
+                call += f" {json.dumps(turn.args, ensure_ascii=False)[:200]}"
+            return (
+                f"Observation (compacted: {call} returned {len(turn.message)} chars; "
+                f"call the tool again if you need the full output): "
+                f"{turn.message.removeprefix('Observation:').strip()[:self.summary_chars]}..."
+            )
+        return self._summarize_text(turn.message)
+
+    def render_pending(self) -> str:
+        """渲染模型尚未看到的新消息（incremental 模式）"""
+        return "\n\n".join(turn.message for turn in self.turns[self._delivered:])
+
+    def session_tokens(self) -> int:
+        """发送待发消息后，当前 CLI 会话累计的 token 数（估算）"""
+        return self._seed_tokens + sum(
+            estimate_tokens(turn.response) + estimate_tokens(turn.message)
+            for turn in self.turns[self._seed_turns:]
+        )
+
+    def session_over_budget(self) -> bool:
+        """
+        续接当前会话是否会超出 token 预算（超出时应重新播种）
+
+        压缩后的完整记录本身接近预算时，重新播种省不下多少；只有新种子比当前会话
+        至少小 1/4 预算时才返回真，避免每一步都重开会话。
+        """
+        if self.token_budget is None:
+            return False
+        session_tokens = self.session_tokens()
+        if session_tokens <= self.token_budget:
+            return False
+        return session_tokens - estimate_tokens(self._compact()) >= self.token_budget // 4
+
+    def mark_delivered(self, seed_prompt: Optional[str] = None):
+        """
+        标记当前所有轮次已送达模型
+
+        Args:
+            seed_prompt: 本次开启了新会话时传入发送的完整记录（作为会话种子计入 token）
+        """
+        self._delivered = len(self.turns)
+        if seed_prompt is not None:
+            self._seed_turns = len(self.turns)
+            self._seed_tokens = estimate_tokens(seed_prompt)
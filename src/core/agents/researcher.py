@@ -2,15 +2,28 @@
 Researcher Agent: wraps web search + summarization.
 增强版：支持缓存、多轮研究、质量评估
 """
-from typing import Optional, Dict, List
-from datetime import datetime, timedelta
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Dict, FrozenSet, List, Set, Tuple
+from datetime import datetime
 from pathlib import Path
+import asyncio
 import hashlib
 import json
+import os
+import random
+import re
+import threading
+import time
 
 from src.utils.logger import get_logger
-from src.core.tools.search_tools import web_search
+from src.core.events import EventType
+from src.core.llm.telemetry import emit_llm_event
+from src.core.search_cache import normalize_query
+from src.core.tools.search_tools import format_batch, format_response
+from src.core.web_search import get_web_search_settings, search, search_many
 from src.core.agents.sdk_client import run_claude_prompt
+from src.core.llm.call_context import CallClass
 
 logger = get_logger()
 
@@ -38,59 +51,480 @@ Task: Synthesize ALL findings (previous + current) into a comprehensive summary.
 - Rate the quality of information (1-10)
 """
 
+FOLLOW_UP_PROMPT = """
+Finally, list up to {max_queries} NEW web search queries that would fill the most important gaps
+in these findings, one per line, after a line reading exactly:
+FOLLOW-UP QUERIES:
+Write NONE after it if no further searching is needed.
+"""
+
+FOLLOW_UP_MARKER = re.compile(r"(?im)^\s*\**\s*FOLLOW-UP QUERIES\s*:?\s*\**\s*$")
+
+
+def split_follow_up_queries(text: str) -> Tuple[str, List[str]]:
+    """把回答拆成 (研究结论, 后续查询列表)；没有 FOLLOW-UP QUERIES 段落时查询列表为空"""
+    match = FOLLOW_UP_MARKER.search(text)
+    if not match:
+        return text.strip(), []
+    queries = []
+    for line in text[match.end():].splitlines():
+        line = re.sub(r"^\s*(?:[-*•]|\d+[.)])\s*", "", line).strip().strip('"\'`')
+        if line and line.upper() != "NONE":
+            queries.append(line)
+    return text[:match.start()].strip(), queries
+
+
+# 查询规范化时去掉的虚词（疑问词和否定词决定问题的含义，不在其中）
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from in is it of on or the to vs with "
+    "的 了 是 在 和 与 吗 呢".split()
+)
+# 疑问词和否定词：总是关键词（"why" 与 "when"、"use" 与 "do not use" 是不同的问题）
+_MEANING_WORDS = frozenset(
+    "how what when where which who whom whose why not no without never none "
+    "如 何 什 么 哪 谁 为 怎 不 没 无 非 未 别".split()
+)
+_QUERY_TOKEN_PATTERN = re.compile(r"[a-z0-9]+|[\u4e00-\u9fff]")
+
+# MinHash 签名长度与 LSH 分段（16 段 × 4 行；相似度 0.8 以上的查询几乎必然落入同一个桶）
+_MINHASH_PERMUTATIONS = 64
+_LSH_BANDS = 16
+_LSH_ROWS = _MINHASH_PERMUTATIONS // _LSH_BANDS
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20240601)
+_MINHASH_PARAMS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(_MINHASH_PERMUTATIONS)
+]
+
+
+def _normalize_token(token: str) -> Optional[str]:
+    token = token.lower()
+    if token in _STOPWORDS:
+        return None
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        token = token[:-1]
+    return token
+
+
+def normalize_query_tokens(query: str) -> FrozenSet[str]:
+    """规范化查询词集合：小写、去虚词、去复数 s；中文按单字"""
+    tokens = {_normalize_token(token) for token in _QUERY_TOKEN_PATTERN.findall(query.lower())}
+    tokens.discard(None)
+    return frozenset(tokens)
+
+
+_RAW_TOKEN_PATTERN = re.compile(r"[A-Za-z0-9]+|[\u4e00-\u9fff]")
+
+
+def query_key_terms(query: str) -> FrozenSet[str]:
+    """
+    决定查询含义的词（规范化后）：数字、中文字符、专有名词（句首以外的大写词）、全大写缩写、
+    疑问词和否定词
+
+    两条查询的差异词中只要包含任一方的关键词，就不视为近似重复
+    （"Beijing" 与 "Shanghai"、2024 与 2025、"why" 与 "when"、有无 "not"）。
+    """
+    terms = set()
+    for position, token in enumerate(_RAW_TOKEN_PATTERN.findall(query)):
+        is_key = (
+            token.lower() in _MEANING_WORDS
+            or any(ch.isdigit() for ch in token)
+            or not token.isascii()
+            or (len(token) > 1 and token.isupper())
+            or (position > 0 and token[0].isupper())
+        )
+        if is_key:
+            normalized = _normalize_token(token)
+            if normalized:
+                terms.add(normalized)
+    return frozenset(terms)
+
+
+def minhash_signature(shingles: FrozenSet[str]) -> Tuple[int, ...]:
+    """MinHash 签名（相同位置取值相等的比例估计 Jaccard 相似度）"""
+    if not shingles:
+        return ()
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for shingle in shingles
+    ]
+    return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _MINHASH_PARAMS)
+
+
+def _lsh_buckets(signature: Tuple[int, ...]) -> List[Tuple[int, Tuple[int, ...]]]:
+    if not signature:
+        return []
+    return [(band, signature[band * _LSH_ROWS:(band + 1) * _LSH_ROWS]) for band in range(_LSH_BANDS)]
+
+
+@dataclass
+class _ResearchEntry:
+    query: str
+    tokens: FrozenSet[str]
+    key_terms: FrozenSet[str]
+    signature: Tuple[int, ...]
+    created_at: float
+    size: int
+
+
+@dataclass
+class ResearchCacheHit:
+    """一次缓存命中（tier: memory / disk / near_duplicate）"""
+    result: str
+    tier: str
+    matched_query: str
+    similarity: float = 1.0
+
 
 class ResearchCache:
-    """研究结果缓存"""
+    """
+    研究结果缓存（三级）
 
-    def __init__(self, ttl_minutes: int = 60):
-        self.cache: Dict[str, Dict] = {}
-        self.ttl = timedelta(minutes=ttl_minutes)
+    - memory: 进程内 LRU，按规范化查询词集合精确匹配
+    - disk: 每个条目一个 JSON 文件（原子写入），重启后仍可命中；配置 cache_dir 时启用
+    - near_duplicate: 精确未命中时，用 MinHash + LSH 找出候选条目，
+      词集合 Jaccard 相似度不低于 similarity_threshold、且差异词中没有数字 / 专有名词等关键词
+      （query_key_terms）的最相似条目视为命中
 
-    def _get_key(self, query: str) -> str:
-        """生成缓存键"""
-        return hashlib.md5(query.lower().encode()).hexdigest()
+    条目按 LRU 顺序淘汰，直到条目数 / 总大小不超过上限；超过 TTL 的条目视为未命中并删除。
+    持久化目录可由多个实例 / 进程共享：精确未命中时直接读取对应文件，近似匹配前同步目录中
+    其他实例写入或删除的条目，淘汰按目录扫描（文件 mtime）进行。
+    """
+
+    TIERS = ("memory", "disk", "near_duplicate")
+
+    def __init__(
+        self,
+        ttl_minutes: float = 60,
+        cache_dir: Optional[str] = None,
+        max_entries: int = 1000,
+        max_size_mb: float = 50.0,
+        memory_entries: int = 128,
+        near_duplicate: bool = True,
+        similarity_threshold: float = 0.9,
+    ):
+        """
+        Args:
+            ttl_minutes: 条目有效期（分钟）
+            cache_dir: 持久化目录（None 时只在内存中缓存）
+            max_entries: 最大条目数
+            max_size_mb: 缓存总大小上限 (MB)
+            memory_entries: 内存中保留结果的条目数（只在内存中缓存时等于 max_entries）
+            near_duplicate: 是否启用近似重复查询匹配
+            similarity_threshold: 近似匹配的最低 Jaccard 相似度 (0-1)
+        """
+        self.ttl_seconds = ttl_minutes * 60
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_entries = max_entries
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.memory_entries = memory_entries if self.cache_dir else max_entries
+        self.near_duplicate = near_duplicate
+        self.similarity_threshold = similarity_threshold
+
+        # key -> 条目元数据，按最近使用顺序排列（最旧在前）
+        self._index: "OrderedDict[str, _ResearchEntry]" = OrderedDict()
+        # key -> 结果文本（内存层，LRU）
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], Set[str]] = {}
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+
+        self.lookups = 0
+        self.tier_hits = {tier: 0 for tier in self.TIERS}
+        self.writes = 0
+        self.evictions = 0
+        self.expired = 0
+
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._load_index()
+
+    # ---- 存储 ----
+
+    @staticmethod
+    def _get_key(query: str) -> str:
+        """生成缓存键（规范化词集合；没有有效词时退回小写原文）"""
+        tokens = normalize_query_tokens(query)
+        canonical = " ".join(sorted(tokens)) if tokens else query.lower().strip()
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    @staticmethod
+    def _read_entry_file(path: Path) -> Optional[Tuple[float, str, float, int]]:
+        """(mtime, query, created_at, size)；文件不存在时为 None，损坏的文件被删除"""
+        try:
+            stat = path.stat()
+            data = json.loads(path.read_text(encoding="utf-8"))
+            return stat.st_mtime, data["query"], float(data["created_at"]), stat.st_size
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError):
+            path.unlink(missing_ok=True)
+            return None
+
+    def _load_index(self):
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            loaded = self._read_entry_file(path)
+            if loaded is not None:
+                entries.append((loaded[0], path.stem) + loaded[1:])
+        for _, key, query, created_at, size in sorted(entries):
+            self._add_entry(key, query, created_at, size)
+        self._evict()
+
+    def _load_from_disk(self, key: str) -> bool:
+        """把其他实例写入的条目加入索引"""
+        loaded = self._read_entry_file(self._path(key))
+        if loaded is None:
+            return False
+        self._add_entry(key, *loaded[1:])
+        return True
+
+    def _sync_from_disk(self):
+        """与共享目录同步：加入其他实例写入的条目，移除已被删除的条目"""
+        on_disk = {path.stem for path in self.cache_dir.glob("*.json")}
+        for key in [key for key in self._index if key not in on_disk]:
+            self._memory.pop(key, None)
+            self._drop_entry(key)
+        for key in on_disk - self._index.keys():
+            self._load_from_disk(key)
+
+    def _add_entry(self, key: str, query: str, created_at: float, size: int):
+        tokens = normalize_query_tokens(query)
+        entry = _ResearchEntry(query, tokens, query_key_terms(query), minhash_signature(tokens), created_at, size)
+        self._index[key] = entry
+        self._total_bytes += size
+        for bucket in _lsh_buckets(entry.signature):
+            self._buckets.setdefault(bucket, set()).add(key)
+
+    def _drop_entry(self, key: str) -> Optional[_ResearchEntry]:
+        entry = self._index.pop(key, None)
+        if entry is None:
+            return None
+        self._total_bytes -= entry.size
+        for bucket in _lsh_buckets(entry.signature):
+            keys = self._buckets.get(bucket)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._buckets[bucket]
+        return entry
+
+    def _remove(self, key: str):
+        self._memory.pop(key, None)
+        if self._drop_entry(key) is not None and self.cache_dir is not None:
+            self._path(key).unlink(missing_ok=True)
+
+    def _remember(self, key: str, result: str):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self):
+        if self.cache_dir is None:
+            while self._index and (len(self._index) > self.max_entries or self._total_bytes > self.max_bytes):
+                self._remove(next(iter(self._index)))
+                self.evictions += 1
+            return
+        # 共享目录：按目录扫描淘汰，其他实例写入的条目同样计入
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        count = len(entries)
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            self._memory.pop(path.stem, None)
+            self._drop_entry(path.stem)
+            count -= 1
+            total -= size
+            self.evictions += 1
+
+    # ---- 查询 ----
+
+    def _is_expired(self, key: str) -> bool:
+        if time.time() - self._index[key].created_at < self.ttl_seconds:
+            return False
+        self._remove(key)
+        self.expired += 1
+        return True
+
+    def _load_result(self, key: str) -> Optional[Tuple[str, str]]:
+        """(结果, 所在层)；磁盘上的条目读入内存层"""
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key], "memory"
+        if self.cache_dir is None:
+            return None
+        try:
+            result = json.loads(self._path(key).read_text(encoding="utf-8"))["result"]
+        except (OSError, ValueError, KeyError):
+            self._remove(key)
+            return None
+        self._remember(key, result)
+        return result, "disk"
+
+    def _touch(self, key: str):
+        self._index.move_to_end(key)
+        if self.cache_dir is not None:
+            try:
+                os.utime(self._path(key), None)
+            except OSError:
+                pass
+
+    def _find_near_duplicate(self, tokens: FrozenSet[str], key_terms: FrozenSet[str]) -> Optional[Tuple[str, float]]:
+        candidates: Set[str] = set()
+        for bucket in _lsh_buckets(minhash_signature(tokens)):
+            candidates |= self._buckets.get(bucket, set())
+        best = None
+        for key in candidates:
+            entry = self._index[key]
+            if (tokens ^ entry.tokens) & (key_terms | entry.key_terms):
+                # 数字、地名、公司名等不同：含义不同的查询
+                continue
+            similarity = len(tokens & entry.tokens) / len(tokens | entry.tokens)
+            if similarity >= self.similarity_threshold and (best is None or similarity > best[1]):
+                best = (key, similarity)
+        return best
+
+    def lookup(self, query: str) -> Optional[ResearchCacheHit]:
+        """查找缓存：先精确匹配（内存层、磁盘层），再近似匹配"""
+        with self._lock:
+            self.lookups += 1
+            key = self._get_key(query)
+            if key not in self._index and self.cache_dir is not None:
+                self._load_from_disk(key)
+            if key in self._index and not self._is_expired(key):
+                loaded = self._load_result(key)
+                if loaded is not None:
+                    self._touch(key)
+                    self.tier_hits[loaded[1]] += 1
+                    return ResearchCacheHit(loaded[0], loaded[1], self._index[key].query)
+
+            tokens = normalize_query_tokens(query)
+            if not self.near_duplicate or not tokens:
+                return None
+            if self.cache_dir is not None:
+                self._sync_from_disk()
+            while True:
+                match = self._find_near_duplicate(tokens, query_key_terms(query))
+                if match is None:
+                    return None
+                match_key, similarity = match
+                if self._is_expired(match_key):
+                    continue
+                loaded = self._load_result(match_key)
+                if loaded is None:
+                    continue
+                self._touch(match_key)
+                self.tier_hits["near_duplicate"] += 1
+                return ResearchCacheHit(loaded[0], "near_duplicate", self._index[match_key].query, round(similarity, 3))
 
     def get(self, query: str) -> Optional[str]:
         """获取缓存结果"""
-        key = self._get_key(query)
-        if key in self.cache:
-            entry = self.cache[key]
-            if datetime.now() - entry["timestamp"] < self.ttl:
-                logger.info(f"📦 Research cache HIT for: {query[:50]}...")
-                return entry["result"]
-            else:
-                # 过期，删除
-                del self.cache[key]
-        return None
+        hit = self.lookup(query)
+        if hit is None:
+            return None
+        logger.info(f"📦 Research cache HIT ({hit.tier}) for: {query[:50]}...")
+        return hit.result
 
     def set(self, query: str, result: str):
         """设置缓存"""
         key = self._get_key(query)
-        self.cache[key] = {
-            "query": query,
-            "result": result,
-            "timestamp": datetime.now()
-        }
+        created_at = time.time()
+        size = len(result.encode("utf-8"))
+        if self.cache_dir is not None:
+            path = self._path(key)
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            try:
+                tmp_path.write_text(
+                    json.dumps({"query": query, "created_at": created_at, "result": result}, ensure_ascii=False),
+                    encoding="utf-8",
+                )
+                os.replace(tmp_path, path)
+                size = path.stat().st_size
+            except OSError as e:
+                logger.warning(f"Failed to write research cache entry: {e}")
+                tmp_path.unlink(missing_ok=True)
+                return
+        with self._lock:
+            # 替换旧条目（保留刚写入的文件）
+            self._drop_entry(key)
+            self._add_entry(key, query, created_at, size)
+            self._remember(key, result)
+            self.writes += 1
+            self._evict()
 
     def clear_expired(self):
         """清理过期缓存"""
-        now = datetime.now()
-        expired_keys = [
-            key for key, entry in self.cache.items()
-            if now - entry["timestamp"] >= self.ttl
-        ]
-        for key in expired_keys:
-            del self.cache[key]
+        with self._lock:
+            for key in list(self._index):
+                self._is_expired(key)
 
     def get_stats(self) -> Dict:
-        """获取缓存统计"""
-        return {
-            "total_entries": len(self.cache),
-            "oldest_entry": min(
-                (e["timestamp"].isoformat() for e in self.cache.values()),
-                default=None
-            )
-        }
+        """获取缓存统计（含各层命中率）"""
+        with self._lock:
+            hits = sum(self.tier_hits.values())
+            lookups = self.lookups
+            oldest = min((entry.created_at for entry in self._index.values()), default=None)
+            return {
+                "total_entries": len(self._index),
+                "memory_entries": len(self._memory),
+                "size_mb": round(self._total_bytes / (1024 * 1024), 2),
+                "oldest_entry": datetime.fromtimestamp(oldest).isoformat() if oldest is not None else None,
+                "persistent": self.cache_dir is not None,
+                "lookups": lookups,
+                "hits": hits,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "tiers": {
+                    tier: {
+                        "hits": count,
+                        "hit_rate": round(count / lookups, 3) if lookups else 0.0,
+                    }
+                    for tier, count in self.tier_hits.items()
+                },
+                "writes": self.writes,
+                "evictions": self.evictions,
+                "expired": self.expired,
+            }
+
+
+# research.cache 配置（configure_research_cache）；ResearcherAgent 创建缓存时使用
+_research_cache_settings: Dict = {}
+
+
+def configure_research_cache(config=None, default_dir: Optional[str] = None):
+    """
+    配置 ResearcherAgent 的研究结果缓存（之后创建的 ResearcherAgent 共享同一持久化目录）
+
+    Args:
+        config: ResearchCacheConfig 实例
+        default_dir: 未配置 cache_dir 时使用的目录
+    """
+    _research_cache_settings.clear()
+    if config is None:
+        return
+    _research_cache_settings.update(
+        enabled=config.enabled,
+        ttl_minutes=config.ttl_hours * 60,
+        cache_dir=config.cache_dir or default_dir,
+        max_entries=config.max_entries,
+        max_size_mb=config.max_size_mb,
+        memory_entries=config.memory_entries,
+        near_duplicate=config.near_duplicate,
+        similarity_threshold=config.similarity_threshold,
+    )
 
 
 class ResearcherAgent:
@@ -100,7 +534,7 @@ class ResearcherAgent:
         provider: str = "tavily",
         enabled: bool = True,
         enable_cache: bool = True,
-        cache_ttl_minutes: int = 60,
+        cache_ttl_minutes: Optional[int] = None,
         *,
         model: Optional[str] = None,
         timeout_seconds: int = 300,
@@ -120,9 +554,12 @@ class ResearcherAgent:
         self.max_retries = max_retries
         self.retry_delay = retry_delay
 
-        # 缓存
-        self.enable_cache = enable_cache
-        self.cache = ResearchCache(ttl_minutes=cache_ttl_minutes) if enable_cache else None
+        # 缓存（research.cache 配置；cache_ttl_minutes 覆盖配置的有效期）
+        cache_settings = dict(_research_cache_settings)
+        self.enable_cache = enable_cache and cache_settings.pop("enabled", True)
+        if cache_ttl_minutes is not None:
+            cache_settings["ttl_minutes"] = cache_ttl_minutes
+        self.cache = ResearchCache(**cache_settings) if self.enable_cache else None
 
         # 统计
         self.stats = {
@@ -140,13 +577,22 @@ class ResearcherAgent:
 
         # 检查缓存
         if use_cache and self.enable_cache:
-            cached_result = self.cache.get(query)
-            if cached_result:
+            hit = self.cache.lookup(query)
+            if hit is not None:
                 self.stats["cache_hits"] += 1
-                return cached_result
+                logger.info(f"📦 Research cache HIT ({hit.tier}) for: {query[:50]}...")
+                emit_llm_event(
+                    EventType.RESEARCHER_CACHE_HIT,
+                    query=query,
+                    tier=hit.tier,
+                    matched_query=hit.matched_query,
+                    similarity=hit.similarity,
+                )
+                return hit.result
 
         logger.info(f"🔎 Researcher query: {query}")
-        search_result = web_search(query)
+        outcome = await asyncio.to_thread(search, query)
+        search_result = format_response(query, outcome)
 
         prompt = f"{RESEARCH_SYSTEM_PROMPT}\n\nQuery: {query}\nSearch Result:\n{search_result}"
 
@@ -159,12 +605,16 @@ class ResearcherAgent:
                 timeout=self.timeout_seconds,
                 max_retries=self.max_retries,
                 retry_delay=self.retry_delay,
+                call_class=CallClass.RESEARCHER,
             )
             result = response_text.strip()
 
-            # 存入缓存
+            # 存入缓存（搜索失败或没有结果时的总结只反映当时的故障，不缓存）
             if use_cache and self.enable_cache:
-                self.cache.set(query, result)
+                if outcome.error or not outcome.results:
+                    logger.info(f"Research summary not cached (search failed or returned no results): {query[:50]}...")
+                else:
+                    self.cache.set(query, result)
 
             return result
         except Exception as exc:  # pylint: disable=broad-except
@@ -174,12 +624,16 @@ class ResearcherAgent:
     async def deep_research(self, query: str, max_rounds: int = 3) -> Dict:
         """
         多轮深度研究
+
+        第 1 轮搜索原始查询；之后每轮并发搜索上一轮总结提出的后续查询（批量搜索，结果去重合并），
+        已搜索过的查询不再重复。没有新的后续查询时提前结束。
         Returns: {
             "query": str,
             "rounds": int,
             "findings": List[str],
             "final_summary": str,
-            "quality_score": float
+            "quality_score": float,
+            "queries": List[List[str]]  # 每轮执行的查询
         }
         """
         if not self.enabled:
@@ -189,15 +643,23 @@ class ResearcherAgent:
         self.stats["deep_research_count"] += 1
 
         findings = []
+        round_queries: List[List[str]] = []
         previous_summary = ""
+        max_queries = get_web_search_settings().max_queries
+        searched = {normalize_query(query)}
+        next_queries = [query]
 
         for round_num in range(1, max_rounds + 1):
-            logger.info(f"🔄 Research round {round_num}/{max_rounds}")
+            logger.info(f"🔄 Research round {round_num}/{max_rounds}: {len(next_queries)} queries")
+            round_queries.append(next_queries)
 
-            # 执行搜索
-            search_result = web_search(query)
+            # 执行搜索：第 1 轮为原始查询，之后为上一轮提出的后续查询
+            if round_num == 1:
+                search_result = format_response(query, await asyncio.to_thread(search, query))
+            else:
+                search_result = format_batch(await search_many(next_queries))
 
-            # 构建提示
+            # 构建提示（最后一轮不再需要后续查询）
             if round_num == 1:
                 prompt = f"{RESEARCH_SYSTEM_PROMPT}\n\nQuery: {query}\nSearch Result:\n{search_result}"
             else:
@@ -206,6 +668,8 @@ class ResearcherAgent:
                     previous_findings=previous_summary,
                     current_results=search_result
                 )
+            if round_num < max_rounds:
+                prompt += FOLLOW_UP_PROMPT.format(max_queries=max_queries)
 
             try:
                 response_text, _ = await run_claude_prompt(
@@ -216,8 +680,9 @@ class ResearcherAgent:
                     timeout=self.timeout_seconds,
                     max_retries=self.max_retries,
                     retry_delay=self.retry_delay,
+                    call_class=CallClass.RESEARCHER,
                 )
-                current_finding = response_text.strip()
+                current_finding, follow_ups = split_follow_up_queries(response_text)
                 findings.append(current_finding)
                 previous_summary = current_finding
 
@@ -226,6 +691,17 @@ class ResearcherAgent:
                 findings.append(f"Round {round_num} error: {exc}")
                 break
 
+            next_queries = []
+            for follow_up in follow_ups:
+                normalized = normalize_query(follow_up)
+                if normalized not in searched and len(next_queries) < max_queries:
+                    searched.add(normalized)
+                    next_queries.append(follow_up)
+            if not next_queries:
+                if round_num < max_rounds:
+                    logger.info("No new follow-up queries; deep research finished early")
+                break
+
         # 评估质量
         quality_score = self._evaluate_quality(findings[-1] if findings else "")
 
@@ -234,7 +710,8 @@ class ResearcherAgent:
             "rounds": len(findings),
             "findings": findings,
             "final_summary": findings[-1] if findings else "No findings",
-            "quality_score": quality_score
+            "quality_score": quality_score,
+            "queries": round_queries
         }
 
         logger.info(f"✅ Deep research completed: {len(findings)} rounds, quality={quality_score:.1f}/10")
@@ -272,6 +749,9 @@ class ResearcherAgent:
         stats = self.stats.copy()
         if self.enable_cache and self.cache:
             stats["cache"] = self.cache.get_stats()
+            stats["cache_tier_hit_rates"] = {
+                tier: entry["hit_rate"] for tier, entry in stats["cache"]["tiers"].items()
+            }
             if self.stats["total_queries"] > 0:
                 stats["cache_hit_rate"] = self.stats["cache_hits"] / self.stats["total_queries"]
         return stats
@@ -4,9 +4,33 @@ Lightweight helper around claude_code_sdk for one-shot prompts with retries.
 We intentionally use the simple query() API (non-streaming) to avoid control
 protocol initialization timeouts seen with ClaudeSDKClient. Each call spins up
 its own CLI process, collects the assistant text, and returns it.
+
+When performance.cli_pool is enabled, calls are served from a pool of
+pre-warmed CLI processes instead (see src/core/llm/cli_pool.py). If a pooled
+process cannot be spawned, the call falls back to the one-shot query() path.
+
+Deterministic prompts can be served from the on-disk response cache
+(performance.response_cache, see src/core/llm/response_cache.py), and
+identical concurrent calls share one underlying request
+(performance.coalescing, see src/core/llm/coalescer.py). Slow calls can be
+hedged with a second attempt once they exceed the call class's rolling
+latency percentile (performance.hedging, see src/core/llm/hedging.py).
+Every CLI call records its real token usage and cost into the registered
+CostTracker (see src/core/llm/telemetry.py).
+
+A prompt may be a PromptLayout (see src/core/llm/prompt_layout.py): its
+stable segments are sent as an appended system prompt, which the provider
+caches, and only the volatile rest as the user message.
+
+Passing resume_session_id continues an existing CLI session (used by the
+executor's incremental ReAct conversation); such calls always run as a
+fresh one-shot process and bypass the pool, cache, coalescing and hedging.
 """
 import asyncio
-from typing import Optional, Tuple
+import time
+from contextlib import aclosing, nullcontext
+from pathlib import Path
+from typing import Optional, Tuple, Union
 
 from claude_code_sdk import (
     AssistantMessage,
@@ -16,14 +40,92 @@ from claude_code_sdk import (
     query as claude_query,
 )
 
+from src.core.llm.call_context import CallClass, get_llm_call_context
+from src.core.events import EventType
+from src.core.llm.cli_pool import PoolFullError, PoolSpawnError, get_cli_pool
+from src.core.llm.coalescer import get_request_coalescer
+from src.core.llm.hedging import get_hedge_policy
+from src.core.llm.prompt_layout import PromptLayout, get_prefix_monitor
+from src.core.llm.response_cache import get_response_cache
+from src.core.llm.scheduler import get_llm_scheduler
+from src.core.llm.telemetry import emit_llm_event, record_llm_usage
 from src.utils.logger import get_logger
 
 logger = get_logger()
 
 
-async def run_claude_prompt(
+async def _run_one_shot(
     prompt: str,
     work_dir: str,
+    model: Optional[str],
+    permission_mode: str,
+    timeout: int,
+    debug_cli: bool,
+    resume_session_id: Optional[str] = None,
+    system_prompt: Optional[str] = None,
+) -> Tuple[str, Optional[ResultMessage]]:
+    """Spawn a fresh CLI process for a single prompt (optionally resuming a session)."""
+    extra_args = {"debug-to-stderr": None} if debug_cli else {}
+    options = ClaudeCodeOptions(
+        permission_mode=permission_mode,
+        cwd=work_dir,
+        model=model,
+        extra_args=extra_args,
+        resume=resume_session_id,
+        append_system_prompt=system_prompt,
+    )
+
+    response_text = ""
+    result_message: Optional[ResultMessage] = None
+
+    async def prompt_stream():
+        yield {
+            "type": "user",
+            "message": {"role": "user", "content": prompt},
+            "parent_tool_use_id": None,
+            "session_id": "default",
+        }
+
+    async def _collect():
+        nonlocal response_text, result_message
+        # aclosing: on timeout/cancellation the CLI subprocess is terminated right away
+        async with aclosing(claude_query(prompt=prompt_stream(), options=options)) as messages:
+            async for message in messages:
+                if isinstance(message, AssistantMessage):
+                    for block in message.content:
+                        if isinstance(block, TextBlock):
+                            response_text += block.text
+                elif isinstance(message, ResultMessage):
+                    result_message = message
+
+    await asyncio.wait_for(_collect(), timeout=timeout)
+    return response_text.strip(), result_message
+
+
+async def _run_pooled(
+    pool,
+    prompt: str,
+    work_dir: str,
+    model: Optional[str],
+    permission_mode: str,
+    timeout: int,
+    system_prompt: Optional[str] = None,
+) -> Tuple[str, Optional[ResultMessage]]:
+    """Run a prompt on a pre-warmed CLI process; the process is recycled on error."""
+    key = (model, permission_mode, str(Path(work_dir).resolve()), system_prompt)
+    proc = await pool.acquire(key)
+    failed = True
+    try:
+        result = await asyncio.wait_for(proc.run_prompt(prompt), timeout=timeout)
+        failed = False
+        return result
+    finally:
+        pool.release(proc, failed=failed)
+
+
+async def run_claude_prompt(
+    prompt: Union[str, PromptLayout],
+    work_dir: str,
     *,
     model: Optional[str] = None,
     permission_mode: str = "bypassPermissions",
@@ -31,50 +133,156 @@ async def run_claude_prompt(
     max_retries: int = 3,
     retry_delay: float = 2.0,
     debug_cli: bool = False,
+    use_pool: bool = True,
+    use_cache: bool = True,
+    use_coalescing: bool = True,
+    resume_session_id: Optional[str] = None,
+    call_class: str = CallClass.DEFAULT,
 ) -> Tuple[str, Optional[ResultMessage]]:
     """
     Send a single prompt to Claude Code CLI with retries and timeout.
 
+    Args:
+        prompt: Prompt text, or a PromptLayout whose cacheable prefix is sent
+            as an appended system prompt.
+        use_pool: Allow serving this call from the warm CLI process pool
+            (only has an effect when performance.cli_pool is enabled).
+        use_cache: Allow serving/storing this call in the response cache
+            (only has an effect when performance.response_cache is enabled).
+        use_coalescing: Allow sharing this call with identical in-flight calls
+            (only has an effect when performance.coalescing is enabled).
+        resume_session_id: Continue this CLI session; the prompt then only needs
+            to carry the new turn. Implies use_pool/use_cache/use_coalescing=False.
+        call_class: Caller category (executor, planner, validator, critic, ...)
+            used for scheduling priority, caching and per-class metrics.
+
     Returns:
         tuple: (assistant_text, ResultMessage or None)
     Raises:
         RuntimeError after exhausting retries
     """
+    if resume_session_id:
+        use_pool = use_cache = use_coalescing = False
+
+    system_prompt: Optional[str] = None
+    if isinstance(prompt, PromptLayout):
+        system_prompt, prompt = prompt.split()
+        get_prefix_monitor().record(call_class, system_prompt)
+    # Cache / coalescing keys cover both parts of the prompt
+    key_text = f"{system_prompt}\n\n{prompt}" if system_prompt else prompt
+
+    cache = get_response_cache() if use_cache else None
+    if cache is not None and not cache.is_cacheable(call_class):
+        cache = None
+
+    cache_key = None
+    if cache is not None:
+        cache_key = cache.make_key(key_text, model, call_class)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            logger.debug(f"LLM response cache hit ({call_class}, key={cache_key[:12]})")
+            emit_llm_event(EventType.LLM_CACHE_HIT, call_class=call_class, key=cache_key[:16])
+            return cached
+
+    async def _execute() -> Tuple[str, Optional[ResultMessage]]:
+        response_text, result_message = await _run_with_retries(
+            prompt,
+            work_dir,
+            model=model,
+            permission_mode=permission_mode,
+            timeout=timeout,
+            max_retries=max_retries,
+            retry_delay=retry_delay,
+            debug_cli=debug_cli,
+            use_pool=use_pool,
+            resume_session_id=resume_session_id,
+            call_class=call_class,
+            system_prompt=system_prompt,
+        )
+        if cache is not None and response_text and not (result_message and result_message.is_error):
+            cache.set(cache_key, response_text, result_message, call_class, model)
+        return response_text, result_message
+
+    coalescer = get_request_coalescer()
+    if (
+        coalescer is not None
+        and use_coalescing
+        and not debug_cli
+        and coalescer.usable_from_current_loop()
+    ):
+        flight_key = coalescer.make_key(
+            key_text, model, call_class, str(Path(work_dir).resolve()), permission_mode
+        )
+        return await coalescer.run(flight_key, call_class, _execute)
+
+    return await _execute()
+
+
+async def _run_with_retries(
+    prompt: str,
+    work_dir: str,
+    *,
+    model: Optional[str],
+    permission_mode: str,
+    timeout: int,
+    max_retries: int,
+    retry_delay: float,
+    debug_cli: bool,
+    use_pool: bool,
+    resume_session_id: Optional[str],
+    call_class: str,
+    system_prompt: Optional[str] = None,
+) -> Tuple[str, Optional[ResultMessage]]:
+    """Run the prompt with scheduling, pooling, hedging, retries and timeout."""
     last_error: Optional[str] = None
+    pool = get_cli_pool() if use_pool and not debug_cli else None
+    scheduler = get_llm_scheduler()
+    hedge_policy = get_hedge_policy()
+    # Two concurrent resumes of one CLI session would fork its transcript
+    allow_hedging = hedge_policy is not None and not resume_session_id
+    session_id = get_llm_call_context().session_id
+
+    async def _attempt() -> Tuple[str, Optional[ResultMessage]]:
+        # Hold a scheduler slot per attempt, not across retry back-off
+        if scheduler is not None and scheduler.usable_from_current_loop():
+            slot = scheduler.slot(call_class, model, session_id)
+        else:
+            slot = nullcontext()
+
+        async with slot:
+            # Latency excludes the scheduler queue wait: it drives hedge delays and cost records
+            started = time.monotonic()
+            result = None
+            if pool is not None and pool.usable_from_current_loop():
+                try:
+                    result = await _run_pooled(
+                        pool, prompt, work_dir, model, permission_mode, timeout,
+                        system_prompt=system_prompt,
+                    )
+                except PoolFullError as exc:
+                    logger.debug(f"{exc}; using one-shot query")
+                except PoolSpawnError as exc:
+                    logger.warning(f"CLI pool unavailable, using one-shot query: {exc}")
+            if result is None:
+                result = await _run_one_shot(
+                    prompt, work_dir, model, permission_mode, timeout, debug_cli,
+                    resume_session_id=resume_session_id,
+                    system_prompt=system_prompt,
+                )
+
+        elapsed = time.monotonic() - started
+        if hedge_policy is not None:
+            hedge_policy.record_latency(call_class, elapsed)
+        # Real token usage / cost of this CLI call (cache hits and coalesced callers add nothing)
+        record_llm_usage(call_class, model, result[1], elapsed)
+        return result
 
     for attempt in range(1, max_retries + 1):
         try:
-            extra_args = {"debug-to-stderr": None} if debug_cli else {}
-            options = ClaudeCodeOptions(
-                permission_mode=permission_mode,
-                cwd=work_dir,
-                model=model,
-                extra_args=extra_args,
-            )
-
-            response_text = ""
-            result_message: Optional[ResultMessage] = None
-
-            async def prompt_stream():
-                yield {
-                    "type": "user",
-                    "message": {"role": "user", "content": prompt},
-                    "parent_tool_use_id": None,
-                    "session_id": "default",
-                }
-
-            async def _collect():
-                nonlocal response_text, result_message
-                async for message in claude_query(prompt=prompt_stream(), options=options):
-                    if isinstance(message, AssistantMessage):
-                        for block in message.content:
-                            if isinstance(block, TextBlock):
-                                response_text += block.text
-                    elif isinstance(message, ResultMessage):
-                        result_message = message
-
-            await asyncio.wait_for(_collect(), timeout=timeout)
-            return response_text.strip(), result_message
+            hedge_delay = hedge_policy.hedge_delay(call_class) if allow_hedging else None
+            if hedge_delay is not None:
+                return await hedge_policy.run(call_class, hedge_delay, _attempt)
+            return await _attempt()
 
         except asyncio.TimeoutError:
             last_error = f"Timeout after {timeout}s"
@@ -0,0 +1,360 @@
+"""
+Directory Snapshot - 目录快照服务
+
+为同一工作目录的多个使用方（list_dir、工作区索引、状态镜像）共享一份文件清单：
+- 每个条目记录相对路径、大小、mtime，内容哈希按需计算并按 (mtime, size) 缓存
+- 增量维护：写入类工具执行后通过 notify_write 标记路径，下次 refresh 只重新 stat 这些路径；
+  外部变化由定期全量重扫发现（最多每 rescan_interval_seconds 一次，force=True 立即重扫）
+- 排除 exclude_patterns（复用 performance.exclude_patterns），匹配任一路径组成部分或相对路径
+
+快照按根目录缓存（get_directory_snapshot），只存在于主进程中。
+"""
+import fnmatch
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.core.workspace import get_workspace, resolve_path
+
+DEFAULT_EXCLUDE_PATTERNS = ["*.pyc", "__pycache__", ".git", "*.log", ".scratch"]
+_HASH_CHUNK_BYTES = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class SnapshotEntry:
+    """快照中的一个文件或目录"""
+    path: str          # 相对根目录的 POSIX 路径
+    is_dir: bool
+    size: int
+    mtime_ns: int
+
+    @property
+    def name(self) -> str:
+        return self.path.rsplit("/", 1)[-1]
+
+    @property
+    def depth(self) -> int:
+        """根目录下的直接子项深度为 1"""
+        return self.path.count("/") + 1
+
+
+def match_any(rel_path: str, patterns: List[str]) -> bool:
+    """相对路径或其任一组成部分匹配任一 glob 模式"""
+    if not patterns:
+        return False
+    parts = rel_path.split("/")
+    for pattern in patterns:
+        if fnmatch.fnmatch(rel_path, pattern) or any(fnmatch.fnmatch(part, pattern) for part in parts):
+            return True
+    return False
+
+
+def scan_directory(root: Path, depth: int = 0, exclude_patterns: Optional[List[str]] = None) -> List[SnapshotEntry]:
+    """
+    遍历目录（不跟随符号链接目录）
+
+    Args:
+        root: 根目录
+        depth: 最大深度（1 = 直接子项，0 = 不限）
+        exclude_patterns: 排除的 glob 模式（被排除的目录不再深入）
+    """
+    entries = []
+    stack = [(Path(root), 1)]
+    while stack:
+        directory, level = stack.pop()
+        try:
+            scanned = list(os.scandir(directory))
+        except OSError:
+            continue
+        for item in scanned:
+            rel_path = Path(item.path).relative_to(root).as_posix()
+            if match_any(rel_path, exclude_patterns):
+                continue
+            try:
+                is_dir = item.is_dir(follow_symlinks=False)
+                if not is_dir and not item.is_file():
+                    continue
+                stat = item.stat()
+            except OSError:
+                continue
+            entries.append(SnapshotEntry(rel_path, is_dir, 0 if is_dir else stat.st_size, stat.st_mtime_ns))
+            if is_dir and (not depth or level < depth):
+                stack.append((Path(item.path), level + 1))
+    return entries
+
+
+def filter_entries(
+    entries,
+    prefix: str = "",
+    depth: int = 1,
+    include: Optional[List[str]] = None,
+    exclude: Optional[List[str]] = None,
+) -> List[SnapshotEntry]:
+    """
+    按目录前缀、深度和 include / exclude 模式过滤条目（按路径排序）
+
+    指定 include 时只保留匹配的文件，以及（任意深度下）含有匹配文件的目录。
+    """
+    base_depth = prefix.count("/")
+    listed = []
+    matched_dirs: Set[str] = set()
+    for entry in entries:
+        if not entry.path.startswith(prefix):
+            continue
+        relative = entry.path[len(prefix):]
+        if not relative or (exclude and match_any(relative, exclude)):
+            continue
+        if include and not entry.is_dir:
+            if not match_any(relative, include):
+                continue
+            parent = entry.path.rsplit("/", 1)[0] if "/" in entry.path else ""
+            while parent and parent not in matched_dirs:
+                matched_dirs.add(parent)
+                parent = parent.rsplit("/", 1)[0] if "/" in parent else ""
+        if depth and entry.depth - base_depth > depth:
+            continue
+        listed.append(entry)
+    if include:
+        listed = [entry for entry in listed if not entry.is_dir or entry.path in matched_dirs]
+    listed.sort(key=lambda entry: entry.path)
+    return listed
+
+
+class DirectorySnapshot:
+    """单个根目录的增量文件清单"""
+
+    def __init__(
+        self,
+        root: Path,
+        exclude_patterns: Optional[List[str]] = None,
+        rescan_interval_seconds: float = 2.0,
+    ):
+        """
+        Args:
+            root: 根目录
+            exclude_patterns: 排除的 glob 模式
+            rescan_interval_seconds: 两次全量重扫的最小间隔
+        """
+        self.root = Path(root).resolve()
+        self.exclude_patterns = list(DEFAULT_EXCLUDE_PATTERNS if exclude_patterns is None else exclude_patterns)
+        self.rescan_interval_seconds = rescan_interval_seconds
+        self._entries: Dict[str, SnapshotEntry] = {}
+        self._hashes: Dict[str, Tuple[int, int, str]] = {}
+        self._dirty: Set[str] = set()
+        self._needs_rescan = True
+        self._last_rescan = 0.0
+        self._lock = threading.RLock()
+        self.full_rescans = 0
+        self.generation = 0  # 每次清单发生变化时递增
+
+    def is_excluded(self, rel_path: str) -> bool:
+        return match_any(rel_path, self.exclude_patterns)
+
+    def notify_write(self, path: Optional[Path]):
+        """标记写入过的路径；None 表示可能写入任意文件（下次 refresh 全量重扫）"""
+        with self._lock:
+            if path is None:
+                self._needs_rescan = True
+                return
+            try:
+                rel_path = Path(path).resolve().relative_to(self.root).as_posix()
+            except ValueError:
+                return
+            if rel_path != ".":
+                self._dirty.add(rel_path)
+
+    def refresh(self, force: bool = False):
+        """同步清单：重新 stat 已标记路径，间隔到期（或 force）时全量重扫"""
+        with self._lock:
+            due = time.monotonic() - self._last_rescan >= self.rescan_interval_seconds
+            if force or self._needs_rescan or due:
+                self._dirty.clear()
+                self._rescan()
+                return
+            dirty, self._dirty = self._dirty, set()
+            for rel_path in dirty:
+                self._restat(rel_path)
+
+    def _rescan(self):
+        entries = {entry.path: entry for entry in scan_directory(self.root, 0, self.exclude_patterns)}
+        if entries != self._entries:
+            self._entries = entries
+            self.generation += 1
+        self._needs_rescan = False
+        self._last_rescan = time.monotonic()
+        self.full_rescans += 1
+
+    def _restat(self, rel_path: str):
+        """重新 stat 单个写入过的文件（连同新建的父目录）"""
+        if self.is_excluded(rel_path):
+            return
+        full_path = self.root / rel_path
+        try:
+            stat = full_path.stat()
+        except OSError:
+            # 已删除：连同其下的条目一起移除
+            prefix = rel_path + "/"
+            removed = [p for p in self._entries if p == rel_path or p.startswith(prefix)]
+            for path in removed:
+                del self._entries[path]
+            if removed:
+                self.generation += 1
+            return
+        if full_path.is_dir():
+            # 目录整体变化无法逐项追踪，交给下次全量重扫
+            self._needs_rescan = True
+            return
+        self._entries[rel_path] = SnapshotEntry(rel_path, False, stat.st_size, stat.st_mtime_ns)
+        parent = rel_path.rsplit("/", 1)[0] if "/" in rel_path else ""
+        while parent and parent not in self._entries:
+            try:
+                parent_stat = (self.root / parent).stat()
+            except OSError:
+                break
+            self._entries[parent] = SnapshotEntry(parent, True, 0, parent_stat.st_mtime_ns)
+            parent = parent.rsplit("/", 1)[0] if "/" in parent else ""
+        self.generation += 1
+
+    def entries(self, refresh: bool = True, force: bool = False) -> Dict[str, SnapshotEntry]:
+        """当前清单 {相对路径: 条目}（返回副本）"""
+        with self._lock:
+            if refresh:
+                self.refresh(force=force)
+            return dict(self._entries)
+
+    def files(self, refresh: bool = True, force: bool = False) -> Dict[str, SnapshotEntry]:
+        """只含文件的清单"""
+        return {p: e for p, e in self.entries(refresh, force).items() if not e.is_dir}
+
+    def versioned_files(self, force: bool = False) -> Tuple[int, Dict[str, SnapshotEntry]]:
+        """(generation, 文件清单)，两者取自同一时刻"""
+        with self._lock:
+            self.refresh(force=force)
+            return self.generation, {p: e for p, e in self._entries.items() if not e.is_dir}
+
+    def list_entries(
+        self,
+        directory: str = "",
+        depth: int = 1,
+        include: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None,
+    ) -> List[SnapshotEntry]:
+        """
+        列出 directory 下 depth 层以内的条目（按路径排序）
+
+        Args:
+            directory: 相对根目录的子目录（"" 为根目录）
+            depth: 最大深度（1 = 直接子项，0 = 不限）
+            include: 文件需匹配的 glob 模式（目录不受限制）
+            exclude: 额外排除的 glob 模式
+        """
+        directory = directory.strip("/")
+        prefix = f"{directory}/" if directory and directory != "." else ""
+        return filter_entries(self.entries().values(), prefix, depth, include, exclude)
+
+    def file_hash(self, rel_path: str) -> Optional[str]:
+        """文件内容的 SHA-256（按 (mtime, size) 缓存；文件不存在时为 None）"""
+        full_path = self.root / rel_path
+        try:
+            stat = full_path.stat()
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._hashes.get(rel_path)
+            if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+                return cached[2]
+        digest = hashlib.sha256()
+        with open(full_path, "rb") as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK_BYTES), b""):
+                digest.update(chunk)
+        with self._lock:
+            self._hashes[rel_path] = (stat.st_mtime_ns, stat.st_size, digest.hexdigest())
+        return digest.hexdigest()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            files = sum(1 for entry in self._entries.values() if not entry.is_dir)
+            return {
+                "entries": len(self._entries),
+                "files": files,
+                "full_rescans": self.full_rescans,
+                "generation": self.generation,
+            }
+
+
+# 全局配置与按根目录缓存的快照
+_snapshot_settings: Dict = {}
+_snapshots: Dict[Path, DirectorySnapshot] = {}
+_snapshots_lock = threading.Lock()
+
+
+def configure_directory_snapshots(
+    exclude_patterns: Optional[List[str]] = None,
+    rescan_interval_seconds: Optional[float] = None,
+):
+    """
+    配置目录快照（已创建的快照被丢弃，下次使用时按新配置重建）
+
+    Args:
+        exclude_patterns: 排除模式（通常为 performance.exclude_patterns）
+        rescan_interval_seconds: 两次全量重扫的最小间隔
+    """
+    settings = {}
+    if exclude_patterns is not None:
+        settings["exclude_patterns"] = list(exclude_patterns)
+    if rescan_interval_seconds is not None:
+        settings["rescan_interval_seconds"] = rescan_interval_seconds
+    with _snapshots_lock:
+        _snapshot_settings.clear()
+        _snapshot_settings.update(settings)
+        _snapshots.clear()
+
+
+def get_exclude_patterns() -> List[str]:
+    """当前配置的排除模式"""
+    return list(_snapshot_settings.get("exclude_patterns", DEFAULT_EXCLUDE_PATTERNS))
+
+
+def get_directory_snapshot(root: Optional[Path] = None) -> DirectorySnapshot:
+    """获取指定根目录（默认当前工作区）的快照"""
+    root = Path(root or get_workspace()).resolve()
+    with _snapshots_lock:
+        snapshot = _snapshots.get(root)
+        if snapshot is None:
+            snapshot = DirectorySnapshot(root, **_snapshot_settings)
+            _snapshots[root] = snapshot
+        return snapshot
+
+
+def notify_directory_write(invalidates: str, arguments: Dict):
+    """
+    写入类工具执行后的回调（ToolRegistry.add_write_listener）
+
+    Args:
+        invalidates: 被写入路径的参数名；"*" 表示可能写入任意文件
+        arguments: 工具参数
+    """
+    with _snapshots_lock:
+        snapshots = list(_snapshots.values())
+    if not snapshots:
+        return
+    if invalidates == "*":
+        workspace_root = get_workspace().resolve()
+        for snapshot in snapshots:
+            if (
+                snapshot.root == workspace_root
+                or workspace_root in snapshot.root.parents
+                or snapshot.root in workspace_root.parents
+            ):
+                snapshot.notify_write(None)
+        return
+    value = arguments.get(invalidates)
+    if not value:
+        return
+    written = resolve_path(str(value))
+    for snapshot in snapshots:
+        snapshot.notify_write(written)
@@ -30,11 +30,13 @@ class EventType(str, Enum):
     EXECUTOR_START = "executor_start"
     EXECUTOR_COMPLETE = "executor_complete"
     EXECUTOR_ERROR = "executor_error"
+    EXECUTOR_HISTORY_COMPACTED = "executor_history_compacted"
 
     RESEARCHER_START = "researcher_start"
     RESEARCHER_COMPLETE = "researcher_complete"
     RESEARCHER_ERROR = "researcher_error"
     RESEARCHER_CACHE_HIT = "researcher_cache_hit"
+    SEARCH_CACHE_HIT = "search_cache_hit"
 
     # Persona事件
     PERSONA_SWITCH = "persona_switch"
@@ -49,6 +51,10 @@ class EventType(str, Enum):
     API_CALL = "api_call"
     COST_RECORDED = "cost_recorded"
 
+    # LLM运行时事件
+    LLM_CACHE_HIT = "llm_cache_hit"
+    LLM_RUNTIME_STATS = "llm_runtime_stats"
+
     # 安全事件
     EMERGENCY_STOP = "emergency_stop"
     TIMEOUT = "timeout"
@@ -96,13 +102,38 @@ class TokenUsage(BaseModel):
     def total_tokens(self) -> int:
         return self.input_tokens + self.output_tokens
 
+    @property
+    def cache_hit_ratio(self) -> float:
+        """提示缓存命中率：cache_read / 全部输入token"""
+        prompt_tokens = self.input_tokens + self.cache_read_tokens + self.cache_creation_tokens
+        return self.cache_read_tokens / prompt_tokens if prompt_tokens else 0.0
+
+    @classmethod
+    def from_sdk_usage(cls, usage: Optional[Dict[str, Any]]) -> "TokenUsage":
+        """从 ResultMessage.usage 构造"""
+        usage = usage or {}
+        return cls(
+            input_tokens=usage.get("input_tokens") or 0,
+            output_tokens=usage.get("output_tokens") or 0,
+            cache_read_tokens=usage.get("cache_read_input_tokens") or 0,
+            cache_creation_tokens=usage.get("cache_creation_input_tokens") or 0
+        )
+
+    def add(self, other: "TokenUsage"):
+        """累加另一份用量"""
+        self.input_tokens += other.input_tokens
+        self.output_tokens += other.output_tokens
+        self.cache_read_tokens += other.cache_read_tokens
+        self.cache_creation_tokens += other.cache_creation_tokens
+
     def to_dict(self) -> Dict:
         return {
             "input_tokens": self.input_tokens,
             "output_tokens": self.output_tokens,
             "cache_read_tokens": self.cache_read_tokens,
             "cache_creation_tokens": self.cache_creation_tokens,
-            "total_tokens": self.total_tokens
+            "total_tokens": self.total_tokens,
+            "cache_hit_ratio": round(self.cache_hit_ratio, 3)
         }
 
 
@@ -111,11 +142,14 @@ class CostRecord(BaseModel):
     timestamp: datetime = Field(default_factory=datetime.now)
     session_id: str
     iteration: Optional[int] = None
-    agent_type: str  # planner, executor, researcher
+    agent_type: str  # 调用类别: planner, executor, researcher, validator, ...
     model: str
     token_usage: TokenUsage
     duration_seconds: float
     estimated_cost_usd: float = 0.0
+    cost_source: str = "estimated"  # estimated: 按PRICING估算; reported: CLI返回的实际成本
+    mission_id: Optional[str] = None
+    role: Optional[str] = None
 
     def to_dict(self) -> Dict:
         return {
@@ -126,7 +160,10 @@ class CostRecord(BaseModel):
             "model": self.model,
             "token_usage": self.token_usage.to_dict(),
             "duration_seconds": self.duration_seconds,
-            "estimated_cost_usd": self.estimated_cost_usd
+            "estimated_cost_usd": self.estimated_cost_usd,
+            "cost_source": self.cost_source,
+            "mission_id": self.mission_id,
+            "role": self.role
         }
 
 
@@ -187,10 +224,24 @@ class CostTracker:
         model: str,
         token_usage: TokenUsage,
         duration_seconds: float,
-        iteration: Optional[int] = None
+        iteration: Optional[int] = None,
+        reported_cost_usd: Optional[float] = None,
+        mission_id: Optional[str] = None,
+        role: Optional[str] = None
     ) -> CostRecord:
-        """记录成本"""
-        estimated_cost = self.calculate_cost(model, token_usage)
+        """
+        记录成本
+
+        Args:
+            reported_cost_usd: CLI 返回的实际成本（ResultMessage.total_cost_usd），
+                提供时优先于按 PRICING 估算的成本
+            mission_id: 所属任务（Leader模式）
+            role: 所属角色
+        """
+        if reported_cost_usd is not None:
+            cost, cost_source = reported_cost_usd, "reported"
+        else:
+            cost, cost_source = self.calculate_cost(model, token_usage), "estimated"
 
         record = CostRecord(
             session_id=session_id,
@@ -199,7 +250,10 @@ class CostTracker:
             model=model,
             token_usage=token_usage,
             duration_seconds=duration_seconds,
-            estimated_cost_usd=estimated_cost
+            estimated_cost_usd=cost,
+            cost_source=cost_source,
+            mission_id=mission_id,
+            role=role
         )
 
         self.records.append(record)
@@ -225,17 +279,48 @@ class CostTracker:
             if r.session_id == session_id and r.agent_type == agent_type
         )
 
+    def get_mission_cost(self, session_id: str, mission_id: str) -> float:
+        """获取特定任务的成本"""
+        return sum(
+            r.estimated_cost_usd
+            for r in self.records
+            if r.session_id == session_id and r.mission_id == mission_id
+        )
+
     def get_total_tokens(self, session_id: str) -> TokenUsage:
         """获取会话总token使用"""
         total = TokenUsage()
         for r in self.records:
             if r.session_id == session_id:
-                total.input_tokens += r.token_usage.input_tokens
-                total.output_tokens += r.token_usage.output_tokens
-                total.cache_read_tokens += r.token_usage.cache_read_tokens
-                total.cache_creation_tokens += r.token_usage.cache_creation_tokens
+                total.add(r.token_usage)
         return total
 
+    def get_breakdown(self, session_id: str, field: str) -> Dict[str, Dict]:
+        """
+        按字段汇总会话成本
+
+        Args:
+            field: CostRecord 字段名（agent_type / mission_id / role / model）
+        """
+        groups: Dict[str, Dict] = {}
+        for r in self.records:
+            if r.session_id != session_id:
+                continue
+            key = getattr(r, field) or "unassigned"
+            group = groups.setdefault(key, {"cost_usd": 0.0, "calls": 0, "tokens": TokenUsage()})
+            group["cost_usd"] += r.estimated_cost_usd
+            group["calls"] += 1
+            group["tokens"].add(r.token_usage)
+
+        return {
+            key: {
+                "cost_usd": round(group["cost_usd"], 4),
+                "calls": group["calls"],
+                "tokens": group["tokens"].to_dict()
+            }
+            for key, group in groups.items()
+        }
+
     def generate_report(self, session_id: str) -> Dict:
         """生成成本报告"""
         session_records = [r for r in self.records if r.session_id == session_id]
@@ -257,8 +342,12 @@ class CostTracker:
             "session_id": session_id,
             "total_cost_usd": round(total_cost, 4),
             "total_tokens": total_tokens.to_dict(),
+            "cache_hit_ratio": round(total_tokens.cache_hit_ratio, 3),
             "total_calls": len(session_records),
             "agent_breakdown": agent_breakdown,
+            "call_class_breakdown": self.get_breakdown(session_id, "agent_type"),
+            "mission_breakdown": self.get_breakdown(session_id, "mission_id"),
+            "role_breakdown": self.get_breakdown(session_id, "role"),
             "records": [r.to_dict() for r in session_records]
         }
 
@@ -19,6 +19,8 @@ from src.core.team.dependency_resolver import DependencyResolver
 from src.core.team.team_assembler import TeamAssembler
 from src.core.agents.executor import ExecutorAgent
 from src.core.agents.sdk_client import run_claude_prompt
+from src.core.llm.call_context import CallClass, llm_call_context
+from src.core.llm.telemetry import get_llm_cost_tracker, set_llm_cost_tracker
 from src.core.events import EventStore, CostTracker
 from src.core.governance.helper_governor import HelperGovernor, HelperExitCondition, ExitConditionType
 from src.utils.logger import get_logger
@@ -81,7 +83,8 @@ class LeaderAgent:
         quality_threshold: float = 70.0,
         budget_limit_usd: Optional[float] = None,
         session_id: Optional[str] = None,
-        timeouts: Dict[str, int] = None
+        timeouts: Dict[str, int] = None,
+        cost_tracker: Optional[CostTracker] = None
     ):
         """
         Initialize Leader Agent.
@@ -94,6 +97,8 @@ class LeaderAgent:
             budget_limit_usd: Budget limit in USD
             session_id: Session ID for tracking
             timeouts: Dict of timeout values for different components
+            cost_tracker: Shared CostTracker receiving real per-call LLM costs
+                (defaults to the registered LLM cost tracker, or a new one)
         """
         # Use absolute path to avoid CWD-related issues
         self.work_dir = Path(work_dir).resolve()
@@ -124,7 +129,9 @@ class LeaderAgent:
 
         # Tracking
         self.event_store = EventStore()
-        self.cost_tracker = CostTracker(max_budget_usd=budget_limit_usd)
+        self.cost_tracker = cost_tracker or get_llm_cost_tracker() or CostTracker(max_budget_usd=budget_limit_usd)
+        if get_llm_cost_tracker() is None:
+            set_llm_cost_tracker(self.cost_tracker)
 
         # State
         self.context: Optional[ExecutionContext] = None
@@ -238,8 +245,9 @@ class LeaderAgent:
                         "metadata": self._get_metadata()
                     }
 
-            # Execute mission
-            result = await self._execute_mission(mission, role_name)
+            # Execute mission (LLM costs are attributed to this mission via call context)
+            with llm_call_context(mission_id=mission.id, role=role_name):
+                result = await self._execute_mission(mission, role_name)
 
             if result['success']:
                 self.context.completed_missions[mission.id] = result
@@ -259,7 +267,8 @@ class LeaderAgent:
                     if next_mission:
                         logger.info(f"🔄 Workflow transition: {role.name} -> {next_mission}")
                         # Execute next mission in workflow
-                        next_result = await self._execute_mission(mission, next_mission)
+                        with llm_call_context(mission_id=mission.id, role=next_mission):
+                            next_result = await self._execute_mission(mission, next_mission)
                         if not next_result['success']:
                             logger.error(f"❌ Workflow mission '{next_mission}' failed")
                             return {
@@ -382,11 +391,8 @@ class LeaderAgent:
                 context = self._build_context_for_mission(mission)
 
                 # Execute
-                result = await role_executor.execute(context=context)
-
-                # Track cost
-                # TODO: Extract actual cost from result if available
-                self.context.total_cost_usd += 0.10  # Placeholder
+                with llm_call_context(role=role.name):
+                    result = await role_executor.execute(context=context)
 
             except Exception as e:
                 logger.error(f"   ❌ Execution error: {e}")
@@ -394,6 +400,16 @@ class LeaderAgent:
                     "success": False,
                     "error": str(e)
                 }
+            finally:
+                await executor.close()
+
+            # Track cost (real usage recorded per LLM call by run_claude_prompt)
+            session_id = self.context.session_id
+            self.context.total_cost_usd = self.cost_tracker.get_session_cost(session_id)
+            logger.info(
+                f"   💰 Mission cost so far: ${self.cost_tracker.get_mission_cost(session_id, mission.id):.4f} "
+                f"(session total: ${self.context.total_cost_usd:.4f})"
+            )
 
             # 5. Monitor and decide intervention
             decision = await self._monitor_and_decide(mission, role, result, iteration)
@@ -659,6 +675,7 @@ Success criteria:
                 if all_valid:
                     logger.info(f"✅ Helper role completed successfully!")
                     self.helper_governor.exit_helper(helper_id, reason="Goal achieved")
+                    await helper_executor.close()
                     return {
                         "success": True,
                         "outputs": outputs,
@@ -678,6 +695,7 @@ Success criteria:
                 )
 
         # Helper failed
+        await helper_executor.close()
         self.helper_governor.exit_helper(helper_id, reason="Max iterations exceeded")
         logger.warning(f"❌ Helper role failed after {max_helper_iterations} iterations")
 
@@ -762,10 +780,12 @@ IMPORTANT: Return ONLY the JSON object, no additional text."""
 
         try:
             # Call LLM
-            response = await run_claude_prompt(
-                prompt=prompt,
+            response, _ = await run_claude_prompt(
+                prompt,
+                str(self.work_dir),
                 model=self.model,
-                timeout_seconds=60
+                timeout=60,
+                call_class=CallClass.LEADER
             )
 
             # Parse response
@@ -935,7 +955,7 @@ IMPORTANT: Return ONLY the JSON object, no additional text."""
             "goal": self.context.goal,
             "total_missions": len(self.context.missions),
             "completed_missions": len(self.context.completed_missions),
-            "total_cost_usd": round(self.context.total_cost_usd, 2),
+            "total_cost_usd": round(self.context.total_cost_usd, 4),
             "execution_time_seconds": round(time.time() - self.context.start_time, 1),
             "intervention_count": self.context.intervention_count,
             "model": self.model
@@ -1018,7 +1038,8 @@ Example outputs: "Architect", "Reviewer", "COMPLETE" """
                     model=self.model,
                     timeout=60,
                     permission_mode="bypassPermissions",
-                    max_retries=1
+                    max_retries=1,
+                    call_class=CallClass.LEADER
                 )
 
                 next_role = response.strip().strip('"').strip("'")
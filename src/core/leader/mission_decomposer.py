@@ -10,6 +10,7 @@ from pathlib import Path
 import json
 
 from src.core.agents.sdk_client import run_claude_prompt
+from src.core.llm.call_context import CallClass
 from src.utils.logger import get_logger
 
 logger = get_logger()
@@ -127,7 +128,8 @@ Keep missions small and focused. Better to have 5 small missions than 2 large on
                 model=self.model,
                 permission_mode="bypassPermissions",
                 timeout=120,
-                max_retries=3
+                max_retries=3,
+                call_class=CallClass.DECOMPOSER
             )
 
             logger.debug(f"LLM Response:\n{response}")
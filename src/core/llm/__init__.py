@@ -0,0 +1,92 @@
+"""
+LLM Runtime Module - LLM调用运行时
+
+为 run_claude_prompt 提供调用上下文、全局调度器、预热进程池、请求合并、对冲请求、响应缓存、提示布局等调用基础设施
+"""
+from .call_context import (
+    CallClass,
+    LLMCallContext,
+    get_llm_call_context,
+    bind_llm_call_context,
+    reset_llm_call_context,
+    llm_call_context
+)
+from .cli_pool import (
+    CLIProcessPool,
+    PooledCLIProcess,
+    PoolSpawnError,
+    configure_cli_pool,
+    get_cli_pool,
+    shutdown_cli_pool
+)
+from .coalescer import (
+    RequestCoalescer,
+    configure_request_coalescer,
+    get_request_coalescer
+)
+from .hedging import (
+    HedgePolicy,
+    LatencyTracker,
+    configure_hedging,
+    get_hedge_policy
+)
+from .prompt_layout import (
+    PromptLayout,
+    PromptSegment,
+    Stability,
+    get_prefix_monitor
+)
+from .response_cache import (
+    ResponseCache,
+    configure_response_cache,
+    get_response_cache
+)
+from .scheduler import (
+    LLMScheduler,
+    configure_llm_scheduler,
+    get_llm_scheduler
+)
+from .telemetry import (
+    set_llm_event_store,
+    set_llm_cost_tracker,
+    get_llm_cost_tracker,
+    emit_llm_event,
+    record_llm_usage
+)
+
+__all__ = [
+    "CallClass",
+    "LLMCallContext",
+    "get_llm_call_context",
+    "bind_llm_call_context",
+    "reset_llm_call_context",
+    "llm_call_context",
+    "CLIProcessPool",
+    "PooledCLIProcess",
+    "PoolSpawnError",
+    "configure_cli_pool",
+    "get_cli_pool",
+    "shutdown_cli_pool",
+    "RequestCoalescer",
+    "configure_request_coalescer",
+    "get_request_coalescer",
+    "HedgePolicy",
+    "LatencyTracker",
+    "configure_hedging",
+    "get_hedge_policy",
+    "PromptLayout",
+    "PromptSegment",
+    "Stability",
+    "get_prefix_monitor",
+    "ResponseCache",
+    "configure_response_cache",
+    "get_response_cache",
+    "LLMScheduler",
+    "configure_llm_scheduler",
+    "get_llm_scheduler",
+    "set_llm_event_store",
+    "set_llm_cost_tracker",
+    "get_llm_cost_tracker",
+    "emit_llm_event",
+    "record_llm_usage"
+]
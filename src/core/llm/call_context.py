@@ -0,0 +1,69 @@
+"""
+LLM Call Context - LLM调用上下文
+
+通过 contextvars 在异步调用链中传递 session / mission / role / iteration 信息，
+run_claude_prompt 的调度、成本归属等功能读取该上下文，无需逐层传参。
+"""
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from typing import Optional
+
+
+# 调用类别（用于调度优先级、统计和缓存键）
+class CallClass:
+    EXECUTOR = "executor"
+    PLANNER = "planner"
+    RESEARCHER = "researcher"
+    DECOMPOSER = "decomposer"
+    ASSEMBLER = "assembler"
+    LEADER = "leader"
+    VALIDATOR = "validator"
+    CRITIC = "critic"
+    HEALTH_CHECK = "health_check"
+    DEFAULT = "default"
+
+
+@dataclass(frozen=True)
+class LLMCallContext:
+    """当前调用链的归属信息"""
+    session_id: str = "default"
+    mission_id: Optional[str] = None
+    role: Optional[str] = None
+    iteration: Optional[int] = None
+
+
+_current_context: contextvars.ContextVar[LLMCallContext] = contextvars.ContextVar(
+    "llm_call_context", default=LLMCallContext()
+)
+
+
+def get_llm_call_context() -> LLMCallContext:
+    """获取当前调用上下文"""
+    return _current_context.get()
+
+
+def bind_llm_call_context(**fields) -> contextvars.Token:
+    """在当前上下文上覆盖部分字段，返回用于恢复的 token"""
+    return _current_context.set(replace(_current_context.get(), **fields))
+
+
+def reset_llm_call_context(token: contextvars.Token):
+    """恢复 bind_llm_call_context 之前的上下文"""
+    _current_context.reset(token)
+
+
+@contextmanager
+def llm_call_context(**fields):
+    """
+    临时设置调用上下文
+
+    Example:
+        with llm_call_context(mission_id="mission_1", role="Market-Researcher"):
+            await role_executor.execute()
+    """
+    token = bind_llm_call_context(**fields)
+    try:
+        yield get_llm_call_context()
+    finally:
+        reset_llm_call_context(token)
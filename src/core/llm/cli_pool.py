@@ -0,0 +1,454 @@
+"""
+CLI Process Pool - CLI进程池
+
+为 run_claude_prompt 维护预热的 Claude Code CLI 子进程，避免每次调用都
+支付进程启动和控制协议握手的开销。
+
+每个池化进程由一个专属的 owner task 持有：连接、处理请求、断开都在同一个
+task 内完成（claude_code_sdk 内部使用 anyio task group，跨 task 关闭会报错）。
+调用方通过队列把 prompt 交给 owner task 并等待结果。
+
+注意：同一个 CLI 进程内的多次请求共享同一段对话上下文。默认 max_uses=1，
+即每个进程只服务一次请求（纯预热模式），用完后立即在后台补充新进程。
+
+追加系统提示在连接时绑定到进程（SDK 不支持按请求更换），因此每个不同的前缀都是
+一个独立的 key。max_total_processes 限制所有 key 的进程总数（空闲 + 启动中 + 使用中）：
+预热补充不会超过上限；未命中时若已达上限，先回收其他 key 中最久未用的空闲进程，
+没有可回收的空闲进程时抛出 PoolFullError，调用方改用一次性进程（不进入池）。
+
+后台回收任务定期关闭空闲超过 max_idle_seconds 的进程；超过 max_idle_seconds 没有请求的
+key 不再补充预热进程。
+"""
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Optional, Tuple
+
+from claude_code_sdk import (
+    AssistantMessage,
+    ClaudeCodeOptions,
+    ClaudeSDKClient,
+    ResultMessage,
+    TextBlock,
+)
+
+from src.utils.logger import get_logger
+
+logger = get_logger()
+
+# (model, permission_mode, cwd, append_system_prompt)
+PoolKey = Tuple[Optional[str], str, str, Optional[str]]
+
+
+class PoolSpawnError(RuntimeError):
+    """池化进程启动失败（调用方应回退到一次性 query 模式）"""
+
+
+class PoolFullError(PoolSpawnError):
+    """进程总数已达 max_total_processes 且没有可回收的空闲进程"""
+
+
+@dataclass
+class PoolStats:
+    """进程池统计"""
+    hits: int = 0
+    misses: int = 0
+    spawns: int = 0
+    spawn_failures: int = 0
+    recycled: int = 0
+    evicted: int = 0
+    overflows: int = 0
+    errors: int = 0
+    total_spawn_seconds: float = 0.0
+    max_spawn_seconds: float = 0.0
+
+    def record_spawn(self, seconds: float):
+        self.spawns += 1
+        self.total_spawn_seconds += seconds
+        self.max_spawn_seconds = max(self.max_spawn_seconds, seconds)
+
+    def to_dict(self) -> Dict:
+        requests = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / requests, 3) if requests else 0.0,
+            "spawns": self.spawns,
+            "spawn_failures": self.spawn_failures,
+            "recycled": self.recycled,
+            "evicted": self.evicted,
+            "overflows": self.overflows,
+            "errors": self.errors,
+            "avg_spawn_seconds": round(self.total_spawn_seconds / self.spawns, 3) if self.spawns else 0.0,
+            "max_spawn_seconds": round(self.max_spawn_seconds, 3),
+        }
+
+
+@dataclass
+class PooledCLIProcess:
+    """单个预热的 CLI 进程"""
+    key: PoolKey
+    created_at: float = field(default_factory=time.time)
+    last_used_at: float = field(default_factory=time.time)
+    uses: int = 0
+    spawn_seconds: float = 0.0
+    healthy: bool = True
+
+    _queue: "asyncio.Queue" = field(default=None, repr=False)
+    _owner: Optional[asyncio.Task] = field(default=None, repr=False)
+    _ready: Optional[asyncio.Future] = field(default=None, repr=False)
+
+    async def start(self, spawn_timeout: float):
+        """启动 owner task 并等待 CLI 连接完成"""
+        loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._ready = loop.create_future()
+        self._owner = loop.create_task(self._run())
+        try:
+            await asyncio.wait_for(asyncio.shield(self._ready), timeout=spawn_timeout)
+        except BaseException:
+            # 包括调用方被取消：不留下孤立的 owner task 和子进程
+            self.kill()
+            if not self._ready.done():
+                self._ready.cancel()
+            raise
+
+    async def _run(self):
+        model, permission_mode, cwd, append_system_prompt = self.key
+        client = ClaudeSDKClient(
+            ClaudeCodeOptions(
+                permission_mode=permission_mode,
+                cwd=cwd,
+                model=model,
+                append_system_prompt=append_system_prompt,
+            )
+        )
+        started = time.time()
+        try:
+            await client.connect()
+        except BaseException as exc:  # pylint: disable=broad-except
+            self.healthy = False
+            if not self._ready.done():
+                self._ready.set_exception(PoolSpawnError(str(exc) or type(exc).__name__))
+            return
+
+        self.spawn_seconds = time.time() - started
+        self._ready.set_result(self.spawn_seconds)
+
+        future: Optional[asyncio.Future] = None
+        try:
+            while True:
+                item = await self._queue.get()
+                if item is None:
+                    break
+                prompt, future = item
+                try:
+                    text, result_message = await self._collect(client, prompt)
+                    if result_message is not None and result_message.is_error:
+                        # 出错的会话不再复用
+                        self.healthy = False
+                    if not future.done():
+                        future.set_result((text, result_message))
+                except Exception as exc:  # pylint: disable=broad-except
+                    self.healthy = False
+                    if not future.done():
+                        future.set_exception(exc)
+                    break
+                if not self.healthy:
+                    break
+        finally:
+            self.healthy = False
+            if future is not None and not future.done():
+                future.set_exception(RuntimeError("Pooled CLI process terminated"))
+            try:
+                await client.disconnect()
+            except BaseException:  # pylint: disable=broad-except
+                pass
+
+    @staticmethod
+    async def _collect(client: ClaudeSDKClient, prompt: str) -> Tuple[str, Optional[ResultMessage]]:
+        await client.query(prompt)
+        response_text = ""
+        result_message: Optional[ResultMessage] = None
+        async for message in client.receive_response():
+            if isinstance(message, AssistantMessage):
+                for block in message.content:
+                    if isinstance(block, TextBlock):
+                        response_text += block.text
+            elif isinstance(message, ResultMessage):
+                result_message = message
+        return response_text.strip(), result_message
+
+    async def run_prompt(self, prompt: str) -> Tuple[str, Optional[ResultMessage]]:
+        """在该进程上执行一次 prompt（超时由调用方控制）"""
+        if not self.healthy or self._owner is None or self._owner.done():
+            raise RuntimeError("Pooled CLI process is not available")
+        future = asyncio.get_running_loop().create_future()
+        self.uses += 1
+        self.last_used_at = time.time()
+        await self._queue.put((prompt, future))
+        return await future
+
+    def shutdown(self):
+        """优雅关闭：让 owner task 处理完当前请求后断开"""
+        self.healthy = False
+        if self._queue is not None and self._owner is not None and not self._owner.done():
+            self._queue.put_nowait(None)
+
+    def kill(self):
+        """强制关闭：取消 owner task（finally 中会终止子进程）"""
+        self.healthy = False
+        if self._owner is not None and not self._owner.done():
+            self._owner.cancel()
+
+    @property
+    def alive(self) -> bool:
+        return self.healthy and self._owner is not None and not self._owner.done()
+
+
+class CLIProcessPool:
+    """
+    预热 CLI 进程池
+
+    按 (model, permission_mode, cwd, 追加系统提示) 分组，每组保持 size 个空闲进程，
+    所有组的进程总数不超过 max_total_processes。
+    进程在使用 max_uses 次、出错或空闲超过 max_idle_seconds 后回收。
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        max_uses: int = 1,
+        max_idle_seconds: float = 600.0,
+        spawn_timeout_seconds: float = 90.0,
+        max_total_processes: int = 8,
+    ):
+        self.size = max(1, size)
+        self.max_uses = max(1, max_uses)
+        self.max_idle_seconds = max_idle_seconds
+        self.spawn_timeout_seconds = spawn_timeout_seconds
+        self.max_total_processes = max(1, max_total_processes)
+
+        self.stats = PoolStats()
+        self._idle: Dict[PoolKey, Deque[PooledCLIProcess]] = {}
+        self._spawning: Dict[PoolKey, int] = {}
+        self._leased = 0
+        self._last_demand: Dict[PoolKey, float] = {}
+        self._reaper: Optional[asyncio.Task] = None
+        self._background: set = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._closed = False
+
+    def usable_from_current_loop(self) -> bool:
+        """池化进程绑定在创建它们的事件循环上（研究工具会在线程中另起事件循环）"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        if self._closed:
+            return False
+        if self._loop is None:
+            self._loop = loop
+        return self._loop is loop
+
+    def _pop_idle(self, key: PoolKey) -> Optional[PooledCLIProcess]:
+        idle = self._idle.get(key)
+        now = time.time()
+        while idle:
+            proc = idle.popleft()
+            if proc.alive and now - proc.last_used_at <= self.max_idle_seconds:
+                return proc
+            self._retire(proc)
+        return None
+
+    async def _spawn(self, key: PoolKey) -> PooledCLIProcess:
+        proc = PooledCLIProcess(key=key)
+        try:
+            await proc.start(self.spawn_timeout_seconds)
+        except Exception as exc:  # pylint: disable=broad-except
+            self.stats.spawn_failures += 1
+            raise PoolSpawnError(f"Failed to spawn pooled CLI process: {exc}") from exc
+        self.stats.record_spawn(proc.spawn_seconds)
+        logger.debug(f"Spawned pooled CLI process for {key[0] or 'default'} in {proc.spawn_seconds:.2f}s")
+        return proc
+
+    def _total_processes(self) -> int:
+        idle = sum(len(queue) for queue in self._idle.values())
+        return idle + sum(self._spawning.values()) + self._leased
+
+    def _evict_lru_idle(self, exclude: PoolKey) -> bool:
+        """回收其他 key 中最久未用的空闲进程，为新进程腾出名额"""
+        oldest: Optional[PooledCLIProcess] = None
+        for key, idle in self._idle.items():
+            if key != exclude and idle and (oldest is None or idle[0].last_used_at < oldest.last_used_at):
+                oldest = idle[0]
+        if oldest is None:
+            return False
+        self._idle[oldest.key].popleft()
+        self.stats.evicted += 1
+        self._retire(oldest)
+        return True
+
+    async def acquire(self, key: PoolKey) -> PooledCLIProcess:
+        """获取一个可用进程；命中空闲进程为 hit，否则同步启动新进程为 miss"""
+        proc = self._pop_idle(key)
+        if proc is not None:
+            self.stats.hits += 1
+        else:
+            self.stats.misses += 1
+            if self._total_processes() >= self.max_total_processes and not self._evict_lru_idle(exclude=key):
+                self.stats.overflows += 1
+                raise PoolFullError(
+                    f"CLI pool is at max_total_processes={self.max_total_processes} with no idle process to recycle"
+                )
+            # 同步启动的进程同样计入启动中，避免预热补充超过上限
+            self._spawning[key] = self._spawning.get(key, 0) + 1
+            try:
+                proc = await self._spawn(key)
+            finally:
+                self._spawning[key] -= 1
+        self._leased += 1
+        self._last_demand[key] = time.time()
+        self._schedule_refill(key)
+        return proc
+
+    def release(self, proc: PooledCLIProcess, failed: bool = False):
+        """归还进程；出错或达到使用上限则回收"""
+        self._leased = max(0, self._leased - 1)
+        if failed:
+            self.stats.errors += 1
+            proc.kill()
+        if self._closed or not proc.alive or proc.uses >= self.max_uses:
+            self._retire(proc)
+        else:
+            self._idle.setdefault(proc.key, deque()).append(proc)
+        self._schedule_refill(proc.key)
+
+    def _retire(self, proc: PooledCLIProcess):
+        self.stats.recycled += 1
+        if proc.alive:
+            proc.shutdown()
+
+    def prewarm(self, key: PoolKey):
+        """为指定 key 预先启动空闲进程"""
+        if self.usable_from_current_loop():
+            self._last_demand[key] = time.time()
+            self._schedule_refill(key)
+
+    def _schedule_refill(self, key: PoolKey):
+        if self._closed:
+            return
+        self._ensure_reaper()
+        if key not in self._last_demand:
+            # 已被回收任务判定为闲置的 key 不再预热
+            return
+        idle = len(self._idle.get(key, ()))
+        missing = self.size - idle - self._spawning.get(key, 0)
+        missing = min(missing, self.max_total_processes - self._total_processes())
+        for _ in range(max(0, missing)):
+            self._spawning[key] = self._spawning.get(key, 0) + 1
+            task = asyncio.get_running_loop().create_task(self._refill_one(key))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+
+    async def _refill_one(self, key: PoolKey):
+        try:
+            proc = await self._spawn(key)
+        except PoolSpawnError as exc:
+            logger.warning(f"CLI pool prewarm failed: {exc}")
+            return
+        finally:
+            self._spawning[key] -= 1
+        if self._closed:
+            proc.shutdown()
+            return
+        self._idle.setdefault(key, deque()).append(proc)
+
+    def _ensure_reaper(self):
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.get_running_loop().create_task(self._reap_loop())
+            self._background.add(self._reaper)
+            self._reaper.add_done_callback(self._background.discard)
+
+    async def _reap_loop(self):
+        interval = max(1.0, min(self.max_idle_seconds / 2, 60.0))
+        while not self._closed:
+            await asyncio.sleep(interval)
+            self.reap_idle()
+
+    def reap_idle(self):
+        """关闭空闲超时的进程，并停止为闲置的 key 补充进程"""
+        now = time.time()
+        for key in list(self._idle):
+            idle = self._idle[key]
+            for proc in [proc for proc in idle if not proc.alive or now - proc.last_used_at > self.max_idle_seconds]:
+                idle.remove(proc)
+                self._retire(proc)
+            if now - self._last_demand.get(key, 0) > self.max_idle_seconds:
+                self._last_demand.pop(key, None)
+                if not idle and not self._spawning.get(key):
+                    del self._idle[key]
+                    self._spawning.pop(key, None)
+
+    async def close(self):
+        """关闭所有空闲进程和后台预热任务"""
+        self._closed = True
+        for task in list(self._background):
+            task.cancel()
+        for idle in self._idle.values():
+            while idle:
+                idle.popleft().shutdown()
+        self._idle.clear()
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+
+    def get_stats(self) -> Dict:
+        stats = self.stats.to_dict()
+        stats["idle"] = sum(len(q) for q in self._idle.values())
+        stats["leased"] = self._leased
+        stats["keys"] = len(self._idle)
+        return stats
+
+
+# 全局单例（默认未启用）
+_cli_pool_instance: Optional[CLIProcessPool] = None
+
+
+def configure_cli_pool(config) -> Optional[CLIProcessPool]:
+    """
+    根据 performance.cli_pool 配置创建全局进程池
+
+    Args:
+        config: CliPoolConfig 实例（enabled=False 时关闭池化模式）
+    """
+    global _cli_pool_instance
+    if config is None or not config.enabled:
+        _cli_pool_instance = None
+        return None
+    _cli_pool_instance = CLIProcessPool(
+        size=config.size,
+        max_uses=config.max_uses,
+        max_idle_seconds=config.max_idle_seconds,
+        spawn_timeout_seconds=config.spawn_timeout_seconds,
+        max_total_processes=config.max_total_processes,
+    )
+    logger.info(
+        f"CLI process pool enabled (size={config.size}, max_uses={config.max_uses}, "
+        f"max_total_processes={config.max_total_processes})"
+    )
+    return _cli_pool_instance
+
+
+def get_cli_pool() -> Optional[CLIProcessPool]:
+    """获取全局进程池（未启用时返回 None）"""
+    return _cli_pool_instance
+
+
+async def shutdown_cli_pool():
+    """关闭全局进程池"""
+    global _cli_pool_instance
+    if _cli_pool_instance is not None:
+        logger.info(f"CLI process pool stats: {_cli_pool_instance.get_stats()}")
+        await _cli_pool_instance.close()
+        _cli_pool_instance = None
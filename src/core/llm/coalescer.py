@@ -0,0 +1,151 @@
+"""
+Request Coalescer - LLM请求合并 (single-flight)
+
+并发发出的相同请求（相同 prompt / 模型 / 工作目录 / 权限模式 / 调用类别）
+只触发一次底层调用，所有调用方共享同一个 (text, ResultMessage) 结果：
+- 首个调用方创建共享任务，后续调用方等待该任务
+- 单个调用方被取消不会影响其他调用方；全部取消后才取消底层请求
+- 底层请求失败时，所有调用方收到同一异常
+- 记录合并次数（节省的调用数）
+"""
+import asyncio
+import hashlib
+import json
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from src.utils.logger import get_logger
+
+logger = get_logger()
+
+
+@dataclass
+class CoalescerStats:
+    """合并统计"""
+    leaders: int = 0
+    coalesced: int = 0
+    by_call_class: Dict[str, int] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict:
+        return {
+            "requests": self.leaders + self.coalesced,
+            "calls_saved": self.coalesced,
+            "saved_by_call_class": dict(self.by_call_class),
+        }
+
+
+@dataclass
+class _Flight:
+    """进行中的共享请求"""
+    task: asyncio.Task
+    waiters: int = 0
+
+
+class RequestCoalescer:
+    """进程内 single-flight 请求合并器"""
+
+    def __init__(self):
+        self.stats = CoalescerStats()
+        self._flights: Dict[str, _Flight] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def usable_from_current_loop(self) -> bool:
+        """共享任务绑定在首次使用的事件循环上，其他事件循环中的调用不做合并"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        if self._loop is None:
+            self._loop = loop
+        return self._loop is loop
+
+    @staticmethod
+    def make_key(
+        prompt: str,
+        model: Optional[str],
+        call_class: str,
+        work_dir: str,
+        permission_mode: str,
+    ) -> str:
+        payload = json.dumps(
+            [prompt, model or "", call_class, work_dir, permission_mode], ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def run(
+        self,
+        key: str,
+        call_class: str,
+        factory: Callable[[], Awaitable[Tuple]],
+    ) -> Tuple:
+        """
+        执行或加入一个共享请求
+
+        Args:
+            key: 请求键（见 make_key）
+            call_class: 调用类别（用于统计）
+            factory: 无参协程工厂，仅在没有相同请求进行中时调用
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            task = asyncio.ensure_future(factory())
+            flight = _Flight(task=task)
+            self._flights[key] = flight
+            task.add_done_callback(lambda _t, k=key, f=flight: self._finish(k, f))
+            self.stats.leaders += 1
+        else:
+            self.stats.coalesced += 1
+            self.stats.by_call_class[call_class] = self.stats.by_call_class.get(call_class, 0) + 1
+            logger.debug(f"LLM request coalesced ({call_class}, key={key[:12]}, waiters={flight.waiters + 1})")
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.task.cancelled():
+                raise
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # 所有调用方都已放弃，取消底层请求
+                flight.task.cancel()
+            raise
+
+    def _finish(self, key: str, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.task.cancelled():
+            # 避免无人等待时出现 "exception was never retrieved" 警告
+            flight.task.exception()
+
+    def get_stats(self) -> Dict:
+        stats = self.stats.to_dict()
+        stats["in_flight"] = self.in_flight
+        return stats
+
+
+# 全局单例
+_coalescer_instance: Optional[RequestCoalescer] = None
+
+
+def configure_request_coalescer(config) -> Optional[RequestCoalescer]:
+    """
+    根据 performance.coalescing 配置创建全局请求合并器
+
+    Args:
+        config: CoalescingConfig 实例（enabled=False 时不合并）
+    """
+    global _coalescer_instance
+    if config is None or not config.enabled:
+        _coalescer_instance = None
+        return None
+    _coalescer_instance = RequestCoalescer()
+    return _coalescer_instance
+
+
+def get_request_coalescer() -> Optional[RequestCoalescer]:
+    """获取全局请求合并器（未启用时返回 None）"""
+    return _coalescer_instance
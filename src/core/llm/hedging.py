@@ -0,0 +1,203 @@
+"""
+Request Hedging - LLM对冲请求
+
+按调用类别维护滚动延迟窗口；当一次调用耗时超过该类别的 pXX 延迟时，
+并行发起第二次尝试，采用先完成的结果并取消另一方（其 CLI 子进程随之终止）。
+
+- 样本数不足 min_samples 时不对冲（还不知道"慢"是多慢）
+- 对冲延迟被限制在 [min_delay_seconds, max_delay_seconds] 内
+- 只对 call_classes 中的调用类别生效
+- 记录每个类别的 p50/p95、对冲次数及对冲胜出次数
+"""
+import asyncio
+import math
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Deque, Dict, Iterable, Optional, TypeVar
+
+from src.utils.logger import get_logger
+
+logger = get_logger()
+
+T = TypeVar("T")
+
+
+def _percentile(sorted_samples, percentile: float) -> float:
+    """最近秩法求百分位"""
+    rank = max(1, math.ceil(percentile / 100.0 * len(sorted_samples)))
+    return sorted_samples[min(rank, len(sorted_samples)) - 1]
+
+
+@dataclass
+class HedgeMetrics:
+    """单个调用类别的对冲统计"""
+    calls: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+
+    def to_dict(self) -> Dict:
+        return {"calls": self.calls, "hedges": self.hedges, "hedge_wins": self.hedge_wins}
+
+
+class LatencyTracker:
+    """按调用类别的滚动延迟窗口"""
+
+    def __init__(self, window_size: int = 200):
+        self.window_size = window_size
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, call_class: str, seconds: float):
+        self._samples.setdefault(call_class, deque(maxlen=self.window_size)).append(seconds)
+
+    def count(self, call_class: str) -> int:
+        return len(self._samples.get(call_class, ()))
+
+    def percentile(self, call_class: str, percentile: float) -> Optional[float]:
+        samples = self._samples.get(call_class)
+        if not samples:
+            return None
+        return _percentile(sorted(samples), percentile)
+
+    def summary(self) -> Dict[str, Dict]:
+        result = {}
+        for call_class, samples in self._samples.items():
+            ordered = sorted(samples)
+            result[call_class] = {
+                "samples": len(ordered),
+                "p50_seconds": round(_percentile(ordered, 50), 2),
+                "p95_seconds": round(_percentile(ordered, 95), 2),
+            }
+        return result
+
+
+class HedgePolicy:
+    """对冲策略：决定何时发起第二次尝试，并执行对冲"""
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        min_samples: int = 20,
+        window_size: int = 200,
+        min_delay_seconds: float = 15.0,
+        max_delay_seconds: Optional[float] = None,
+        call_classes: Optional[Iterable[str]] = None,
+    ):
+        """
+        Args:
+            percentile: 触发对冲的延迟百分位
+            min_samples: 启用对冲所需的最少样本数
+            window_size: 每个调用类别保留的延迟样本数
+            min_delay_seconds: 对冲延迟下限
+            max_delay_seconds: 对冲延迟上限（None 表示不限）
+            call_classes: 启用对冲的调用类别（None 表示全部）
+        """
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay_seconds = min_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.call_classes = set(call_classes) if call_classes is not None else None
+        self.latency = LatencyTracker(window_size)
+        self.metrics: Dict[str, HedgeMetrics] = {}
+
+    def record_latency(self, call_class: str, seconds: float):
+        self.latency.record(call_class, seconds)
+
+    def hedge_delay(self, call_class: str) -> Optional[float]:
+        """返回发起对冲前的等待秒数；None 表示该调用不对冲"""
+        if self.call_classes is not None and call_class not in self.call_classes:
+            return None
+        if self.latency.count(call_class) < self.min_samples:
+            return None
+        delay = max(self.min_delay_seconds, self.latency.percentile(call_class, self.percentile))
+        if self.max_delay_seconds is not None:
+            delay = min(delay, self.max_delay_seconds)
+        return delay
+
+    async def run(self, call_class: str, delay: float, attempt: Callable[[], Awaitable[T]]) -> T:
+        """
+        执行一次可对冲的调用
+
+        Args:
+            call_class: 调用类别
+            delay: 主尝试超过该秒数仍未完成时发起对冲
+            attempt: 无参协程工厂，每次调用发起一次独立尝试
+        """
+        metrics = self.metrics.setdefault(call_class, HedgeMetrics())
+        metrics.calls += 1
+
+        primary = asyncio.ensure_future(attempt())
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if not done:
+                metrics.hedges += 1
+                logger.info(f"Hedging slow {call_class} LLM call (> {delay:.1f}s), launching second attempt")
+                tasks.append(asyncio.ensure_future(attempt()))
+
+            first_error: Optional[BaseException] = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in (t for t in tasks if t in done):
+                    error = task.exception()
+                    if error is None:
+                        if task is not primary:
+                            metrics.hedge_wins += 1
+                        return task.result()
+                    if first_error is None:
+                        first_error = error
+            raise first_error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    # 取消落后的尝试；其 CLI 子进程在任务清理时终止
+                    task.cancel()
+                    task.add_done_callback(_consume_result)
+
+    def get_stats(self) -> Dict:
+        latency = self.latency.summary()
+        return {
+            call_class: {**latency.get(call_class, {}), **self.metrics.get(call_class, HedgeMetrics()).to_dict()}
+            for call_class in sorted(set(latency) | set(self.metrics))
+        }
+
+
+def _consume_result(task: asyncio.Future):
+    """取回被取消任务的结果，避免 "exception was never retrieved" 警告"""
+    if not task.cancelled():
+        task.exception()
+
+
+# 全局单例
+_hedge_policy_instance: Optional[HedgePolicy] = None
+
+
+def configure_hedging(config) -> Optional[HedgePolicy]:
+    """
+    根据 performance.hedging 配置创建全局对冲策略
+
+    Args:
+        config: HedgingConfig 实例（enabled=False 时不对冲）
+    """
+    global _hedge_policy_instance
+    if config is None or not config.enabled:
+        _hedge_policy_instance = None
+        return None
+    _hedge_policy_instance = HedgePolicy(
+        percentile=config.percentile,
+        min_samples=config.min_samples,
+        window_size=config.window_size,
+        min_delay_seconds=config.min_delay_seconds,
+        max_delay_seconds=config.max_delay_seconds,
+        call_classes=config.call_classes or None,
+    )
+    logger.info(
+        f"LLM request hedging enabled (p{config.percentile:g}, "
+        f"call_classes={config.call_classes or 'all'})"
+    )
+    return _hedge_policy_instance
+
+
+def get_hedge_policy() -> Optional[HedgePolicy]:
+    """获取全局对冲策略（未启用时返回 None）"""
+    return _hedge_policy_instance
@@ -0,0 +1,174 @@
+"""
+Prompt Layout - 面向提示缓存的提示组装
+
+把提示拆成带稳定性等级的片段，按"最稳定 → 最易变"排序后拼接：
+- STATIC: 整个进程内不变（ReAct 规则、工具描述、输出格式说明）
+- SESSION: 会话 / 角色内不变（角色完整提示、技能提示、工作目录说明）
+- TASK: 单个任务内不变（任务描述、目标）
+- VOLATILE: 每次调用都可能变化（上一步结果、计划状态、反馈、时间戳）
+
+cache_through 及更稳定的片段组成可缓存前缀，run_claude_prompt 把它作为追加的系统提示发送
+（提供方在系统提示末尾设置缓存断点），其余片段作为用户消息。片段文本会规范化
+（统一换行、去除首尾空白），相同片段在会话内得到逐字节相同的前缀。
+
+PrefixMonitor 按调用类别统计可缓存前缀的复用情况；实际的 cache_read / input token
+由 CostTracker 按调用类别汇总。
+"""
+import hashlib
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+from src.core.llm.call_context import CallClass
+
+SEGMENT_SEPARATOR = "\n\n"
+
+
+class Stability(IntEnum):
+    """片段稳定性（数值越小越稳定，越靠前）"""
+    STATIC = 0
+    SESSION = 1
+    TASK = 2
+    VOLATILE = 3
+
+
+@dataclass(frozen=True)
+class PromptSegment:
+    """提示片段"""
+    name: str
+    text: str
+    stability: Stability
+
+
+def _normalize(text: str) -> str:
+    return text.replace("\r\n", "\n").strip()
+
+
+class PromptLayout:
+    """按稳定性排序的提示"""
+
+    def __init__(
+        self,
+        call_class: str = CallClass.DEFAULT,
+        cache_through: Stability = Stability.SESSION,
+    ):
+        """
+        Args:
+            call_class: 调用类别（用于统计）
+            cache_through: 该等级及更稳定的片段进入可缓存前缀
+        """
+        self.call_class = call_class
+        self.cache_through = cache_through
+        self._segments: List[PromptSegment] = []
+
+    @classmethod
+    def of(cls, prompt: Union[str, "PromptLayout"], call_class: str = CallClass.DEFAULT) -> "PromptLayout":
+        """复制一个布局；字符串视为单个 TASK 片段"""
+        if isinstance(prompt, PromptLayout):
+            layout = cls(prompt.call_class, prompt.cache_through)
+            layout._segments = list(prompt._segments)
+            return layout
+        return cls(call_class).add("task", prompt, Stability.TASK)
+
+    def add(self, name: str, text: Optional[str], stability: Stability) -> "PromptLayout":
+        """追加片段（空文本忽略）；同一等级内保持追加顺序"""
+        text = _normalize(text or "")
+        if text:
+            self._segments.append(PromptSegment(name, text, Stability(stability)))
+        return self
+
+    @property
+    def segments(self) -> List[PromptSegment]:
+        """按稳定性排序的片段"""
+        return sorted(self._segments, key=lambda segment: segment.stability)
+
+    def _join(self, segments: List[PromptSegment]) -> str:
+        return SEGMENT_SEPARATOR.join(segment.text for segment in segments)
+
+    def cacheable_prefix(self) -> str:
+        """可缓存前缀（cache_through 及更稳定的片段）"""
+        return self._join([s for s in self.segments if s.stability <= self.cache_through])
+
+    def volatile_suffix(self) -> str:
+        """前缀之后的部分"""
+        return self._join([s for s in self.segments if s.stability > self.cache_through])
+
+    def render(self) -> str:
+        """完整提示（单条消息形式）"""
+        return self._join(self.segments)
+
+    def breakpoints(self) -> List[Tuple[str, int]]:
+        """每个稳定性等级结束处的 (等级名, 字符偏移)，最后一个可缓存等级即缓存断点"""
+        points = []
+        offset = 0
+        segments = self.segments
+        for index, segment in enumerate(segments):
+            offset += len(segment.text)
+            last_of_tier = index == len(segments) - 1 or segments[index + 1].stability != segment.stability
+            if last_of_tier:
+                points.append((segment.stability.name.lower(), offset))
+            offset += len(SEGMENT_SEPARATOR)
+        return points
+
+    def split(self) -> Tuple[Optional[str], str]:
+        """
+        返回 (系统提示前缀, 用户消息)
+
+        没有易变片段时整段作为用户消息发送（不单独拆出前缀）。
+        """
+        prefix = self.cacheable_prefix()
+        suffix = self.volatile_suffix()
+        if not prefix or not suffix:
+            return None, self.render()
+        return prefix, suffix
+
+    def __str__(self) -> str:
+        return self.render()
+
+
+@dataclass
+class PrefixStats:
+    """单个调用类别的前缀复用统计"""
+    calls: int = 0
+    prefix_reuses: int = 0
+    prefix_chars: int = 0
+    prefixes: Set[str] = field(default_factory=set)
+
+    def to_dict(self) -> Dict:
+        return {
+            "calls": self.calls,
+            "distinct_prefixes": len(self.prefixes),
+            "prefix_reuses": self.prefix_reuses,
+            "avg_prefix_chars": round(self.prefix_chars / self.calls) if self.calls else 0,
+        }
+
+
+class PrefixMonitor:
+    """统计各调用类别的可缓存前缀：复用次数越多，提供方缓存命中越多"""
+
+    def __init__(self):
+        self._stats: Dict[str, PrefixStats] = {}
+
+    def record(self, call_class: str, prefix: Optional[str]):
+        stats = self._stats.setdefault(call_class, PrefixStats())
+        stats.calls += 1
+        if not prefix:
+            return
+        digest = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+        if digest in stats.prefixes:
+            stats.prefix_reuses += 1
+        else:
+            stats.prefixes.add(digest)
+        stats.prefix_chars += len(prefix)
+
+    def get_stats(self) -> Dict[str, Dict]:
+        return {call_class: stats.to_dict() for call_class, stats in sorted(self._stats.items())}
+
+
+# 全局单例
+_prefix_monitor = PrefixMonitor()
+
+
+def get_prefix_monitor() -> PrefixMonitor:
+    """获取全局前缀复用统计"""
+    return _prefix_monitor
@@ -0,0 +1,223 @@
+"""
+Response Cache - LLM响应磁盘缓存
+
+对确定性 prompt 的 run_claude_prompt 结果做内容寻址缓存：
+- 键 = sha256(prompt, model, call_class)
+- 每个条目一个 JSON 文件，原子写入（临时文件 + rename）
+- 按文件 mtime 做 LRU（命中时 touch），超出条目数/总大小时淘汰最旧条目
+- 超过 TTL 的条目视为未命中并删除
+
+默认关闭，通过 performance.response_cache 启用；调用方可用 use_cache=False 绕过。
+"""
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from claude_code_sdk import ResultMessage
+
+from src.utils.logger import get_logger
+
+logger = get_logger()
+
+
+@dataclass
+class ResponseCacheStats:
+    """缓存统计"""
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    evictions: int = 0
+    expired: int = 0
+
+    def to_dict(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "expired": self.expired,
+        }
+
+
+class ResponseCache:
+    """内容寻址的 LLM 响应磁盘缓存（LRU + TTL）"""
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_entries: int = 2000,
+        max_size_mb: float = 200.0,
+        ttl_hours: float = 168.0,
+        call_classes: Optional[Iterable[str]] = None,
+    ):
+        """
+        Args:
+            cache_dir: 缓存目录
+            max_entries: 最大条目数
+            max_size_mb: 缓存总大小上限 (MB)
+            ttl_hours: 条目有效期 (小时)
+            call_classes: 允许缓存的调用类别（None 表示全部）
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.ttl_seconds = ttl_hours * 3600
+        self.call_classes = set(call_classes) if call_classes is not None else None
+
+        self.stats = ResponseCacheStats()
+        # key -> size_bytes，按最近使用顺序排列（最旧在前）
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._load_index()
+
+    def _load_index(self):
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_bytes += size
+
+    def is_cacheable(self, call_class: str) -> bool:
+        return self.call_classes is None or call_class in self.call_classes
+
+    @staticmethod
+    def make_key(prompt: str, model: Optional[str], call_class: str) -> str:
+        payload = json.dumps([prompt, model or "", call_class], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Tuple[str, Optional[ResultMessage]]]:
+        """读取缓存；未命中、过期或损坏时返回 None"""
+        path = self._path(key)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self.stats.misses += 1
+            return None
+
+        if time.time() - data.get("created_at", 0) > self.ttl_seconds:
+            self.stats.expired += 1
+            self.stats.misses += 1
+            self._remove(key)
+            return None
+
+        # LRU: 命中时更新 mtime
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        size = self._index.pop(key, None)
+        self._index[key] = size if size is not None else path.stat().st_size
+        if size is None:
+            self._total_bytes += self._index[key]
+
+        self.stats.hits += 1
+        result_data = data.get("result_message")
+        result_message = ResultMessage(**result_data) if result_data else None
+        return data.get("text", ""), result_message
+
+    def set(
+        self,
+        key: str,
+        text: str,
+        result_message: Optional[ResultMessage],
+        call_class: str,
+        model: Optional[str] = None,
+    ):
+        """写入缓存（原子替换）"""
+        data = {
+            "created_at": time.time(),
+            "call_class": call_class,
+            "model": model,
+            "text": text,
+            "result_message": asdict(result_message) if result_message is not None else None,
+        }
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            tmp_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write LLM response cache entry: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return
+
+        size = path.stat().st_size
+        old_size = self._index.pop(key, 0)
+        self._index[key] = size
+        self._total_bytes += size - old_size
+        self.stats.writes += 1
+        self._evict()
+
+    def _remove(self, key: str):
+        self._total_bytes -= self._index.pop(key, 0)
+        self._path(key).unlink(missing_ok=True)
+
+    def _evict(self):
+        while self._index and (
+            len(self._index) > self.max_entries or self._total_bytes > self.max_bytes
+        ):
+            oldest = next(iter(self._index))
+            self._remove(oldest)
+            self.stats.evictions += 1
+
+    def clear(self):
+        """清空缓存"""
+        for key in list(self._index):
+            self._remove(key)
+
+    def get_stats(self) -> Dict:
+        stats = self.stats.to_dict()
+        stats["entries"] = len(self._index)
+        stats["size_mb"] = round(self._total_bytes / (1024 * 1024), 2)
+        return stats
+
+
+# 全局单例（默认未启用）
+_response_cache_instance: Optional[ResponseCache] = None
+
+
+def configure_response_cache(config, default_dir: str) -> Optional[ResponseCache]:
+    """
+    根据 performance.response_cache 配置创建全局响应缓存
+
+    Args:
+        config: ResponseCacheConfig 实例（enabled=False 时关闭缓存）
+        default_dir: 未配置 cache_dir 时使用的目录
+    """
+    global _response_cache_instance
+    if config is None or not config.enabled:
+        _response_cache_instance = None
+        return None
+    _response_cache_instance = ResponseCache(
+        cache_dir=config.cache_dir or default_dir,
+        max_entries=config.max_entries,
+        max_size_mb=config.max_size_mb,
+        ttl_hours=config.ttl_hours,
+        call_classes=config.call_classes,
+    )
+    logger.info(
+        f"LLM response cache enabled at {_response_cache_instance.cache_dir} "
+        f"({_response_cache_instance.get_stats()['entries']} entries)"
+    )
+    return _response_cache_instance
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """获取全局响应缓存（未启用时返回 None）"""
+    return _response_cache_instance
@@ -0,0 +1,244 @@
+"""
+LLM Scheduler - LLM调用调度器
+
+所有 run_claude_prompt 调用共享的异步调度器：
+- 按调用类别分配优先级（executor > planner > validator > critic）
+- 全局并发上限 + 按模型并发上限
+- 同优先级内在会话之间轮转，避免单个会话独占
+- 等待时间老化，防止低优先级调用饿死
+- 记录队列深度和等待时间
+"""
+import asyncio
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from src.core.llm.call_context import CallClass
+from src.utils.logger import get_logger
+
+logger = get_logger()
+
+# 数值越小优先级越高
+DEFAULT_PRIORITIES: Dict[str, int] = {
+    CallClass.EXECUTOR: 0,
+    CallClass.PLANNER: 1,
+    CallClass.HEALTH_CHECK: 1,
+    CallClass.LEADER: 2,
+    CallClass.DECOMPOSER: 2,
+    CallClass.ASSEMBLER: 2,
+    CallClass.RESEARCHER: 2,
+    CallClass.DEFAULT: 2,
+    CallClass.VALIDATOR: 3,
+    CallClass.CRITIC: 4,
+}
+
+
+@dataclass
+class _Waiter:
+    """排队中的调用"""
+    future: asyncio.Future
+    call_class: str
+    model: str
+    session_id: str
+    priority: int
+    enqueued_at: float = field(default_factory=time.monotonic)
+    seq: int = 0
+
+
+@dataclass
+class CallClassMetrics:
+    """单个调用类别的调度统计"""
+    requests: int = 0
+    total_wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+
+    def record(self, wait_seconds: float):
+        self.requests += 1
+        self.total_wait_seconds += wait_seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+
+    def to_dict(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "avg_wait_seconds": round(self.total_wait_seconds / self.requests, 3) if self.requests else 0.0,
+            "max_wait_seconds": round(self.max_wait_seconds, 3),
+        }
+
+
+class LLMScheduler:
+    """全局 LLM 调用调度器"""
+
+    def __init__(
+        self,
+        max_concurrent: int = 4,
+        per_model_limits: Optional[Dict[str, int]] = None,
+        priorities: Optional[Dict[str, int]] = None,
+        aging_seconds: float = 30.0,
+    ):
+        """
+        Args:
+            max_concurrent: 全局同时进行的 LLM 调用上限
+            per_model_limits: 按模型的并发上限 {model: limit}
+            priorities: 覆盖默认调用类别优先级 {call_class: priority}
+            aging_seconds: 每等待该秒数，有效优先级提升一级
+        """
+        self.max_concurrent = max(1, max_concurrent)
+        self.per_model_limits = dict(per_model_limits or {})
+        self.priorities = {**DEFAULT_PRIORITIES, **(priorities or {})}
+        self.aging_seconds = aging_seconds
+
+        self._waiters: List[_Waiter] = []
+        self._in_flight = 0
+        self._in_flight_by_model: Dict[str, int] = {}
+        self._session_served: Dict[str, int] = {}
+        self._served_counter = itertools.count(1)
+        self._seq = itertools.count()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.metrics: Dict[str, CallClassMetrics] = {}
+        self.max_queue_depth = 0
+
+    def usable_from_current_loop(self) -> bool:
+        """调度状态绑定在首次使用的事件循环上，其他事件循环中的调用不受调度"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        if self._loop is None:
+            self._loop = loop
+        return self._loop is loop
+
+    def _model_has_capacity(self, model: str) -> bool:
+        limit = self.per_model_limits.get(model)
+        return limit is None or self._in_flight_by_model.get(model, 0) < limit
+
+    def _effective_priority(self, waiter: _Waiter, now: float) -> float:
+        if self.aging_seconds <= 0:
+            return waiter.priority
+        return waiter.priority - (now - waiter.enqueued_at) / self.aging_seconds
+
+    def _dispatch(self):
+        """在容量允许时按 (有效优先级, 会话最近服务顺序, 入队顺序) 放行等待者"""
+        while self._waiters and self._in_flight < self.max_concurrent:
+            now = time.monotonic()
+            candidates = [
+                w for w in self._waiters
+                if not w.future.done() and self._model_has_capacity(w.model)
+            ]
+            self._waiters = [w for w in self._waiters if not w.future.done()]
+            if not candidates:
+                return
+            chosen = min(
+                candidates,
+                key=lambda w: (
+                    math.floor(self._effective_priority(w, now)),
+                    self._session_served.get(w.session_id, 0),
+                    w.seq,
+                ),
+            )
+            self._waiters.remove(chosen)
+            self._grant(chosen.model, chosen.session_id)
+            self.metrics.setdefault(chosen.call_class, CallClassMetrics()).record(now - chosen.enqueued_at)
+            chosen.future.set_result(None)
+
+    def _grant(self, model: str, session_id: str):
+        self._in_flight += 1
+        self._in_flight_by_model[model] = self._in_flight_by_model.get(model, 0) + 1
+        self._session_served[session_id] = next(self._served_counter)
+
+    def _release(self, model: str):
+        self._in_flight -= 1
+        self._in_flight_by_model[model] = self._in_flight_by_model.get(model, 1) - 1
+        self._dispatch()
+
+    async def acquire(self, call_class: str, model: Optional[str], session_id: str):
+        """等待调度许可"""
+        model_key = model or "default"
+        waiter = _Waiter(
+            future=asyncio.get_running_loop().create_future(),
+            call_class=call_class,
+            model=model_key,
+            session_id=session_id,
+            priority=self.priorities.get(call_class, self.priorities[CallClass.DEFAULT]),
+            seq=next(self._seq),
+        )
+        self._waiters.append(waiter)
+        self._dispatch()
+        self.max_queue_depth = max(self.max_queue_depth, len(self._waiters))
+
+        if not waiter.future.done():
+            logger.debug(
+                f"LLM call queued: class={call_class}, model={model_key}, "
+                f"queue_depth={len(self._waiters)}, in_flight={self._in_flight}"
+            )
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # 已获许可但调用方被取消，归还名额
+                self._release(model_key)
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+
+    @asynccontextmanager
+    async def slot(self, call_class: str, model: Optional[str], session_id: str):
+        """
+        占用一个调用名额
+
+        Example:
+            async with scheduler.slot("executor", "claude-sonnet-4-5", session_id):
+                ...
+        """
+        await self.acquire(call_class, model, session_id)
+        try:
+            yield
+        finally:
+            self._release(model or "default")
+
+    def get_stats(self) -> Dict:
+        """获取调度统计（队列深度、在途请求、各类别等待时间）"""
+        return {
+            "max_concurrent": self.max_concurrent,
+            "in_flight": self._in_flight,
+            "in_flight_by_model": {m: n for m, n in self._in_flight_by_model.items() if n},
+            "queue_depth": len(self._waiters),
+            "max_queue_depth": self.max_queue_depth,
+            "by_call_class": {cls: m.to_dict() for cls, m in self.metrics.items()},
+        }
+
+
+# 全局单例
+_scheduler_instance: Optional[LLMScheduler] = None
+
+
+def configure_llm_scheduler(config) -> Optional[LLMScheduler]:
+    """
+    根据 performance.scheduler 配置创建全局调度器
+
+    Args:
+        config: SchedulerConfig 实例（enabled=False 时不做调度）
+    """
+    global _scheduler_instance
+    if config is None or not config.enabled:
+        _scheduler_instance = None
+        return None
+    _scheduler_instance = LLMScheduler(
+        max_concurrent=config.max_concurrent,
+        per_model_limits=config.per_model_limits,
+        priorities=config.priorities,
+        aging_seconds=config.aging_seconds,
+    )
+    logger.info(
+        f"LLM scheduler enabled (max_concurrent={config.max_concurrent}, "
+        f"per_model_limits={config.per_model_limits or 'none'})"
+    )
+    return _scheduler_instance
+
+
+def get_llm_scheduler() -> Optional[LLMScheduler]:
+    """获取全局调度器（未启用时返回 None）"""
+    return _scheduler_instance
@@ -0,0 +1,84 @@
+"""
+LLM Telemetry - LLM运行时事件与成本桥接
+
+让 LLM 运行时组件（缓存、调度器、进程池等）把事件写入当前会话的 EventStore，
+并把每次 CLI 调用的实际 token 用量和成本记入 CostTracker。
+会话 / 任务 / 角色 / 迭代归属取自调用上下文。未注册 EventStore / CostTracker 时忽略。
+"""
+from typing import Optional
+
+from claude_code_sdk import ResultMessage
+
+from src.core.events import CostTracker, EventStore, EventType, TokenUsage
+from src.core.llm.call_context import get_llm_call_context
+
+_event_store: Optional[EventStore] = None
+_cost_tracker: Optional[CostTracker] = None
+
+
+def set_llm_event_store(event_store: Optional[EventStore]):
+    """注册接收 LLM 运行时事件的 EventStore"""
+    global _event_store
+    _event_store = event_store
+
+
+def set_llm_cost_tracker(cost_tracker: Optional[CostTracker]):
+    """注册记录 LLM 调用成本的 CostTracker"""
+    global _cost_tracker
+    _cost_tracker = cost_tracker
+
+
+def get_llm_cost_tracker() -> Optional[CostTracker]:
+    """获取已注册的 CostTracker（未注册时返回 None）"""
+    return _cost_tracker
+
+
+def emit_llm_event(event_type: EventType, **data):
+    """记录一个 LLM 运行时事件（附带当前调用上下文）"""
+    if _event_store is None:
+        return
+    context = get_llm_call_context()
+    if context.mission_id:
+        data.setdefault("mission_id", context.mission_id)
+    if context.role:
+        data.setdefault("role", context.role)
+    _event_store.create_event(
+        event_type, session_id=context.session_id, iteration=context.iteration, **data
+    )
+
+
+def record_llm_usage(
+    call_class: str,
+    model: Optional[str],
+    result_message: Optional[ResultMessage],
+    duration_seconds: float,
+):
+    """
+    记录一次实际 CLI 调用的 token 用量和成本
+
+    成本优先取 ResultMessage.total_cost_usd，缺失时按 CostTracker.PRICING 估算。
+    """
+    if _cost_tracker is None or result_message is None:
+        return
+    context = get_llm_call_context()
+    token_usage = TokenUsage.from_sdk_usage(result_message.usage)
+    record = _cost_tracker.record_cost(
+        session_id=context.session_id,
+        agent_type=call_class,
+        model=model or "default",
+        token_usage=token_usage,
+        duration_seconds=duration_seconds,
+        iteration=context.iteration,
+        reported_cost_usd=result_message.total_cost_usd,
+        mission_id=context.mission_id,
+        role=context.role,
+    )
+    emit_llm_event(
+        EventType.API_CALL,
+        call_class=call_class,
+        model=record.model,
+        tokens=token_usage.to_dict(),
+        cost_usd=record.estimated_cost_usd,
+        cost_source=record.cost_source,
+        duration_seconds=round(duration_seconds, 3),
+    )
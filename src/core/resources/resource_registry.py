@@ -270,12 +270,12 @@ class ResourceRegistry:
         default_config = {
             "mappings": {
                 "market_research": {
-                    "required_tools": ["web_search", "write_file"],
+                    "required_tools": ["web_search", "web_search_batch", "write_file", "edit_file"],
                     "optional_tools": ["deep_research"],
                     "mcp_servers": ["filesystem"]
                 },
                 "documentation": {
-                    "required_tools": ["write_file", "read_file"],
+                    "required_tools": ["write_file", "edit_file", "read_file"],
                     "optional_tools": [],
                     "mcp_servers": ["filesystem"]
                 }
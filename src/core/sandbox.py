@@ -0,0 +1,332 @@
+"""
+Tool Sandbox - 工具沙箱
+
+- Sandbox: 进程内执行（不隔离，超时由调用方负责）
+- ProcessSandbox: 在可复用的工作进程池中执行同步工具
+  - 硬超时：超时后直接杀死工作进程（而不是让线程在后台继续运行）
+  - 资源限制：内存（RLIMIT_AS）与每次调用的 CPU 时间（RLIMIT_CPU），仅 Unix 生效
+  - 输出上限：超长字符串结果在工作进程内截断后再传回
+  - 回收：工作进程执行 max_tasks_per_worker 次后退出，被杀死或崩溃的进程不再复用
+  - 工具函数按模块路径传给工作进程；无法序列化或工作进程无法启动时回退为进程内执行
+
+工作进程通过 src.core.workspace 继承调用方的工作区，相对路径解析与进程内执行一致。
+run 的 on_start 回调在工具即将开始执行时调用（ProcessSandbox 中为取得工作进程名额之后），
+调用方据此开始计时；回调抛出异常时工具不会执行。
+"""
+import multiprocessing
+import pickle
+import signal
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from src.core.workspace import get_workspace, workspace
+from src.utils.logger import get_logger
+
+logger = get_logger()
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class SandboxError(Exception):
+    """沙箱执行失败"""
+
+
+class SandboxKilledError(SandboxError):
+    """工作进程被杀死（超时）或异常退出（资源超限 / 崩溃）"""
+
+    def __init__(self, message: str, reason: str):
+        super().__init__(message)
+        self.reason = reason  # "timeout" | "exited"
+
+
+class SandboxUnavailableError(SandboxError):
+    """调用无法在工作进程中执行（不可序列化 / 进程无法启动）"""
+
+
+class Sandbox:
+    """进程内执行（默认后端）"""
+
+    enforces_timeout = False
+
+    def run(
+        self,
+        func: Callable,
+        kwargs: Dict[str, Any],
+        timeout_seconds: Optional[float] = None,
+        on_start: Optional[Callable[[], None]] = None,
+    ) -> Any:
+        """Runs the function in the current process"""
+        if on_start is not None:
+            on_start()
+        try:
+            return func(**kwargs)
+        except Exception as e:
+            logger.error(f"❌ Sandbox caught error in {func.__name__}: {e}")
+            raise e
+
+    def get_stats(self) -> Dict:
+        return {"backend": "inline"}
+
+    def shutdown(self):
+        pass
+
+
+def _cap_output(result: Any, max_output_chars: int) -> Any:
+    if max_output_chars and isinstance(result, str) and len(result) > max_output_chars:
+        return (
+            f"{result[:max_output_chars]}\n"
+            f"... [output truncated by sandbox: {len(result)} chars, limit {max_output_chars}]"
+        )
+    return result
+
+
+def _apply_memory_limit(memory_limit_mb: int):
+    if resource is None or not memory_limit_mb:
+        return
+    limit = memory_limit_mb * 1024 * 1024
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def _apply_cpu_limit(cpu_limit_seconds: int):
+    """RLIMIT_CPU 按进程累计，因此每次调用前把软限制设为"已用 + 本次配额\""""
+    if resource is None or not cpu_limit_seconds:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = int(usage.ru_utime + usage.ru_stime) + cpu_limit_seconds
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _worker_main(conn, memory_limit_mb: int, cpu_limit_seconds: int):
+    """工作进程主循环：接收 (func, kwargs, workspace, max_output_chars)，返回 (status, payload)"""
+    # Ctrl+C 由主进程处理；工作进程随后被回收
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _apply_memory_limit(memory_limit_mb)
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            break
+        if task is None:
+            break
+        func, kwargs, workspace_path, max_output_chars = task
+        _apply_cpu_limit(cpu_limit_seconds)
+        try:
+            with workspace(workspace_path):
+                result = func(**kwargs)
+            reply = ("ok", _cap_output(result, max_output_chars))
+        except MemoryError:
+            reply = ("error", "MemoryError: sandbox memory limit exceeded")
+        except Exception as e:
+            reply = ("error", f"{type(e).__name__}: {e}")
+        try:
+            conn.send(reply)
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            conn.send(("error", f"Tool result could not be returned from sandbox: {e}"))
+
+
+@dataclass
+class _Worker:
+    process: Any
+    conn: Any
+    tasks: int = 0
+
+
+@dataclass
+class ProcessSandboxStats:
+    """工作进程池统计"""
+    runs: int = 0
+    inline_fallbacks: int = 0
+    workers_started: int = 0
+    workers_recycled: int = 0
+    kills: int = 0
+
+    def to_dict(self) -> Dict:
+        return {
+            "runs": self.runs,
+            "inline_fallbacks": self.inline_fallbacks,
+            "workers_started": self.workers_started,
+            "workers_recycled": self.workers_recycled,
+            "kills": self.kills,
+        }
+
+
+class ProcessSandbox(Sandbox):
+    """可复用工作进程池（硬超时 + 资源限制 + 输出上限 + 自动回收）"""
+
+    enforces_timeout = True
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_tasks_per_worker: int = 100,
+        memory_limit_mb: int = 4096,
+        cpu_limit_seconds: int = 120,
+        max_output_chars: int = 1_000_000,
+        start_method: str = "spawn",
+    ):
+        """
+        Args:
+            max_workers: 最大工作进程数（同时执行的沙箱调用数）
+            max_tasks_per_worker: 工作进程执行多少次调用后回收
+            memory_limit_mb: 工作进程地址空间上限（0 表示不限）
+            cpu_limit_seconds: 每次调用的 CPU 时间上限（0 表示不限）
+            max_output_chars: 字符串结果的长度上限（0 表示不限）
+            start_method: multiprocessing 启动方式（spawn / forkserver / fork）
+        """
+        self.max_workers = max_workers
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.memory_limit_mb = memory_limit_mb
+        self.cpu_limit_seconds = cpu_limit_seconds
+        self.max_output_chars = max_output_chars
+        self._context = multiprocessing.get_context(start_method)
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._lock = threading.Lock()
+        self._idle: List[_Worker] = []
+        self._closed = False
+        self.stats = ProcessSandboxStats()
+
+    def run(
+        self,
+        func: Callable,
+        kwargs: Dict[str, Any],
+        timeout_seconds: Optional[float] = None,
+        on_start: Optional[Callable[[], None]] = None,
+    ) -> Any:
+        """
+        在工作进程中执行 func(**kwargs)（on_start 在取得名额后、执行前调用）
+
+        Raises:
+            SandboxKilledError: 超时（工作进程被杀死）或工作进程异常退出
+            SandboxError: 工具在工作进程中抛出异常
+        """
+        if self._closed:
+            return super().run(func, kwargs, timeout_seconds, on_start)
+        with self._slots:
+            if on_start is not None:
+                on_start()
+            try:
+                worker = self._acquire()
+                self._send(worker, func, kwargs)
+            except SandboxUnavailableError as e:
+                self.stats.inline_fallbacks += 1
+                logger.debug(f"Running {func.__name__} in-process: {e}")
+                return super().run(func, kwargs, timeout_seconds)
+
+            self.stats.runs += 1
+            started = time.monotonic()
+            if not worker.conn.poll(timeout_seconds):
+                self.stats.kills += 1
+                self._kill(worker)
+                raise SandboxKilledError(
+                    f"timed out after {timeout_seconds} seconds (sandbox worker killed)", reason="timeout"
+                )
+            try:
+                status, payload = worker.conn.recv()
+            except (EOFError, OSError):
+                worker.process.join(timeout=1)
+                exit_code = worker.process.exitcode
+                self.stats.kills += 1
+                self._kill(worker)
+                raise SandboxKilledError(
+                    f"sandbox worker exited after {time.monotonic() - started:.1f}s "
+                    f"(exit code {exit_code}; CPU/memory limit or crash)",
+                    reason="exited",
+                )
+
+            worker.tasks += 1
+            self._release(worker)
+            if status == "error":
+                raise SandboxError(payload)
+            return payload
+
+    def _acquire(self) -> _Worker:
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.process.is_alive():
+                    return worker
+                self._close_conn(worker)
+        try:
+            parent_conn, child_conn = self._context.Pipe(duplex=True)
+            process = self._context.Process(
+                target=_worker_main,
+                args=(child_conn, self.memory_limit_mb, self.cpu_limit_seconds),
+                name="tool-sandbox",
+                daemon=True,
+            )
+            process.start()
+            child_conn.close()
+        except Exception as e:
+            raise SandboxUnavailableError(f"sandbox worker failed to start: {e}") from e
+        self.stats.workers_started += 1
+        return _Worker(process=process, conn=parent_conn)
+
+    def _send(self, worker: _Worker, func: Callable, kwargs: Dict[str, Any]):
+        try:
+            # 先序列化：失败时工作进程未收到任何数据，可以直接复用
+            payload = pickle.dumps((func, kwargs, str(get_workspace()), self.max_output_chars))
+        except Exception as e:
+            self._release(worker)
+            raise SandboxUnavailableError(f"arguments are not picklable: {e}") from e
+        try:
+            worker.conn.send_bytes(payload)
+        except OSError as e:
+            self._kill(worker)
+            raise SandboxUnavailableError(f"sandbox worker is gone: {e}") from e
+
+    def _release(self, worker: _Worker):
+        if worker.tasks >= self.max_tasks_per_worker or self._closed:
+            self.stats.workers_recycled += 1
+            self._stop(worker)
+            return
+        with self._lock:
+            self._idle.append(worker)
+
+    def _kill(self, worker: _Worker):
+        if worker.process.is_alive():
+            worker.process.kill()
+        worker.process.join(timeout=5)
+        self._close_conn(worker)
+
+    def _stop(self, worker: _Worker):
+        try:
+            worker.conn.send(None)
+        except OSError:
+            pass
+        worker.process.join(timeout=1)
+        if worker.process.is_alive():
+            worker.process.kill()
+            worker.process.join(timeout=5)
+        self._close_conn(worker)
+
+    @staticmethod
+    def _close_conn(worker: _Worker):
+        try:
+            worker.conn.close()
+        except OSError:
+            pass
+
+    def get_stats(self) -> Dict:
+        stats = self.stats.to_dict()
+        stats["backend"] = "process"
+        stats["idle_workers"] = len(self._idle)
+        return stats
+
+    def shutdown(self):
+        """停止所有空闲工作进程（执行中的调用结束后其进程随之回收）"""
+        self._closed = True
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            self._stop(worker)
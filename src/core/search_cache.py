@@ -0,0 +1,274 @@
+"""
+Search Cache - 网页搜索结果磁盘缓存
+
+web_search 的持久化结果缓存，跨任务、角色、重试和会话复用：
+- 键 = sha256(规范化查询, search_depth, max_results, days, 提供方)；查询规范化为小写并合并空白
+- 每个条目一个 JSON 文件，原子写入（临时文件 + rename），多个进程可共享同一目录
+- 命中时 touch 文件 mtime；超过条目数 / 总大小上限时按 mtime 淘汰最旧条目，直到低于上限的 90%
+- 条目数和总大小在内存中累计（启动时扫描一次），只有超过上限时才扫描目录淘汰；
+  扫描结果同时校正计数，其他进程写入的条目也会被计入（此外每隔 _RESCAN_INTERVAL_SECONDS 重新扫描）
+- 超过 TTL 的条目视为未命中并删除
+- 条目记录原始搜索耗时，命中时累计节省的时间
+
+通过 research.search_cache 配置（默认开启）。
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+from src.utils.logger import get_logger
+
+logger = get_logger()
+
+# 共享目录时其他进程的写入不在本进程的计数中；至少每隔这么久重新扫描一次
+_RESCAN_INTERVAL_SECONDS = 300.0
+# 超过上限时淘汰到上限的这个比例，之后的写入不会每次都触发扫描
+_EVICT_TARGET_RATIO = 0.9
+
+
+def normalize_query(query: str) -> str:
+    """规范化查询：小写并合并空白"""
+    return " ".join(query.lower().split())
+
+
+@dataclass
+class CachedSearch:
+    """一条缓存的搜索结果（response 为搜索服务返回的原始结果）"""
+    response: Dict
+    duration_seconds: float
+    age_seconds: float
+
+
+@dataclass
+class SearchCacheStats:
+    """缓存统计"""
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    evictions: int = 0
+    expired: int = 0
+    saved_seconds: float = 0.0
+
+    def to_dict(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "expired": self.expired,
+            "saved_seconds": round(self.saved_seconds, 2),
+        }
+
+
+class SearchCache:
+    """跨进程共享的 web_search 结果磁盘缓存（LRU + TTL）"""
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_entries: int = 5000,
+        max_size_mb: float = 100.0,
+        ttl_hours: float = 24.0,
+    ):
+        """
+        Args:
+            cache_dir: 缓存目录（可由多个进程共享）
+            max_entries: 最大条目数
+            max_size_mb: 缓存总大小上限 (MB)
+            ttl_hours: 条目有效期 (小时)
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.ttl_seconds = ttl_hours * 3600
+        self.stats = SearchCacheStats()
+        self._lock = threading.Lock()
+        self._count = 0
+        self._bytes = 0
+        self._scanned_at = 0.0
+        self._rescan()
+
+    @staticmethod
+    def make_key(
+        query: str, search_depth: str, max_results: int, days: Optional[int], provider: str = "tavily"
+    ) -> str:
+        payload = json.dumps([normalize_query(query), search_depth, max_results, days, provider])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[CachedSearch]:
+        """读取缓存；未命中、过期或损坏时返回 None"""
+        path = self._path(key)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            with self._lock:
+                self.stats.misses += 1
+            return None
+
+        age = time.time() - data.get("created_at", 0)
+        if age > self.ttl_seconds or not isinstance(data.get("response"), dict):
+            self._remove(path)
+            with self._lock:
+                self.stats.expired += 1
+                self.stats.misses += 1
+            return None
+
+        # LRU: 命中时更新 mtime
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        duration = float(data.get("duration_seconds", 0.0))
+        with self._lock:
+            self.stats.hits += 1
+            self.stats.saved_seconds += duration
+        return CachedSearch(response=data["response"], duration_seconds=duration, age_seconds=age)
+
+    def set(self, key: str, query: str, params: Dict, response: Dict, duration_seconds: float):
+        """写入缓存（原子替换），随后按上限淘汰"""
+        data = {
+            "created_at": time.time(),
+            "query": query,
+            "params": params,
+            "duration_seconds": duration_seconds,
+            "response": response,
+        }
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        old_size = self._size_of(path)
+        try:
+            encoded = json.dumps(data, ensure_ascii=False).encode("utf-8")
+            tmp_path.write_bytes(encoded)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write search cache entry: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return
+        with self._lock:
+            self.stats.writes += 1
+            self._count += 1 if old_size is None else 0
+            self._bytes += len(encoded) - (old_size or 0)
+            over_limit = self._count > self.max_entries or self._bytes > self.max_bytes
+            stale = time.monotonic() - self._scanned_at > _RESCAN_INTERVAL_SECONDS
+        if over_limit or stale:
+            self._evict()
+
+    @staticmethod
+    def _size_of(path: Path) -> Optional[int]:
+        try:
+            return path.stat().st_size
+        except OSError:
+            return None
+
+    def _remove(self, path: Path):
+        size = self._size_of(path)
+        try:
+            path.unlink()
+        except OSError:
+            return
+        with self._lock:
+            self._count = max(0, self._count - 1)
+            self._bytes = max(0, self._bytes - (size or 0))
+
+    def _rescan(self):
+        """扫描目录，校正条目数和总大小"""
+        entries = self._scan()
+        with self._lock:
+            self._count = len(entries)
+            self._bytes = sum(size for _, size, _ in entries)
+            self._scanned_at = time.monotonic()
+        return entries
+
+    def _scan(self):
+        """[(mtime, size, path)]，最旧在前"""
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        return entries
+
+    def _evict(self):
+        """超过上限时按 mtime 淘汰最旧条目，直到低于上限的 90%（扫描目录，顺带校正计数）"""
+        entries = self._rescan()
+        count = len(entries)
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        if count > self.max_entries or total > self.max_bytes:
+            target_count = int(self.max_entries * _EVICT_TARGET_RATIO)
+            target_bytes = int(self.max_bytes * _EVICT_TARGET_RATIO)
+        else:
+            target_count, target_bytes = count, total
+        for _, size, path in entries:
+            if count <= target_count and total <= target_bytes:
+                break
+            path.unlink(missing_ok=True)
+            count -= 1
+            total -= size
+            evicted += 1
+        with self._lock:
+            self._count = count
+            self._bytes = total
+            self.stats.evictions += evicted
+
+    def clear(self):
+        """清空缓存"""
+        for _, _, path in self._scan():
+            path.unlink(missing_ok=True)
+        self._rescan()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = self.stats.to_dict()
+        entries = self._scan()
+        stats["entries"] = len(entries)
+        stats["size_mb"] = round(sum(size for _, size, _ in entries) / (1024 * 1024), 2)
+        return stats
+
+
+# 全局单例（未配置时关闭）
+_search_cache_instance: Optional[SearchCache] = None
+
+
+def configure_search_cache(config, default_dir: str) -> Optional[SearchCache]:
+    """
+    根据 research.search_cache 配置创建全局搜索缓存
+
+    Args:
+        config: SearchCacheConfig 实例（enabled=False 时关闭缓存）
+        default_dir: 未配置 cache_dir 时使用的目录
+    """
+    global _search_cache_instance
+    if config is None or not config.enabled:
+        _search_cache_instance = None
+        return None
+    _search_cache_instance = SearchCache(
+        cache_dir=config.cache_dir or default_dir,
+        max_entries=config.max_entries,
+        max_size_mb=config.max_size_mb,
+        ttl_hours=config.ttl_hours,
+    )
+    logger.info(
+        f"Web search cache enabled at {_search_cache_instance.cache_dir} "
+        f"({_search_cache_instance.get_stats()['entries']} entries)"
+    )
+    return _search_cache_instance
+
+
+def get_search_cache() -> Optional[SearchCache]:
+    """获取全局搜索缓存（未启用时返回 None）"""
+    return _search_cache_instance
@@ -0,0 +1,488 @@
+"""
+Search Providers - 搜索服务提供方
+
+web_search / web_search_batch / ResearcherAgent 通过 SearchProvider 接口访问搜索服务：
+- TavilyProvider: Tavily API（进程内复用一个客户端，连接池大小等于批量搜索并发上限）
+- FixtureProvider: 离线语料库（目录下的 JSON / Markdown 文件），BM25 排序，可注入延迟，
+  用于无网络环境下的基准测试和压测
+- benchmark_providers: 在同一组查询上对比多个提供方的延迟和召回率
+
+所有提供方返回同一结构：{"answer": str | None, "results": [{"title", "url", "content", "score"}]}。
+通过 research.provider 选择（tavily / fixture），research.fixture 配置离线语料库。
+"""
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter, deque
+from pathlib import Path
+from typing import Deque, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from src.utils.logger import get_logger
+
+try:
+    import requests
+    from tavily import TavilyClient
+except ImportError:
+    TavilyClient = None
+
+logger = get_logger()
+
+_LATENCY_SAMPLES = 500
+
+
+class SearchProviderError(RuntimeError):
+    """提供方不可用或调用失败（消息可直接作为工具输出）"""
+
+
+def normalize_url(url: str) -> str:
+    """规范化 URL：去掉片段、跟踪参数、www. 前缀和结尾斜杠，主机名小写"""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    params = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not k.lower().startswith("utm_")]
+    path = parts.path.rstrip("/")
+    return urlunsplit(("", host, path, urlencode(sorted(params)), ""))
+
+
+class ProviderStats:
+    """单个提供方的调用统计（延迟分位数基于最近的调用）"""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self._latencies_ms: Deque[float] = deque(maxlen=_LATENCY_SAMPLES)
+        self._lock = threading.Lock()
+
+    def record(self, duration_seconds: float, error: bool = False):
+        with self._lock:
+            self.calls += 1
+            if error:
+                self.errors += 1
+            else:
+                self._latencies_ms.append(duration_seconds * 1000)
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            samples = sorted(self._latencies_ms)
+            stats = {"calls": self.calls, "errors": self.errors}
+        stats.update(latency_summary(samples))
+        return stats
+
+
+def latency_summary(samples_ms: List[float]) -> Dict:
+    """延迟样本 (ms) 的均值 / p50 / p95"""
+    if not samples_ms:
+        return {"avg_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0}
+    samples = sorted(samples_ms)
+
+    def _percentile(p: float) -> float:
+        return samples[min(len(samples) - 1, int(math.ceil(p / 100 * len(samples))) - 1)]
+
+    return {
+        "avg_ms": round(sum(samples) / len(samples), 1),
+        "p50_ms": round(_percentile(50), 1),
+        "p95_ms": round(_percentile(95), 1),
+    }
+
+
+class SearchProvider(ABC):
+    """搜索提供方基类"""
+
+    name = "base"
+    # 结果是否写入持久化搜索缓存（本地提供方没有调用成本，缓存只会干扰延迟测量）
+    cacheable = True
+
+    def __init__(self):
+        self.stats = ProviderStats()
+
+    @abstractmethod
+    def search(
+        self,
+        query: str,
+        search_depth: str = "advanced",
+        max_results: int = 5,
+        days: Optional[int] = 365,
+        timeout_seconds: float = 60.0,
+    ) -> Dict:
+        """
+        执行一条查询
+
+        Returns:
+            {"answer": str | None, "results": [{"title", "url", "content", "score"}]}
+
+        Raises:
+            SearchProviderError: 提供方不可用
+        """
+        pass
+
+    def close(self):
+        """释放连接等资源"""
+
+    def get_stats(self) -> Dict:
+        stats = self.stats.to_dict()
+        stats["provider"] = self.name
+        return stats
+
+
+class TavilyProvider(SearchProvider):
+    """Tavily API（客户端在 API key 变化时重建）"""
+
+    name = "tavily"
+
+    def __init__(self, pool_size: int = 4):
+        """
+        Args:
+            pool_size: HTTP 连接池大小（批量搜索的并发上限）
+        """
+        super().__init__()
+        self.pool_size = max(pool_size, 1)
+        self._client = None
+        self._api_key: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def _new_session(self) -> "requests.Session":
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def get_client(self):
+        """
+        获取共享的 TavilyClient
+
+        Raises:
+            SearchProviderError: 未安装 tavily-python 或未设置 TAVILY_API_KEY
+        """
+        if not TavilyClient:
+            raise SearchProviderError("Error: tavily-python not installed. Please run 'pip install tavily-python'.")
+        api_key = os.environ.get("TAVILY_API_KEY")
+        if not api_key:
+            raise SearchProviderError(
+                "Error: TAVILY_API_KEY environment variable not set. Please set it to use web search."
+            )
+        with self._lock:
+            if self._client is None or self._api_key != api_key:
+                self._close_locked()
+                try:
+                    self._client = TavilyClient(api_key=api_key, session=self._new_session())
+                except TypeError:
+                    # tavily-python 早期版本不支持传入 session
+                    self._client = TavilyClient(api_key=api_key)
+                self._api_key = api_key
+            return self._client
+
+    def search(self, query, search_depth="advanced", max_results=5, days=365, timeout_seconds=60.0) -> Dict:
+        client = self.get_client()
+        # search_depth="advanced" 会消耗 2 个 credit，但对市场研究至关重要
+        return client.search(
+            query=query,
+            search_depth=search_depth,
+            max_results=max_results,
+            days=days,
+            include_answer=True,
+            include_raw_content=False,  # 设置为 True 如果需要全文解析，但要注意 Token 消耗
+            timeout=timeout_seconds,
+        )
+
+    def _close_locked(self):
+        if self._client is not None:
+            session = getattr(self._client, "session", None)
+            if session is not None:
+                session.close()
+        self._client = None
+        self._api_key = None
+
+    def close(self):
+        with self._lock:
+            self._close_locked()
+
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+|[\u4e00-\u9fff]")
+
+
+def _tokenize(text: str) -> List[str]:
+    """小写字母数字词；中文按单字切分"""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+class FixtureProvider(SearchProvider):
+    """
+    离线语料库 + BM25
+
+    语料目录下（递归）：
+    - *.json: 单个文档 {"title", "url", "content"}、文档列表，或 {"documents": [...]}
+    - *.md: 一个文档，标题取第一个 "# " 标题（否则取文件名），URL 为 fixture://<相对路径>
+    """
+
+    name = "fixture"
+    cacheable = False
+
+    def __init__(
+        self,
+        corpus_dir: str,
+        latency_ms: float = 0.0,
+        latency_jitter_ms: float = 0.0,
+        k1: float = 1.5,
+        b: float = 0.75,
+    ):
+        """
+        Args:
+            corpus_dir: 语料目录
+            latency_ms: 每次查询注入的固定延迟
+            latency_jitter_ms: 额外的随机延迟上限（均匀分布）
+            k1, b: BM25 参数
+
+        Raises:
+            SearchProviderError: 语料目录不存在
+        """
+        super().__init__()
+        self.corpus_dir = Path(corpus_dir)
+        if not self.corpus_dir.is_dir():
+            raise SearchProviderError(f"Search fixture corpus not found: {self.corpus_dir}")
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.k1 = k1
+        self.b = b
+        self.documents: List[Dict] = []
+        self._term_freqs: List[Counter] = []
+        self._lengths: List[int] = []
+        self._doc_freqs: Counter = Counter()
+        self._load()
+
+    def _load(self):
+        for path in sorted(self.corpus_dir.rglob("*")):
+            if path.suffix.lower() == ".json":
+                self._load_json(path)
+            elif path.suffix.lower() == ".md":
+                self._load_markdown(path)
+        for document in self.documents:
+            tokens = _tokenize(f"{document['title']} {document['content']}")
+            term_freqs = Counter(tokens)
+            self._term_freqs.append(term_freqs)
+            self._lengths.append(len(tokens))
+            self._doc_freqs.update(term_freqs.keys())
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+        logger.info(f"Search fixture corpus loaded: {len(self.documents)} documents from {self.corpus_dir}")
+
+    def _fixture_url(self, path: Path) -> str:
+        return f"fixture://{path.relative_to(self.corpus_dir).as_posix()}"
+
+    def _load_json(self, path: Path):
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping search fixture {path}: {e}")
+            return
+        if isinstance(data, dict):
+            data = data.get("documents", [data])
+        for i, item in enumerate(data if isinstance(data, list) else []):
+            if not isinstance(item, dict) or not item.get("content"):
+                continue
+            self.documents.append({
+                "title": item.get("title") or path.stem,
+                "url": item.get("url") or f"{self._fixture_url(path)}/{i}",
+                "content": item["content"],
+            })
+
+    def _load_markdown(self, path: Path):
+        try:
+            text = path.read_text(encoding="utf-8")
+        except OSError as e:
+            logger.warning(f"Skipping search fixture {path}: {e}")
+            return
+        match = re.search(r"(?m)^#\s+(.+)$", text)
+        self.documents.append({
+            "title": match.group(1).strip() if match else path.stem,
+            "url": self._fixture_url(path),
+            "content": text.strip(),
+        })
+
+    def _inject_latency(self, timeout_seconds: float):
+        delay = (self.latency_ms + random.uniform(0, self.latency_jitter_ms)) / 1000
+        if delay > timeout_seconds:
+            time.sleep(timeout_seconds)
+            raise TimeoutError(timeout_seconds)
+        if delay > 0:
+            time.sleep(delay)
+
+    def rank(self, query: str) -> List[tuple]:
+        """[(BM25 得分, 文档序号)]，按得分降序，只含得分 > 0 的文档"""
+        terms = set(_tokenize(query))
+        total = len(self.documents)
+        scored = []
+        for index, term_freqs in enumerate(self._term_freqs):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * self._lengths[index] / self._avg_length) if self._avg_length else self.k1
+            for term in terms:
+                freq = term_freqs.get(term)
+                if not freq:
+                    continue
+                doc_freq = self._doc_freqs[term]
+                idf = math.log(1 + (total - doc_freq + 0.5) / (doc_freq + 0.5))
+                score += idf * freq * (self.k1 + 1) / (freq + norm)
+            if score > 0:
+                scored.append((score, index))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return scored
+
+    def search(self, query, search_depth="advanced", max_results=5, days=365, timeout_seconds=60.0) -> Dict:
+        self._inject_latency(timeout_seconds)
+        ranked = self.rank(query)[:max_results]
+        top = ranked[0][0] if ranked else 1.0
+        snippet_chars = 800 if search_depth == "advanced" else 300
+        results = []
+        for score, index in ranked:
+            document = self.documents[index]
+            results.append({
+                "title": document["title"],
+                "url": document["url"],
+                "content": document["content"][:snippet_chars],
+                "score": round(score / top, 4),
+            })
+        return {"answer": None, "results": results}
+
+
+def create_search_provider(research_config=None, pool_size: int = 4) -> SearchProvider:
+    """
+    按 research.provider 创建提供方
+
+    Args:
+        research_config: ResearchConfig 实例（None 时为 Tavily）
+        pool_size: Tavily 连接池大小
+
+    Raises:
+        ValueError: 未知的提供方
+        SearchProviderError: fixture 语料目录未配置或不存在
+    """
+    name = research_config.provider if research_config is not None else "tavily"
+    if name == "tavily":
+        return TavilyProvider(pool_size=pool_size)
+    if name == "fixture":
+        fixture = research_config.fixture
+        if not fixture.corpus_dir:
+            raise SearchProviderError("research.fixture.corpus_dir is required for the fixture search provider")
+        return FixtureProvider(
+            corpus_dir=fixture.corpus_dir,
+            latency_ms=fixture.latency_ms,
+            latency_jitter_ms=fixture.latency_jitter_ms,
+        )
+    raise ValueError(f"Unknown search provider: {name!r} (expected 'tavily' or 'fixture')")
+
+
+def benchmark_providers(
+    providers: List[SearchProvider],
+    queries: List[str],
+    max_results: int = 5,
+    search_depth: str = "basic",
+    expected: Optional[Dict[str, List[str]]] = None,
+) -> Dict[str, Dict]:
+    """
+    在同一组查询上依次调用各提供方，对比延迟和召回率
+
+    召回率 = 命中的相关 URL / 相关 URL 总数（按查询平均）。expected 给出每条查询的相关 URL；
+    未给出的查询以所有提供方返回结果的并集作为相关集合（pooled recall）。
+
+    Returns:
+        {provider_name: {"queries", "errors", "avg_ms", "p50_ms", "p95_ms", "recall"}}
+    """
+    found: Dict[str, Dict[str, set]] = {provider.name: {} for provider in providers}
+    latencies: Dict[str, List[float]] = {provider.name: [] for provider in providers}
+    errors: Dict[str, int] = {provider.name: 0 for provider in providers}
+    for query in queries:
+        for provider in providers:
+            started = time.monotonic()
+            try:
+                response = provider.search(query, search_depth=search_depth, max_results=max_results)
+            except Exception as e:  # pylint: disable=broad-except
+                logger.warning(f"Benchmark query failed ({provider.name}): {e}")
+                errors[provider.name] += 1
+                found[provider.name][query] = set()
+                continue
+            latencies[provider.name].append((time.monotonic() - started) * 1000)
+            found[provider.name][query] = {
+                normalize_url(result.get("url", "")) for result in response.get("results", []) if result.get("url")
+            }
+
+    report = {}
+    for provider in providers:
+        recalls = []
+        for query in queries:
+            if expected and query in expected:
+                relevant = {normalize_url(url) for url in expected[query]}
+            else:
+                relevant = set().union(*(found[p.name][query] for p in providers))
+            if relevant:
+                recalls.append(len(found[provider.name][query] & relevant) / len(relevant))
+        entry = {"queries": len(queries), "errors": errors[provider.name]}
+        entry.update(latency_summary(latencies[provider.name]))
+        entry["recall"] = round(sum(recalls) / len(recalls), 3) if recalls else 0.0
+        report[provider.name] = entry
+    return report
+
+
+# 全局提供方（未配置时在第一次使用时创建 Tavily）
+_provider_instance: Optional[SearchProvider] = None
+_provider_lock = threading.Lock()
+
+
+def configure_search_provider(research_config=None, pool_size: int = 4) -> SearchProvider:
+    """
+    根据 research 配置创建全局提供方（替换并关闭之前的提供方）
+
+    Args:
+        research_config: ResearchConfig 实例
+        pool_size: Tavily 连接池大小（research.batch.max_concurrency）
+    """
+    global _provider_instance
+    provider = create_search_provider(research_config, pool_size=pool_size)
+    with _provider_lock:
+        previous, _provider_instance = _provider_instance, provider
+    if previous is not None:
+        previous.close()
+    logger.info(f"Search provider: {provider.name}")
+    return provider
+
+
+def get_search_provider() -> SearchProvider:
+    """获取全局提供方"""
+    global _provider_instance
+    with _provider_lock:
+        if _provider_instance is None:
+            _provider_instance = TavilyProvider()
+        return _provider_instance
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare search provider latency and recall")
+    parser.add_argument("queries", help="Text file with one query per line")
+    parser.add_argument("--providers", default="fixture,tavily", help="Comma-separated providers")
+    parser.add_argument("--corpus", help="Fixture corpus directory")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Injected fixture latency")
+    parser.add_argument("--expected", help="JSON file {query: [relevant urls]}")
+    parser.add_argument("--max-results", type=int, default=5)
+    args = parser.parse_args()
+
+    selected = []
+    for provider_name in args.providers.split(","):
+        if provider_name == "fixture":
+            selected.append(FixtureProvider(args.corpus or "", latency_ms=args.latency_ms))
+        elif provider_name == "tavily":
+            selected.append(TavilyProvider())
+        else:
+            parser.error(f"unknown provider {provider_name!r}")
+    query_list = [line.strip() for line in Path(args.queries).read_text(encoding="utf-8").splitlines() if line.strip()]
+    relevant_urls = json.loads(Path(args.expected).read_text(encoding="utf-8")) if args.expected else None
+    print(json.dumps(
+        benchmark_providers(selected, query_list, max_results=args.max_results, expected=relevant_urls),
+        indent=2,
+    ))
@@ -0,0 +1,391 @@
+"""
+Shell Session - 命令执行与持久 shell 会话
+
+run_command 工具的执行后端（均为 asyncio 实现，不阻塞事件循环）：
+- run_oneshot: 每次调用启动一个独立 shell 进程
+- ShellSession: 每个执行器一个长期存活的 bash 进程，cd / export 等状态在调用之间保留
+- 输出边读边写入有界缓冲（OutputBuffer，保留开头和结尾，中间部分只计数），内存占用与输出长度无关
+- 超时或调用被取消时杀死整个进程组；被杀死的会话在下次调用时重新启动（状态重置）
+- 会话空闲超过 session_idle_timeout_seconds 后自动结束，下次调用时重新启动（状态重置）
+
+当前执行器的会话通过 contextvars 绑定（bind_shell_session），未绑定时 run_command 使用一次性进程。
+"""
+import asyncio
+import contextvars
+import os
+import shutil
+import signal
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Set, Union
+
+from src.utils.logger import get_logger
+
+logger = get_logger()
+
+_READ_CHUNK_BYTES = 65536
+
+
+@dataclass
+class ShellSettings:
+    """run_command 执行参数（configure_shell）"""
+    default_timeout_seconds: float = 30.0
+    max_timeout_seconds: float = 300.0
+    head_bytes: int = 6000
+    tail_bytes: int = 4000
+    session_enabled: bool = True
+    session_idle_timeout_seconds: float = 300.0
+
+
+_settings = ShellSettings()
+
+
+def configure_shell(config=None):
+    """
+    配置命令执行
+
+    Args:
+        config: ShellConfig 实例
+    """
+    global _settings
+    if config is None:
+        _settings = ShellSettings()
+        return
+    _settings = ShellSettings(
+        default_timeout_seconds=config.default_timeout_seconds,
+        max_timeout_seconds=config.max_timeout_seconds,
+        head_bytes=config.output_head_bytes,
+        tail_bytes=config.output_tail_bytes,
+        session_enabled=config.session_enabled,
+        session_idle_timeout_seconds=config.session_idle_timeout_seconds,
+    )
+
+
+def get_shell_settings() -> ShellSettings:
+    return _settings
+
+
+class OutputBuffer:
+    """有界输出缓冲：保留前 head_bytes 和最后 tail_bytes 字节，中间只计数"""
+
+    def __init__(self, head_bytes: int, tail_bytes: int):
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self._head = bytearray()
+        self._tail = bytearray()
+        self.total_bytes = 0
+
+    def write(self, data: bytes):
+        self.total_bytes += len(data)
+        room = self.head_bytes - len(self._head)
+        if room > 0:
+            self._head += data[:room]
+            data = data[room:]
+        if data and self.tail_bytes:
+            self._tail += data
+            if len(self._tail) > self.tail_bytes:
+                del self._tail[:len(self._tail) - self.tail_bytes]
+
+    @property
+    def omitted_bytes(self) -> int:
+        return self.total_bytes - len(self._head) - len(self._tail)
+
+    def text(self) -> str:
+        if self.omitted_bytes <= 0:
+            return bytes(self._head + self._tail).decode("utf-8", errors="replace")
+        head = bytes(self._head).decode("utf-8", errors="replace")
+        tail = bytes(self._tail).decode("utf-8", errors="replace")
+        return f"{head}\n... [{self.omitted_bytes} bytes of output omitted] ...\n{tail}"
+
+
+@dataclass
+class CommandResult:
+    """一次命令执行的结果"""
+    stdout: str
+    stderr: str
+    exit_code: Optional[int]
+    timed_out: bool
+    duration_seconds: float
+    note: str = ""
+
+
+def _new_buffer() -> OutputBuffer:
+    return OutputBuffer(_settings.head_bytes, _settings.tail_bytes)
+
+
+def _kill_process_group(process: asyncio.subprocess.Process):
+    if process.returncode is not None:
+        return
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _consume_result(future: asyncio.Future):
+    """标记结果已读取（被取消的读取任务不再产生 "exception was never retrieved" 警告）"""
+    if not future.cancelled():
+        future.exception()
+
+
+async def _pump(stream: asyncio.StreamReader, buffer: OutputBuffer):
+    while True:
+        chunk = await stream.read(_READ_CHUNK_BYTES)
+        if not chunk:
+            return
+        buffer.write(chunk)
+
+
+async def run_oneshot(command: str, timeout_seconds: float, cwd: Union[str, Path]) -> CommandResult:
+    """在独立的 shell 进程中执行命令（超时或取消时杀死进程组）"""
+    started = time.monotonic()
+    process = await asyncio.create_subprocess_shell(
+        command,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        cwd=str(cwd),
+        start_new_session=True,
+    )
+    stdout, stderr = _new_buffer(), _new_buffer()
+    finished = asyncio.gather(_pump(process.stdout, stdout), _pump(process.stderr, stderr), process.wait())
+    finished.add_done_callback(_consume_result)
+    timed_out = False
+    try:
+        await asyncio.wait_for(asyncio.shield(finished), timeout=timeout_seconds)
+    except asyncio.TimeoutError:
+        timed_out = True
+        _kill_process_group(process)
+        # 进程组被杀死后管道随即关闭，读取已缓冲的剩余输出
+        try:
+            await asyncio.wait_for(finished, timeout=5)
+        except asyncio.TimeoutError:
+            pass
+    except asyncio.CancelledError:
+        _kill_process_group(process)
+        finished.cancel()
+        raise
+    return CommandResult(
+        stdout=stdout.text(),
+        stderr=stderr.text(),
+        exit_code=process.returncode,
+        timed_out=timed_out,
+        duration_seconds=time.monotonic() - started,
+    )
+
+
+class ShellSession:
+    """
+    长期存活的 bash 进程
+
+    每条命令在会话中以 `{ 命令 } < /dev/null 2>&1` 执行，随后打印唯一结束标记和退出码；
+    读取到标记即视为命令结束。同一会话的命令串行执行。
+    """
+
+    def __init__(self, cwd: Union[str, Path], shell: Optional[str] = None):
+        self.cwd = str(cwd)
+        self.shell = shell or shutil.which("bash")
+        self.commands = 0
+        self.restarts = 0
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._killed = False
+        self._idle_closed = False
+        self._idle_handle: Optional[asyncio.TimerHandle] = None
+        self._last_used = 0.0
+
+    @property
+    def available(self) -> bool:
+        """当前事件循环中可用（有 bash，且会话未绑定到其他事件循环）"""
+        if self.shell is None:
+            return False
+        return self._loop is None or self._loop is asyncio.get_running_loop()
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.returncode is None
+
+    async def _start(self):
+        self._process = await asyncio.create_subprocess_exec(
+            self.shell, "--noprofile", "--norc",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            cwd=self.cwd,
+            start_new_session=True,
+        )
+        _live_sessions.add(self)
+
+    async def run(self, command: str, timeout_seconds: float) -> CommandResult:
+        """在会话中执行命令（stderr 合并到 stdout）"""
+        if self._lock is None:
+            self._loop = asyncio.get_running_loop()
+            self._lock = asyncio.Lock()
+        self._cancel_idle_close()
+        async with self._lock:
+            note = ""
+            if not self.alive:
+                if self._idle_closed:
+                    note = "[shell session was closed after being idle: working directory and environment were reset]"
+                elif self._process is not None or self._killed:
+                    self.restarts += 1
+                    note = "[shell session restarted: working directory and environment were reset]"
+                self._killed = False
+                self._idle_closed = False
+                await self._start()
+            self.commands += 1
+            try:
+                return await self._run_locked(command, timeout_seconds, note)
+            finally:
+                self._last_used = time.monotonic()
+                self._schedule_idle_close()
+
+    def _schedule_idle_close(self):
+        timeout = _settings.session_idle_timeout_seconds
+        if timeout > 0 and self.alive:
+            self._idle_handle = self._loop.call_later(timeout, self._on_idle)
+
+    def _cancel_idle_close(self):
+        if self._idle_handle is not None:
+            self._idle_handle.cancel()
+            self._idle_handle = None
+
+    def _on_idle(self):
+        self._idle_handle = None
+        task = self._loop.create_task(self._close_if_idle())
+        _idle_close_tasks.add(task)
+        task.add_done_callback(_idle_close_tasks.discard)
+
+    async def _close_if_idle(self):
+        async with self._lock:
+            idle_seconds = time.monotonic() - self._last_used
+            if not self.alive or idle_seconds < _settings.session_idle_timeout_seconds:
+                return
+            logger.debug(f"Closing shell session in {self.cwd} after {idle_seconds:.0f}s idle")
+            await self.close()
+            self._idle_closed = True
+
+    async def _run_locked(self, command: str, timeout_seconds: float, note: str) -> CommandResult:
+        started = time.monotonic()
+        marker = f"__run_command_done_{uuid.uuid4().hex}__"
+        script = f"{{ {command}\n}} < /dev/null 2>&1\nprintf '\\n{marker} %s\\n' \"$?\"\n"
+        output = _new_buffer()
+        try:
+            self._process.stdin.write(script.encode("utf-8"))
+            await self._process.stdin.drain()
+            exit_code = await asyncio.wait_for(self._read_until(marker.encode(), output), timeout=timeout_seconds)
+        except asyncio.TimeoutError:
+            await self.kill()
+            return CommandResult(output.text(), "", None, True, time.monotonic() - started, note)
+        except asyncio.CancelledError:
+            await self.kill()
+            raise
+        except (BrokenPipeError, ConnectionResetError) as e:
+            await self.kill()
+            return CommandResult(
+                output.text(), "", None, False, time.monotonic() - started,
+                f"[shell session exited: {e}]",
+            )
+        if exit_code is None:
+            note = (note + "\n" if note else "") + "[shell session exited; the next command starts a new session]"
+        return CommandResult(output.text(), "", exit_code, False, time.monotonic() - started, note)
+
+    async def _read_until(self, marker: bytes, output: OutputBuffer) -> Optional[int]:
+        """读取输出直到结束标记，返回退出码（会话退出时为 None）"""
+        # 保留窗口：跨块的标记也能被识别
+        keep = len(marker) + 32
+        pending = b""
+        while True:
+            chunk = await self._process.stdout.read(_READ_CHUNK_BYTES)
+            if not chunk:
+                output.write(pending)
+                await self._process.wait()
+                return None
+            pending += chunk
+            index = pending.find(marker)
+            if index >= 0:
+                line_end = pending.find(b"\n", index)
+                if line_end < 0:
+                    continue
+                # 去掉标记前由 printf 输出的换行
+                body = pending[:index]
+                output.write(body[:-1] if body.endswith(b"\n") else body)
+                code = pending[index + len(marker):line_end].strip()
+                return int(code) if code.lstrip(b"-").isdigit() else None
+            if len(pending) > keep:
+                output.write(pending[:-keep])
+                pending = pending[-keep:]
+
+    async def kill(self):
+        """杀死会话（下次调用时重新启动）"""
+        if self._process is not None:
+            _kill_process_group(self._process)
+            try:
+                await asyncio.wait_for(self._process.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                pass
+            self._killed = True
+        _live_sessions.discard(self)
+
+    async def close(self):
+        """结束会话"""
+        self._cancel_idle_close()
+        if self.alive:
+            try:
+                self._process.stdin.write(b"exit\n")
+                await self._process.stdin.drain()
+                await asyncio.wait_for(self._process.wait(), timeout=2)
+            except (asyncio.TimeoutError, BrokenPipeError, ConnectionResetError):
+                pass
+        await self.kill()
+        self._process = None
+        self._killed = False
+
+    def get_stats(self) -> Dict:
+        return {"commands": self.commands, "restarts": self.restarts, "alive": self.alive}
+
+
+# 仍在运行的会话（进程退出前由 shutdown_shell_sessions 清理）
+_live_sessions: Set[ShellSession] = set()
+# 进行中的空闲关闭任务（保持引用，避免被回收）
+_idle_close_tasks: Set[asyncio.Task] = set()
+
+_current_session: contextvars.ContextVar[Optional[ShellSession]] = contextvars.ContextVar(
+    "shell_session", default=None
+)
+
+
+def new_shell_session(cwd: Union[str, Path]) -> Optional[ShellSession]:
+    """创建会话（配置关闭或没有 bash 时为 None）；进程在第一次使用时才启动"""
+    if not _settings.session_enabled:
+        return None
+    session = ShellSession(cwd)
+    return session if session.shell else None
+
+
+def get_shell_session() -> Optional[ShellSession]:
+    """获取当前绑定的 shell 会话（未绑定时为 None）"""
+    return _current_session.get()
+
+
+def bind_shell_session(session: Optional[ShellSession]) -> contextvars.Token:
+    return _current_session.set(session)
+
+
+def reset_shell_session(token: contextvars.Token):
+    _current_session.reset(token)
+
+
+async def shutdown_shell_sessions():
+    """结束所有仍在运行的会话"""
+    for session in list(_live_sessions):
+        try:
+            await session.close()
+        except Exception as e:  # pylint: disable=broad-except
+            logger.debug(f"Shell session close failed: {e}")
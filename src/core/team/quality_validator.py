@@ -11,6 +11,8 @@ from pydantic import BaseModel, Field
 import logging
 
 from src.core.agents.sdk_client import run_claude_prompt
+from src.core.llm.call_context import CallClass
+from src.core.llm.prompt_layout import PromptLayout, Stability
 from src.utils.json_utils import extract_json
 
 logger = logging.getLogger(__name__)
@@ -78,21 +80,16 @@ class SemanticQualityValidator:
         if len(content) > 3000:
             content_preview += "\n\n... [content truncated for evaluation]"
 
-        prompt = f"""You are a quality auditor. Evaluate the following {file_type} content against these criteria:
+        # Auditor instructions first (cacheable), criteria next, content under evaluation last
+        instructions = """You are a quality auditor. Evaluate the content given below against the criteria given below.
 
-CRITERIA:
-{criteria_list}
-
-CONTENT:
-{content_preview}
-
-Evaluate the content and respond ONLY with a valid JSON object (no explanatory text):
-{{
+Respond ONLY with a valid JSON object (no explanatory text):
+{
     "overall_score": <number 0-100>,
-    "criteria_scores": {{
+    "criteria_scores": {
         "<criterion_1>": <score 0-100>,
         "<criterion_2>": <score 0-100>
-    }},
+    },
     "issues": [
         "<specific issue 1>",
         "<specific issue 2>"
@@ -101,7 +98,7 @@ Evaluate the content and respond ONLY with a valid JSON object (no explanatory t
         "<actionable suggestion 1>",
         "<actionable suggestion 2>"
     ]
-}}
+}
 
 Scoring guide:
 - 90-100: Excellent, exceeds all criteria
@@ -111,6 +108,12 @@ Scoring guide:
 - 0-29: Unacceptable, fails to meet criteria
 
 Be objective and specific in your evaluation."""
+        prompt = (
+            PromptLayout(CallClass.VALIDATOR)
+            .add("auditor_instructions", instructions, Stability.STATIC)
+            .add("criteria", f"CRITERIA:\n{criteria_list}", Stability.SESSION)
+            .add("content", f"CONTENT ({file_type}):\n{content_preview}", Stability.VOLATILE)
+        )
 
         try:
             logger.info("🔍 Running semantic quality validation...")
@@ -120,7 +123,8 @@ Be objective and specific in your evaluation."""
                 self.work_dir,
                 model=self.model,
                 timeout=self.timeout_seconds,
-                permission_mode="bypassPermissions"
+                permission_mode="bypassPermissions",
+                call_class=CallClass.VALIDATOR
             )
 
             # Extract JSON from response
@@ -6,12 +6,14 @@ Executes a single role's mission with validation loop.
 Enhanced for Tier-3 with reflection/review loops.
 """
 
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Union
 from pathlib import Path
 from src.core.team.role_registry import Role, ValidationRule, ReviewConfig
 from src.core.agents.executor import ExecutorAgent
 from src.core.agents.planner import PlannerAgent
 from src.core.agents.sdk_client import run_claude_prompt
+from src.core.llm.call_context import CallClass
+from src.core.llm.prompt_layout import PromptLayout, Stability
 from src.core.team.quality_validator import SemanticQualityValidator
 from src.utils.json_utils import extract_json
 import logging
@@ -148,7 +150,11 @@ class RoleExecutor:
                 result = await self.executor.execute_task(task)
             except Exception as e:
                 logger.error(f"Executor failed: {e}")
-                task = f"Previous attempt failed with error: {e}\n\nPlease try again and fix the issue.\n\n{task}"
+                task = PromptLayout.of(task, CallClass.EXECUTOR).add(
+                    "previous_error",
+                    f"Previous attempt failed with error: {e}\n\nPlease try again and fix the issue.",
+                    Stability.VOLATILE,
+                )
                 continue
 
             # Validate outputs
@@ -392,8 +398,13 @@ class RoleExecutor:
             "validation_errors": validation["errors"],
         }
     
-    def _build_task(self, mission, context: Dict) -> str:
-        """Build task description for Executor using Role Registry's full prompt generator"""
+    def _build_task(self, mission, context: Dict) -> PromptLayout:
+        """
+        Build task description for Executor using Role Registry's full prompt generator
+
+        Role prompt, skill prompt, tools and execution instructions are the same on
+        every iteration and come first (cacheable); the previous roles' context follows.
+        """
 
         # Get the comprehensive prompt from Role Registry (includes validation rules, error handling, etc.)
         # Fall back to manual building if registry not available
@@ -442,9 +453,6 @@ You should primarily use the following tools for this task:
 
         # Combine full prompt with execution-specific instructions
         execution_instructions = f"""
-## Context from Previous Roles
-{context_str}
-
 ## Execution Environment
 Working Directory: {self.work_dir}
 IMPORTANT: Use RELATIVE paths for all file operations.
@@ -486,11 +494,15 @@ Required files (use these exact filenames):
    - ❌ Putting full content in Final Answer instead of files
    - ❌ Using wrong section titles (follow Validation Requirements exactly)
    - ❌ Trying to do everything in one step (break into multiple ReAct steps)
-
-{skill_section}
 """
 
-        return base_prompt + execution_instructions
+        return (
+            PromptLayout(CallClass.EXECUTOR)
+            .add("role_prompt", base_prompt, Stability.SESSION)
+            .add("execution_instructions", execution_instructions, Stability.SESSION)
+            .add("skill_prompt", skill_section, Stability.SESSION)
+            .add("previous_roles_context", f"## Context from Previous Roles\n{context_str}", Stability.TASK)
+        )
 
     def _build_planner_task(self, next_task: str, context_str: str) -> str:
         """Build a constrained subtask prompt for planner-driven execution."""
@@ -557,7 +569,8 @@ Required files (use these exact filenames if this subtask produces deliverables)
 Fix the above issues and ensure all validation rules pass.
 If validation errors are returned, your output files on disk do NOT meet requirements.
 Do NOT argue or claim completion. Use read_file to inspect the files and fix the gaps.
-Do NOT regenerate everything, just fix the specific issues.
+Do NOT regenerate everything, just fix the specific issues: use edit_file (search/replace)
+or apply_patch (unified diff) to add or change the affected sections in place.
 IMPORTANT: Use RELATIVE paths only (e.g., "filename.md", not "{self.work_dir}/filename.md").
 The working directory is already set to: {self.work_dir}
 {snapshots_block}
@@ -771,23 +784,23 @@ The working directory is already set to: {self.work_dir}
 
             criteria_list = "\n".join(f"- {c}" for c in criteria)
 
-            prompt = f"""You are a strict content auditor.
-Check whether the content meets the criteria below and score the overall compliance.
-
-CRITERIA:
-{criteria_list}
-
-CONTENT:
-{content_preview}
+            # Auditor instructions and criteria first (cacheable), content under audit last
+            instructions = """You are a strict content auditor.
+Check whether the content given below meets the criteria and score the overall compliance.
 
 Return ONLY valid JSON (no extra text):
-{{
+{
   "score": <number 0-1>,
   "passed": <true/false>,
   "missing": ["<missing element 1>", "<missing element 2>"],
   "reason": "<short reason>"
-}}
-"""
+}"""
+            prompt = (
+                PromptLayout(CallClass.VALIDATOR)
+                .add("auditor_instructions", instructions, Stability.STATIC)
+                .add("criteria", f"CRITERIA:\n{criteria_list}", Stability.SESSION)
+                .add("content", f"CONTENT:\n{content_preview}", Stability.VOLATILE)
+            )
 
             try:
                 response, _ = await run_claude_prompt(
@@ -795,7 +808,8 @@ Return ONLY valid JSON (no extra text):
                     str(self.work_dir),
                     model=model,
                     timeout=60,
-                    permission_mode=permission_mode
+                    permission_mode=permission_mode,
+                    call_class=CallClass.VALIDATOR
                 )
                 result = extract_json(response)
 
@@ -1067,7 +1081,8 @@ Return ONLY valid JSON (no extra text):
                     model=self.executor.model,
                     permission_mode=self.executor.permission_mode,
                     timeout=120,  # Shorter timeout for reviews
-                    max_retries=1
+                    max_retries=1,
+                    call_class=CallClass.CRITIC
                 )
 
                 # Parse review for issues
@@ -1109,7 +1124,7 @@ Return ONLY valid JSON (no extra text):
         self,
         outputs: Dict[str, str],
         previous_feedback: List[str] = None
-    ) -> str:
+    ) -> Union[str, PromptLayout]:
         """
         Build critic prompt for reflection loop.
 
@@ -1118,7 +1133,7 @@ Return ONLY valid JSON (no extra text):
             previous_feedback: Previous iteration feedback (if any)
 
         Returns:
-            Critic prompt string
+            Critic prompt (a PromptLayout unless a custom template is configured)
         """
         reflection_config = self.role.reflection
         role_name = reflection_config.reviewer_role or "Self-Reviewer"
@@ -1150,15 +1165,12 @@ Return ONLY valid JSON (no extra text):
                 previous_feedback=feedback_section
             )
 
-        # Default critic prompt
-        return f"""Act as a {role_name} and critically review the following output.
+        # Default critic prompt: reviewer instructions first (cacheable), outputs under review last
+        instructions = f"""Act as a {role_name} and critically review the output files given below.
 
 # Your Task
 Find flaws, issues, or areas for improvement in the provided work.{aspects_section}
 
-# Output Files to Review
-{"".join(output_summary)}
-{feedback_section}
 # Instructions
 1. Identify specific issues (be precise and actionable)
 2. Prioritize critical issues (security, logic errors, missing requirements)
@@ -1178,6 +1190,12 @@ Find flaws, issues, or areas for improvement in the provided work.{aspects_secti
 If NO issues found, return: {{"issues_found": []}}
 
 CRITICAL: Output ONLY the JSON object. No explanatory text."""
+        return (
+            PromptLayout(CallClass.CRITIC)
+            .add("critic_instructions", instructions, Stability.SESSION)
+            .add("outputs", f"# Output Files to Review\n{''.join(output_summary)}", Stability.VOLATILE)
+            .add("previous_feedback", feedback_section, Stability.VOLATILE)
+        )
 
     def _parse_review_for_issues(self, review_result: str) -> List[str]:
         """
@@ -1238,7 +1256,7 @@ Your previous work has been reviewed and needs refinement. Fix the following iss
 1. Review the issues listed above
 2. Fix each issue in the appropriate file
 3. Ensure all fixes maintain quality and coherence
-4. Use the write_file tool to save updated files
+4. Use edit_file or apply_patch for targeted fixes (write_file only to rewrite a whole file)
 
 Files to update: {', '.join(outputs.keys())}
 
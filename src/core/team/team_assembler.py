@@ -12,6 +12,7 @@ from src.core.team.dependency_resolver import (
     MissingRoleError
 )
 from src.core.agents.sdk_client import run_claude_prompt
+from src.core.llm.call_context import CallClass
 from src.utils.json_utils import extract_json
 import logging
 
@@ -70,7 +71,8 @@ class TeamAssembler:
                 work_dir,
                 model=model,
                 timeout=timeout,
-                permission_mode=permission_mode
+                permission_mode=permission_mode,
+                call_class=CallClass.ASSEMBLER
             )
         except Exception as e:
             logger.error(f"Failed to call LLM for team assembly: {e}")
@@ -276,7 +278,8 @@ Example Output:
                 work_dir,
                 model=model,
                 timeout=timeout,
-                permission_mode=permission_mode
+                permission_mode=permission_mode,
+                call_class=CallClass.ASSEMBLER
             )
             
             data = extract_json(response)
@@ -8,6 +8,7 @@ from typing import List, Dict, Any
 from src.core.team.role_registry import Role
 from src.core.team.role_executor import RoleExecutor
 from src.core.agents.executor import ExecutorAgent
+from src.core.llm.call_context import llm_call_context
 import logging
 
 logger = logging.getLogger(__name__)
@@ -78,8 +79,9 @@ class TeamOrchestrator:
                 role_registry=self.role_registry
             )
             
-            # Execute role mission (small loop)
-            result = await role_executor.execute(context=self.context)
+            # Execute role mission (small loop); LLM costs are attributed to this role
+            with llm_call_context(role=role.name):
+                result = await role_executor.execute(context=self.context)
             
             # Save result
             results[role.name] = result
@@ -0,0 +1,158 @@
+"""
+Tool Memo - 工具结果备忘
+
+同一任务（或会话）内重复的可缓存工具调用直接返回先前的结果，并附带简短说明：
+- 工具通过 @tool(cacheable=True) 声明可缓存（只读 / 纯函数工具）
+- 键为 (工具名, 规范化参数, 当前工作区)
+- 带 path_arg 的工具记录路径的 (mtime, size) 指纹，文件变化后不再命中
+- 写入类工具（@tool(invalidates=...)）执行后使相关路径的条目失效；"*" 使所有路径条目失效
+- 失败结果不缓存：工具以 ToolFailure 返回失败（注册表的超时 / 异常同样如此），与文本内容无关
+
+当前备忘通过 contextvars 绑定（ToolRegistry.memo_scope），未绑定时不做备忘。
+"""
+import contextvars
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from src.core.workspace import get_workspace, resolve_path
+
+MEMO_NOTE = (
+    "[Served from memo: this exact {tool} call was already made in this task{unchanged}; "
+    "the result is repeated below. Use it instead of calling again.]\n"
+)
+
+_current_memo: contextvars.ContextVar[Optional["ToolMemo"]] = contextvars.ContextVar(
+    "tool_memo", default=None
+)
+
+
+class ToolFailure(str):
+    """
+    表示调用失败的工具结果（内容即返回给模型的错误信息）
+
+    失败可能是暂时的（网络错误、超时），备忘不保存此类结果，重复调用会重新执行。
+    """
+
+
+def get_tool_memo() -> Optional["ToolMemo"]:
+    """获取当前绑定的工具备忘（未绑定时为 None）"""
+    return _current_memo.get()
+
+
+def bind_tool_memo(memo: Optional["ToolMemo"]) -> contextvars.Token:
+    return _current_memo.set(memo)
+
+
+def reset_tool_memo(token: contextvars.Token):
+    _current_memo.reset(token)
+
+
+def _fingerprint(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+@dataclass
+class _MemoEntry:
+    result: Any
+    path: Optional[Path] = None
+    fingerprint: Optional[Tuple[int, int]] = None
+
+
+@dataclass
+class MemoStats:
+    """备忘统计"""
+    hits: int = 0
+    misses: int = 0
+    stale: int = 0
+    invalidated: int = 0
+    hits_by_tool: Dict[str, int] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "invalidated": self.invalidated,
+            "hits_by_tool": dict(self.hits_by_tool),
+        }
+
+
+class ToolMemo:
+    """单个任务 / 会话的工具结果备忘"""
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, str, str], _MemoEntry] = {}
+        self.stats = MemoStats()
+
+    @staticmethod
+    def _key(tool_name: str, arguments: Dict[str, Any]) -> Tuple[str, str, str]:
+        canonical = json.dumps(arguments, sort_keys=True, ensure_ascii=False, default=str)
+        return tool_name, canonical, str(get_workspace())
+
+    @staticmethod
+    def _path(path_arg: Optional[str], arguments: Dict[str, Any]) -> Optional[Path]:
+        if not path_arg:
+            return None
+        value = arguments.get(path_arg, ".")
+        try:
+            return resolve_path(str(value)).resolve()
+        except (OSError, ValueError):
+            return None
+
+    def lookup(self, tool_name: str, arguments: Dict[str, Any], path_arg: Optional[str] = None) -> Optional[str]:
+        """命中时返回带说明的结果，否则返回 None"""
+        key = self._key(tool_name, arguments)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        if entry.path is not None and _fingerprint(entry.path) != entry.fingerprint:
+            del self._entries[key]
+            self.stats.stale += 1
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        self.stats.hits_by_tool[tool_name] = self.stats.hits_by_tool.get(tool_name, 0) + 1
+        unchanged = " and the file has not changed since" if entry.path is not None else ""
+        return MEMO_NOTE.format(tool=tool_name, unchanged=unchanged) + str(entry.result)
+
+    def store(self, tool_name: str, arguments: Dict[str, Any], result: Any, path_arg: Optional[str] = None):
+        if isinstance(result, ToolFailure):
+            return
+        path = self._path(path_arg, arguments)
+        self._entries[self._key(tool_name, arguments)] = _MemoEntry(
+            result=result,
+            path=path,
+            fingerprint=_fingerprint(path) if path is not None else None,
+        )
+
+    def invalidate(self, invalidates: str, arguments: Dict[str, Any]):
+        """
+        写入类工具执行后调用
+
+        Args:
+            invalidates: 被写入路径的参数名；"*" 表示可能写入任意文件
+        """
+        if invalidates == "*":
+            doomed = [key for key, entry in self._entries.items() if entry.path is not None]
+        else:
+            written = self._path(invalidates, arguments)
+            if written is None:
+                return
+            # 该文件本身及其所在目录（列表）的条目
+            doomed = [
+                key for key, entry in self._entries.items()
+                if entry.path is not None and (entry.path == written or entry.path in written.parents)
+            ]
+        for key in doomed:
+            del self._entries[key]
+        self.stats.invalidated += len(doomed)
+
+    def __len__(self) -> int:
+        return len(self._entries)
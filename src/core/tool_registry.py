@@ -1,56 +1,143 @@
 """
 Core Tool Registry System
 Implements a lightweight MCP-like protocol for defining and executing tools.
+
+Tools may be plain functions or `async def` coroutines. The async execution
+path (ToolRegistry.execute_async) awaits async tools directly and runs sync
+tools on a bounded thread pool, so blocking tools never stall the event
+loop; both are bounded by per-tool timeouts.
+
+Sync tools can be isolated in a pool of reusable worker processes
+(ToolRegistry.configure_sandbox, see src.core.sandbox): timeouts then kill the
+worker instead of leaving a thread running. Per-tool latency, timeouts and
+kills are reported by ToolRegistry.get_stats.
+
+Tools declared cacheable are memoised per task (or per session) while a memo
+is bound (ToolRegistry.task_memo, see src.core.tool_memo); file-backed
+results are invalidated by mtime/size changes and by writing tools. Tools
+report failures by returning a ToolFailure, which is never memoised. Write
+listeners (ToolRegistry.add_write_listener) are told about every write so
+in-process state such as the workspace index stays current.
 """
+import asyncio
+import contextvars
 import inspect
 import json
 import functools
-from typing import Callable, Dict, Any, List, Optional, get_type_hints
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, Any, List, Optional, get_origin, get_type_hints
 from pydantic import BaseModel, create_model
+from src.core.sandbox import ProcessSandbox, Sandbox, SandboxKilledError
+from src.core.tool_memo import ToolFailure, ToolMemo, get_tool_memo
 from src.utils.logger import get_logger
 
 logger = get_logger()
 
-import signal
-from contextlib import contextmanager
+# Latency samples kept per tool for get_stats
+LATENCY_WINDOW = 200
+# Extra seconds the event loop waits for a sandbox that enforces its own timeout
+SANDBOX_TIMEOUT_GRACE_SECONDS = 5.0
+
+
+class _ToolNotStarted(Exception):
+    """Raised in the worker when a queued sync tool was abandoned before it started"""
 
-class Sandbox:
+
+class _StartGate:
     """
-    Basic Sandbox for tool execution.
-    Enforces timeouts and catches exceptions.
-    Future: Add process isolation or restricted file access.
+    Start handshake between the event loop and a queued sync tool.
+
+    The worker calls enter() right before the tool runs; the loop calls abandon()
+    when the call waited too long for a worker. Exactly one of them wins, so an
+    abandoned call never runs and a started call is never reported as not run.
     """
-    def __init__(self, timeout_seconds: int = 60):
-        self.timeout_seconds = timeout_seconds
-
-    @contextmanager
-    def time_limit(self, seconds):
-        # Note: signal.alarm only works on Unix. For Windows, we need a different approach or just skip strict timeout for now.
-        # Since user is on Windows, we will use a simple try/except block for now, 
-        # but ideally we would use threading or multiprocessing for true timeouts.
-        # For this MVP, we'll just rely on the tool's internal timeouts (like requests timeout) 
-        # and catch general exceptions.
-        yield
-
-    def run(self, func: Callable, **kwargs) -> Any:
-        """Runs the function within the sandbox"""
-        try:
-            # In a real implementation, we might run this in a separate process
-            # or use a library like 'pebble' for timeouts on Windows.
-            # For now, we just wrap in try/except and log.
-            return func(**kwargs)
-        except Exception as e:
-            logger.error(f"❌ Sandbox caught error in {func.__name__}: {e}")
-            raise e
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._lock = threading.Lock()
+        self._state = "queued"
+        self.started = asyncio.Event()
+
+    def enter(self):
+        with self._lock:
+            if self._state == "abandoned":
+                raise _ToolNotStarted()
+            self._state = "running"
+        self._loop.call_soon_threadsafe(self.started.set)
+
+    def abandon(self) -> bool:
+        with self._lock:
+            if self._state != "queued":
+                return False
+            self._state = "abandoned"
+            return True
+
+
+@dataclass
+class ToolMetrics:
+    """Per-tool call counters and rolling latency window"""
+    calls: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    kills: int = 0
+    memo_hits: int = 0
+    latencies_ms: Deque[float] = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+
+    def record(self, seconds: float):
+        self.calls += 1
+        self.latencies_ms.append(seconds * 1000)
+
+    def to_dict(self) -> Dict[str, Any]:
+        ordered = sorted(self.latencies_ms)
+
+        def _pct(p: float) -> float:
+            if not ordered:
+                return 0.0
+            return round(ordered[min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))], 1)
+
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "kills": self.kills,
+            "memo_hits": self.memo_hits,
+            "p50_ms": _pct(50),
+            "p95_ms": _pct(95),
+            "max_ms": round(ordered[-1], 1) if ordered else 0.0,
+        }
+
 
 class Tool:
     """Represents a callable tool with schema"""
-    def __init__(self, func: Callable, name: str = None, description: str = None):
+    def __init__(
+        self,
+        func: Callable,
+        name: str = None,
+        description: str = None,
+        timeout_seconds: Optional[float] = None,
+        cacheable: bool = False,
+        path_arg: Optional[str] = None,
+        invalidates: Optional[str] = None,
+        isolate: bool = True
+    ):
         self.func = func
         self.name = name or func.__name__
         self.description = description or func.__doc__ or "No description provided."
+        self.is_async = inspect.iscoroutinefunction(func)
+        self.timeout_seconds = timeout_seconds  # None: registry default
+        # Memo behaviour (see src.core.tool_memo)
+        self.cacheable = cacheable        # results may be served from the task memo
+        self.path_arg = path_arg          # argument naming the file/dir the result depends on
+        self.invalidates = invalidates    # argument naming the path this tool writes ("*" = any)
+        self.isolate = isolate            # False: never moved into the process sandbox
         self.schema = self._generate_schema()
-        self.sandbox = Sandbox() # Default sandbox
+        self.sandbox: Sandbox = Sandbox()  # Default sandbox (in-process)
+        self.metrics = ToolMetrics()
 
     def _generate_schema(self) -> Dict[str, Any]:
         """Generates JSON schema from type hints"""
@@ -73,7 +160,7 @@ class Tool:
                 list: "array",
                 dict: "object"
             }
-            json_type = type_map.get(param_type, "string")
+            json_type = type_map.get(param_type) or type_map.get(get_origin(param_type), "string")
             
             params[param_name] = {
                 "type": json_type,
@@ -97,28 +184,255 @@ class Tool:
         """Executes the tool"""
         try:
             logger.info(f"🔧 Executing tool: {self.name} with args: {kwargs}")
+            if self.is_async:
+                return _run_coroutine_blocking(self.func(**kwargs))
             # Use Sandbox to execute
-            return self.sandbox.run(self.func, **kwargs)
+            return self.sandbox.run(self.func, kwargs, self.timeout_seconds)
+        except Exception as e:
+            logger.error(f"❌ Tool execution failed: {e}")
+            # Return error string instead of raising, so Agent can see the error
+            return ToolFailure(f"Error: {str(e)}")
+
+    async def execute_async(self, pool: ThreadPoolExecutor, timeout_seconds: Optional[float], /, **kwargs) -> Any:
+        """
+        Executes the tool without blocking the event loop.
+
+        Async tools are awaited directly; sync tools run through the tool's sandbox on
+        the given thread pool (with the caller's contextvars). On timeout the caller
+        gets an error string right away; an in-process sync tool's worker thread
+        finishes in the background, a process sandbox kills its worker.
+
+        A sync tool's timeout starts once a worker (and sandbox slot) picks it up.
+        A call still queued after timeout_seconds is abandoned and never runs.
+        """
+        started = time.monotonic()
+        try:
+            logger.info(f"🔧 Executing tool: {self.name} with args: {kwargs}")
+            if self.is_async:
+                return await asyncio.wait_for(self.func(**kwargs), timeout=timeout_seconds)
+
+            loop = asyncio.get_running_loop()
+            gate = _StartGate(loop)
+            context = contextvars.copy_context()
+            pending = loop.run_in_executor(
+                pool, functools.partial(context.run, self.sandbox.run, self.func, kwargs, timeout_seconds, gate.enter)
+            )
+            if timeout_seconds is not None and not await self._wait_started(gate, pending, timeout_seconds):
+                self.metrics.timeouts += 1
+                logger.error(f"❌ Tool {self.name} not started: no worker free within {timeout_seconds}s")
+                return ToolFailure(
+                    f"Error: Tool '{self.name}' was not run: no worker was free within {timeout_seconds} seconds. "
+                    "It had no effect; call it again."
+                )
+            wait_timeout = timeout_seconds
+            if self.sandbox.enforces_timeout and timeout_seconds is not None:
+                # The sandbox kills the worker at timeout_seconds; this is only a backstop
+                wait_timeout = timeout_seconds + SANDBOX_TIMEOUT_GRACE_SECONDS
+            return await asyncio.wait_for(pending, timeout=wait_timeout)
+        except SandboxKilledError as e:
+            self.metrics.kills += 1
+            if e.reason == "timeout":
+                self.metrics.timeouts += 1
+            logger.error(f"❌ Tool {self.name}: {e}")
+            return ToolFailure(f"Error: Tool '{self.name}' {e}")
+        except asyncio.TimeoutError:
+            self.metrics.timeouts += 1
+            logger.error(f"❌ Tool {self.name} timed out after {timeout_seconds}s")
+            return ToolFailure(f"Error: Tool '{self.name}' timed out after {timeout_seconds} seconds")
         except Exception as e:
+            self.metrics.errors += 1
             logger.error(f"❌ Tool execution failed: {e}")
             # Return error string instead of raising, so Agent can see the error
-            return f"Error: {str(e)}"
+            return ToolFailure(f"Error: {str(e)}")
+        finally:
+            self.metrics.record(time.monotonic() - started)
+
+    @staticmethod
+    async def _wait_started(gate: _StartGate, pending: asyncio.Future, timeout_seconds: float) -> bool:
+        """Waits for a queued sync tool to start; False if it was abandoned instead"""
+        started_wait = asyncio.ensure_future(gate.started.wait())
+        try:
+            await asyncio.wait({started_wait, pending}, timeout=timeout_seconds, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            started_wait.cancel()
+        if gate.started.is_set() or pending.done() or not gate.abandon():
+            return True
+        # Drop it from the thread pool queue; a worker that already holds it raises _ToolNotStarted
+        pending.cancel()
+        return False
+
+
+def _run_coroutine_blocking(coro) -> Any:
+    """Runs an async tool from sync code (in a helper thread if a loop is already running)"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as helper:
+        return helper.submit(asyncio.run, coro).result()
 
 class ToolRegistry:
     """Registry for managing tools"""
     def __init__(self):
         self._tools: Dict[str, Tool] = {}
+        # Async execution settings (see configure)
+        self.max_workers = 8
+        self.default_timeout_seconds: Optional[float] = 120.0
+        self.timeouts: Dict[str, float] = {}
+        self._pool: Optional[ThreadPoolExecutor] = None
+        # Process isolation for sync tools (see configure_sandbox)
+        self._process_sandbox: Optional[ProcessSandbox] = None
+        self.inline_tools: set = set()
+        # Rendered tool-description blocks per allowed-tool set (see render_tool_descriptions)
+        self.version = 0
+        self._description_cache: Dict[Optional[frozenset], str] = {}
+        # Tool-result memo scope: "off" | "task" | "session" (see task_memo)
+        self.memo_scope = "task"
+        self._session_memo = ToolMemo()
+        # Callbacks (invalidates, arguments) run after a writing tool (see add_write_listener)
+        self._write_listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+
+    def configure(
+        self,
+        max_workers: Optional[int] = None,
+        default_timeout_seconds: Optional[float] = None,
+        timeouts: Optional[Dict[str, float]] = None,
+        memo_scope: Optional[str] = None
+    ):
+        """
+        Configure async tool execution.
+
+        Args:
+            max_workers: Size of the thread pool for sync tools
+            default_timeout_seconds: Timeout for tools without their own timeout
+            timeouts: Per-tool timeout overrides {tool_name: seconds}
+            memo_scope: Tool-result memo scope ("off", "task" or "session")
+        """
+        if max_workers is not None and max_workers != self.max_workers:
+            self.max_workers = max_workers
+            self._shutdown_pool()
+        if default_timeout_seconds is not None:
+            self.default_timeout_seconds = default_timeout_seconds
+        if timeouts is not None:
+            self.timeouts = dict(timeouts)
+        if memo_scope is not None:
+            self.memo_scope = memo_scope
+
+    def task_memo(self) -> Optional[ToolMemo]:
+        """
+        Memo to bind for a new task (src.core.tool_memo.bind_tool_memo):
+        a fresh one per task, the shared session memo, or None when disabled.
+        """
+        if self.memo_scope == "session":
+            return self._session_memo
+        if self.memo_scope == "task":
+            return ToolMemo()
+        return None
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tool")
+        return self._pool
+
+    def configure_sandbox(self, config):
+        """
+        Configure process isolation for sync tools.
+
+        Args:
+            config: ToolSandboxConfig instance (enabled=False keeps tools in-process)
+        """
+        if self._process_sandbox is not None:
+            self._process_sandbox.shutdown()
+            self._process_sandbox = None
+        self.inline_tools = set(config.inline_tools) if config is not None else set()
+        if config is not None and config.enabled:
+            self._process_sandbox = ProcessSandbox(
+                max_workers=config.max_workers,
+                max_tasks_per_worker=config.max_tasks_per_worker,
+                memory_limit_mb=config.memory_limit_mb,
+                cpu_limit_seconds=config.cpu_limit_seconds,
+                max_output_chars=config.max_output_chars,
+                start_method=config.start_method,
+            )
+            logger.info(
+                f"Tool sandbox enabled ({config.max_workers} worker processes, "
+                f"recycled every {config.max_tasks_per_worker} calls)"
+            )
+        for tool in self._tools.values():
+            self._assign_sandbox(tool)
+
+    def _assign_sandbox(self, tool: Tool):
+        """
+        Sync tools use the process sandbox unless listed in inline_tools or declared
+        with isolate=False; async tools stay on the event loop
+        """
+        if (
+            self._process_sandbox is not None
+            and not tool.is_async
+            and tool.isolate
+            and tool.name not in self.inline_tools
+        ):
+            tool.sandbox = self._process_sandbox
+        else:
+            tool.sandbox = Sandbox()
+
+    def _shutdown_pool(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    def shutdown(self):
+        """Release the tool thread pool and sandbox workers (running tools finish in the background)"""
+        self._shutdown_pool()
+        if self._process_sandbox is not None:
+            self._process_sandbox.shutdown()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-tool latency / timeout / kill counters plus sandbox worker stats"""
+        stats: Dict[str, Any] = {
+            "tools": {name: tool.metrics.to_dict() for name, tool in self._tools.items() if tool.metrics.calls}
+        }
+        if self._process_sandbox is not None:
+            stats["sandbox"] = self._process_sandbox.get_stats()
+        return stats
+
+    def get_timeout(self, name: str) -> Optional[float]:
+        """Effective timeout for a tool: config override > tool default > registry default"""
+        if name in self.timeouts:
+            return self.timeouts[name]
+        tool = self.get_tool(name)
+        if tool is not None and tool.timeout_seconds is not None:
+            return tool.timeout_seconds
+        return self.default_timeout_seconds
 
     def register(self, tool: Tool):
         """Register a tool instance"""
         if tool.name in self._tools:
             logger.warning(f"⚠️ Overwriting existing tool: {tool.name}")
+        self._assign_sandbox(tool)
         self._tools[tool.name] = tool
+        self.version += 1
+        self._description_cache.clear()
         logger.debug(f"Registered tool: {tool.name}")
 
-    def register_function(self, func: Callable):
+    def register_function(
+        self,
+        func: Callable,
+        timeout_seconds: Optional[float] = None,
+        cacheable: bool = False,
+        path_arg: Optional[str] = None,
+        invalidates: Optional[str] = None,
+        isolate: bool = True
+    ):
         """Decorator to register a function as a tool"""
-        tool = Tool(func)
+        tool = Tool(
+            func,
+            timeout_seconds=timeout_seconds,
+            cacheable=cacheable,
+            path_arg=path_arg,
+            invalidates=invalidates,
+            isolate=isolate
+        )
         self.register(tool)
         return func
 
@@ -129,6 +443,46 @@ class ToolRegistry:
         """Get schemas for all registered tools"""
         return [tool.schema for tool in self._tools.values()]
 
+    def render_tool_descriptions(self, allowed_tools: Optional[List[str]] = None) -> str:
+        """
+        Render the tool-description block of the ReAct system prompt.
+
+        Memoised per allowed-tool set until a tool is (re)registered. Tools are
+        listed by name with compact JSON schemas, so the text is byte-stable across
+        calls and processes and can sit in a cacheable prompt prefix.
+
+        Args:
+            allowed_tools: Tool names to include (None / empty = all tools)
+        """
+        key = frozenset(allowed_tools) if allowed_tools else None
+        cached = self._description_cache.get(key)
+        if cached is not None:
+            return cached
+
+        tools = [self._tools[name] for name in sorted(self._tools)]
+        if key is not None:
+            filtered = [tool for tool in tools if tool.name in key]
+            if filtered:
+                tools = filtered
+            else:
+                logger.warning("Allowed tools configured but none matched registry; falling back to all tools.")
+        desc = []
+        for tool in tools:
+            desc.append(f"- {tool.name}: {tool.description}")
+            input_schema = tool.schema.get("input_schema", {})
+            if input_schema:
+                compact_schema = {
+                    "type": "object",
+                    "properties": input_schema.get("properties", {})
+                }
+                required = input_schema.get("required", [])
+                if required:
+                    compact_schema["required"] = required
+                desc.append(f"  Input JSON: {json.dumps(compact_schema, separators=(',', ':'))}")
+        rendered = "\n".join(desc)
+        self._description_cache[key] = rendered
+        return rendered
+
     def execute(self, name: str, arguments: Dict[str, Any]) -> Any:
         """Execute a tool by name"""
         tool = self.get_tool(name)
@@ -136,10 +490,89 @@ class ToolRegistry:
             raise ValueError(f"Tool not found: {name}")
         return tool.execute(**arguments)
 
+    async def execute_async(self, name: str, arguments: Dict[str, Any]) -> Any:
+        """Execute a tool by name without blocking the event loop (served from the bound memo when possible)"""
+        tool = self.get_tool(name)
+        if not tool:
+            raise ValueError(f"Tool not found: {name}")
+        memo = get_tool_memo()
+        if memo is not None and tool.cacheable:
+            cached = memo.lookup(name, arguments, tool.path_arg)
+            if cached is not None:
+                tool.metrics.memo_hits += 1
+                logger.info(f"🧠 Tool memo hit: {name} with args: {arguments}")
+                return cached
+        result = await tool.execute_async(self._get_pool(), self.get_timeout(name), **arguments)
+        if memo is not None:
+            if tool.cacheable:
+                memo.store(name, arguments, result, tool.path_arg)
+            if tool.invalidates:
+                memo.invalidate(tool.invalidates, arguments)
+        if tool.invalidates:
+            self._notify_write(tool.invalidates, arguments)
+        return result
+
+    def add_write_listener(self, callback: Callable[[str, Dict[str, Any]], None]):
+        """
+        Register a callback run after every tool declared with invalidates=...
+
+        The callback receives (invalidates, arguments) in the caller's context, so
+        relative paths resolve against the bound workspace.
+        """
+        if callback not in self._write_listeners:
+            self._write_listeners.append(callback)
+
+    def _notify_write(self, invalidates: str, arguments: Dict[str, Any]):
+        for callback in self._write_listeners:
+            try:
+                callback(invalidates, arguments)
+            except Exception as e:
+                logger.warning(f"Write listener {getattr(callback, '__name__', callback)} failed: {e}")
+
 # Global registry instance
 registry = ToolRegistry()
 
-def tool(func):
-    """Decorator for defining tools"""
-    registry.register_function(func)
-    return func
+def tool(
+    func: Callable = None,
+    *,
+    timeout_seconds: Optional[float] = None,
+    cacheable: bool = False,
+    path_arg: Optional[str] = None,
+    invalidates: Optional[str] = None,
+    isolate: bool = True
+):
+    """
+    Decorator for defining tools.
+
+    Args:
+        timeout_seconds: Tool timeout (None: registry default)
+        cacheable: Read-only / pure tool whose results may be memoised per task
+        path_arg: Argument naming the file or directory a cacheable result depends on
+        invalidates: Argument naming the path this tool writes ("*" = may write anything)
+        isolate: False keeps a sync tool in-process even when the process sandbox is
+            enabled (tools that use in-process state, e.g. the workspace index)
+
+    Example:
+        @tool
+        def read_file(path: str) -> str: ...
+
+        @tool(timeout_seconds=45)
+        async def fetch(url: str) -> str: ...
+
+        @tool(cacheable=True, path_arg="path")
+        def read_file(path: str, offset: int = 0) -> str: ...
+    """
+    def decorator(f: Callable) -> Callable:
+        registry.register_function(
+            f,
+            timeout_seconds=timeout_seconds,
+            cacheable=cacheable,
+            path_arg=path_arg,
+            invalidates=invalidates,
+            isolate=isolate
+        )
+        return f
+
+    if func is not None:
+        return decorator(func)
+    return decorator
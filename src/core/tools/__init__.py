@@ -1,4 +1,4 @@
-from .file_tools import read_file, write_file, list_dir
+from .file_tools import read_file, write_file, edit_file, apply_patch, list_dir, search_workspace
 from .shell_tools import run_command
-from .search_tools import web_search
+from .search_tools import web_search, web_search_batch
 # from .research_tools import quick_research, deep_research, get_research_stats  # DISABLED: Causes nested LLM calls
@@ -1,34 +1,197 @@
 """
 File System Tools
 """
+import hashlib
+import mmap
 import os
-from pathlib import Path
-from src.core.tool_registry import tool
+import re
+import uuid
+from typing import List, Tuple
 
-@tool
-def read_file(path: str) -> str:
+from src.core.dir_snapshot import (
+    filter_entries,
+    get_directory_snapshot,
+    get_exclude_patterns,
+    notify_directory_write,
+    scan_directory,
+)
+from src.core.tool_registry import ToolFailure, registry, tool
+from src.core.workspace import get_workspace, resolve_path
+from src.core.workspace_index import get_workspace_index
+
+# 超过该大小的文件通过 mmap 分页读取，未指定 limit 时只返回第一页
+MMAP_THRESHOLD_BYTES = 1024 * 1024
+DEFAULT_PAGE_LINES = 2000
+DEFAULT_PAGE_BYTES = 256 * 1024
+_COUNT_CHUNK_BYTES = 4 * 1024 * 1024
+
+
+def _count_lines(mm: mmap.mmap) -> int:
+    """按块统计行数（与逐行迭代一致：末尾无换行的最后一行也计入）"""
+    size = len(mm)
+    newlines = 0
+    for start in range(0, size, _COUNT_CHUNK_BYTES):
+        newlines += mm[start:start + _COUNT_CHUNK_BYTES].count(b"\n")
+    if size and mm[size - 1:size] != b"\n":
+        newlines += 1
+    return newlines
+
+
+def _skip_lines(mm: mmap.mmap, position: int, count: int) -> int:
+    """从 position 起跳过 count 行，返回下一行的起始字节偏移"""
+    size = len(mm)
+    for _ in range(count):
+        if position >= size:
+            break
+        newline = mm.find(b"\n", position)
+        position = size if newline == -1 else newline + 1
+    return position
+
+
+def _read_large(file_path, path: str, offset: int, limit: int, unit: str, total_bytes: int) -> str:
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if unit == "bytes":
+            start = min(offset, total_bytes)
+            end = min(total_bytes, start + (limit or DEFAULT_PAGE_BYTES))
+            text = mm[start:end].decode('utf-8', errors='replace')
+            return f"[{path}: bytes {start}-{end} of {total_bytes}]\n{text}"
+
+        total_lines = _count_lines(mm)
+        limit = limit or DEFAULT_PAGE_LINES
+        start = _skip_lines(mm, 0, offset)
+        end = _skip_lines(mm, start, limit)
+        text = mm[start:end].decode('utf-8', errors='replace')
+        last = min(total_lines, offset + limit)
+        first = min(offset + 1, last + 1)
+        return f"[{path}: lines {first}-{last} of {total_lines}, {total_bytes} bytes]\n{text}"
+
+
+@tool(cacheable=True, path_arg="path")
+def read_file(path: str, offset: int = 0, limit: int = 0, unit: str = "lines") -> str:
     """
-    Reads the content of a file.
+    Reads the content of a file, optionally one page at a time.
+    Files larger than 1 MB are memory-mapped and returned in pages
+    (2000 lines / 256 KB by default); use offset/limit to read further.
     
     Args:
         path: The absolute or relative path to the file.
+        offset: Number of lines (or bytes) to skip before reading (default: 0).
+        limit: Maximum number of lines (or bytes) to return (default: 0 = no limit).
+        unit: "lines" or "bytes" - unit of offset and limit (default: "lines").
         
     Returns:
-        The content of the file as a string.
+        The content of the file as a string. Paged reads start with a header
+        describing the returned range, the total line count and the file size.
     """
     try:
-        file_path = Path(path)
+        file_path = resolve_path(path)
         if not file_path.exists():
-            return f"Error: File not found at {path}"
-        
-        return file_path.read_text(encoding='utf-8')
+            return ToolFailure(f"Error: File not found at {path}")
+
+        total_bytes = file_path.stat().st_size
+        if not offset and not limit and total_bytes <= MMAP_THRESHOLD_BYTES:
+            return file_path.read_text(encoding='utf-8')
+
+        if unit not in ("lines", "bytes"):
+            return ToolFailure(f"Error: unit must be 'lines' or 'bytes', got '{unit}'")
+        offset = max(0, int(offset))
+        limit = max(0, int(limit))
+
+        if total_bytes > MMAP_THRESHOLD_BYTES:
+            return _read_large(file_path, path, offset, limit, unit, total_bytes)
+
+        if unit == "bytes":
+            with open(file_path, 'rb') as f:
+                f.seek(offset)
+                data = f.read(limit) if limit else f.read()
+            end = offset + len(data)
+            text = data.decode('utf-8', errors='replace')
+            return f"[{path}: bytes {offset}-{end} of {total_bytes}]\n{text}"
+
+        lines = []
+        total_lines = 0
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for total_lines, line in enumerate(f, 1):
+                if total_lines > offset and (not limit or len(lines) < limit):
+                    lines.append(line)
+        end = offset + len(lines)
+        return f"[{path}: lines {offset + 1}-{end} of {total_lines}, {total_bytes} bytes]\n" + "".join(lines)
     except Exception as e:
-        return f"Error reading file: {str(e)}"
+        return ToolFailure(f"Error reading file: {str(e)}")
+
+_HASH_CHUNK_BYTES = 1024 * 1024
+
+# 临时文件以 0666 创建，由内核套用 umask，新文件权限与 open() 一致（mkstemp 固定为 0600）
+_TMP_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+_SEARCH_LINE_CHARS = 300
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+def _atomic_write(file_path, data: bytes) -> str:
+    """
+    写入同目录临时文件 → fsync → 按大小和 SHA-256 校验 → 原子替换目标文件
 
-@tool
+    Returns:
+        写入内容的 SHA-256（十六进制）
+
+    Raises:
+        OSError: 写入失败或校验不一致（此时目标文件保持原样）
+    """
+    expected = hashlib.sha256(data).hexdigest()
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    while True:
+        tmp_name = str(file_path.parent / f".{file_path.name}.{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            fd = os.open(tmp_name, _TMP_FLAGS, 0o666)
+            break
+        except FileExistsError:
+            continue
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+        size = os.stat(tmp_name).st_size
+        if size != len(data):
+            raise OSError(f"size mismatch after write ({size} != {len(data)} bytes)")
+        digest = hashlib.sha256()
+        with open(tmp_name, 'rb') as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK_BYTES), b""):
+                digest.update(chunk)
+        if digest.hexdigest() != expected:
+            raise OSError("content hash mismatch after write")
+
+        if file_path.exists():
+            os.chmod(tmp_name, file_path.stat().st_mode & 0o7777)
+        os.replace(tmp_name, file_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+    return expected
+
+
+def _read_exact(file_path) -> str:
+    """读取文本并保留原始换行（CRLF 不转换为 LF）"""
+    with open(file_path, 'r', encoding='utf-8', newline='') as f:
+        return f.read()
+
+
+def _write_verified(file_path, content: str, message: str) -> str:
+    data = content.encode('utf-8')
+    digest = _atomic_write(file_path, data)
+    return f"{message} (verified: {len(data)} bytes, sha256 {digest[:12]})"
+
+
+@tool(invalidates="path")
 def write_file(path: str, content: str) -> str:
     """
     Writes content to a file. Creates directories if they don't exist.
+    The write is atomic: the file is either fully replaced or left untouched.
+    For small changes to an existing file prefer edit_file or apply_patch.
 
     Args:
         path: The path to the file.
@@ -38,49 +201,263 @@ def write_file(path: str, content: str) -> str:
         Success message with verification or error.
     """
     try:
-        file_path = Path(path)
-        file_path.parent.mkdir(parents=True, exist_ok=True)
+        return _write_verified(resolve_path(path), content, f"Successfully wrote to {path}")
+    except Exception as e:
+        return f"Error writing file: {str(e)}"
+
+
+@tool(invalidates="path")
+def edit_file(path: str, old_text: str, new_text: str, replace_all: bool = False) -> str:
+    """
+    Replaces text in an existing file without resending the whole file.
+
+    Args:
+        path: The path to the file.
+        old_text: Exact text to find (include enough surrounding lines to make it unique).
+        new_text: Replacement text (empty string deletes old_text).
+        replace_all: Replace every occurrence instead of requiring a unique match (default: False).
+
+    Returns:
+        Success message with the number of replacements, or error.
+    """
+    try:
+        file_path = resolve_path(path)
+        if not file_path.exists():
+            return f"Error: File not found at {path}"
+        if not old_text:
+            return "Error: old_text must not be empty (use write_file to create a file)"
+
+        content = _read_exact(file_path)
+        count = content.count(old_text)
+        if not count and "\r\n" in content:
+            # 文件使用 CRLF 换行而参数使用 LF
+            old_text = old_text.replace("\n", "\r\n")
+            new_text = new_text.replace("\n", "\r\n")
+            count = content.count(old_text)
+        if not count:
+            return f"Error: old_text not found in {path}. Use read_file to check the current content."
+        if count > 1 and not replace_all:
+            return (
+                f"Error: old_text matches {count} times in {path}. "
+                "Include more surrounding text to make it unique, or set replace_all=true."
+            )
+
+        updated = content.replace(old_text, new_text) if replace_all else content.replace(old_text, new_text, 1)
+        replaced = count if replace_all else 1
+        return _write_verified(file_path, updated, f"Successfully edited {path} ({replaced} replacement(s))")
+    except Exception as e:
+        return f"Error editing file: {str(e)}"
+
+
+def _parse_hunks(patch: str) -> List[Tuple[int, List[str], List[str]]]:
+    """解析 unified diff，返回 [(原文件起始行号, 旧行列表, 新行列表)]"""
+    hunks = []
+    current = None
+    for line in patch.splitlines():
+        header = _HUNK_HEADER.match(line)
+        if header:
+            current = (int(header.group(1)), [], [])
+            hunks.append(current)
+            continue
+        if current is None or line.startswith("\\"):
+            # 文件头（---/+++/diff）与 "\ No newline at end of file"
+            continue
+        tag, text = (line[0], line[1:]) if line else (" ", "")
+        if tag in (" ", "-"):
+            current[1].append(text)
+        if tag in (" ", "+"):
+            current[2].append(text)
+    return hunks
+
+
+def _find_block(lines: List[str], block: List[str], expected: int, start: int) -> int:
+    """在 lines[start:] 中查找 block，优先离 expected 最近的位置；找不到返回 -1"""
+    if not block:
+        return max(start, min(expected, len(lines)))
+    last = len(lines) - len(block)
+    candidates = sorted(range(start, last + 1), key=lambda index: abs(index - expected))
+    for index in candidates:
+        if lines[index:index + len(block)] == block:
+            return index
+    return -1
 
-        # Write the file
-        file_path.write_text(content, encoding='utf-8')
 
-        # CRITICAL: Verify the file was actually written
+@tool(invalidates="path")
+def apply_patch(path: str, patch: str) -> str:
+    """
+    Applies a unified diff (as produced by `diff -u` / `git diff`) to an existing file.
+    Hunks are matched by their context lines, so line numbers may be approximate.
+
+    Args:
+        path: The path to the file.
+        patch: Unified diff text with one or more "@@ -a,b +c,d @@" hunks.
+
+    Returns:
+        Success message with the number of applied hunks, or error.
+    """
+    try:
+        file_path = resolve_path(path)
         if not file_path.exists():
-            return f"Error: File write completed but {path} does not exist on disk (silent write failure)"
+            return f"Error: File not found at {path}"
+        hunks = _parse_hunks(patch)
+        if not hunks:
+            return "Error: patch contains no hunks (expected lines starting with '@@ -a,b +c,d @@')"
 
-        # Verify content matches
-        written_content = file_path.read_text(encoding='utf-8')
-        if written_content != content:
-            return f"Error: File written but content mismatch detected in {path}"
+        content = _read_exact(file_path)
+        newline = "\r\n" if "\r\n" in content else "\n"
+        trailing_newline = content.endswith(("\n", "\r"))
+        lines = content.splitlines()
 
-        # Return success with verification details
-        file_size = file_path.stat().st_size
-        return f"Successfully wrote to {path} (verified: {file_size} bytes)"
+        # 逐个应用：position 之前的内容已处理，shift 为此前各 hunk 造成的行数偏移
+        position = 0
+        shift = 0
+        for number, (old_start, old_lines, new_lines) in enumerate(hunks, 1):
+            # 纯插入 hunk（@@ -N,0 ...）表示插入在原第 N 行之后
+            expected = max(0, (old_start if not old_lines else old_start - 1) + shift)
+            index = _find_block(lines, old_lines, expected, position)
+            if index < 0:
+                preview = "\n".join(old_lines[:3])
+                return f"Error: hunk {number} does not match {path} (expected near line {expected + 1}):\n{preview}"
+            lines[index:index + len(old_lines)] = new_lines
+            position = index + len(new_lines)
+            shift += len(new_lines) - len(old_lines)
 
+        updated = newline.join(lines) + (newline if trailing_newline and lines else "")
+        return _write_verified(file_path, updated, f"Successfully patched {path} ({len(hunks)} hunk(s))")
     except Exception as e:
-        return f"Error writing file: {str(e)}"
+        return f"Error applying patch: {str(e)}"
+
 
-@tool
-def list_dir(path: str = ".") -> str:
+def _split_patterns(patterns: str) -> List[str]:
+    return [p.strip() for p in (patterns or "").split(",") if p.strip()]
+
+
+@tool(isolate=False)
+def list_dir(
+    path: str = ".",
+    depth: int = 1,
+    include: str = "",
+    exclude: str = "",
+    offset: int = 0,
+    limit: int = 200
+) -> str:
     """
-    Lists files in a directory.
-    
+    Lists files and directories, optionally recursively.
+    Paths matching the configured exclude patterns (.git, __pycache__, logs, ...) are skipped.
+
     Args:
         path: The directory path (default: current directory).
-        
+        depth: How many levels to descend (default: 1 = direct children, 0 = unlimited).
+        include: Comma-separated glob patterns files must match, e.g. "*.md,*.json" (default: all).
+        exclude: Comma-separated glob patterns to skip, e.g. "drafts,*.tmp" (default: none).
+        offset: Number of entries to skip, for paging (default: 0).
+        limit: Maximum number of entries to return (default: 200).
+
     Returns:
-        List of files and directories.
+        One "[DIR] path" or "[FILE] path (size)" line per entry, relative to the listed directory.
     """
     try:
-        dir_path = Path(path)
+        dir_path = resolve_path(path)
         if not dir_path.exists():
             return f"Error: Directory not found at {path}"
-            
-        items = []
-        for item in dir_path.iterdir():
-            type_str = "DIR" if item.is_dir() else "FILE"
-            items.append(f"[{type_str}] {item.name}")
-            
-        return "\n".join(items)
+        if not dir_path.is_dir():
+            return f"Error: {path} is not a directory"
+
+        depth = max(0, int(depth))
+        offset = max(0, int(offset))
+        limit = max(1, int(limit))
+        includes = _split_patterns(include)
+        excludes = _split_patterns(exclude)
+
+        root = get_workspace().resolve()
+        target = dir_path.resolve()
+        snapshot = get_directory_snapshot(root)
+        relative = target.relative_to(root).as_posix() if target == root or root in target.parents else None
+        if relative is not None and not (relative != "." and snapshot.is_excluded(relative)):
+            # 工作区内：使用共享快照
+            entries = snapshot.list_entries(relative, depth, includes, excludes)
+            base = f"{relative}/" if relative != "." else ""
+        else:
+            # 工作区外（或被排除的目录）：直接遍历
+            scanned = scan_directory(target, depth, get_exclude_patterns())
+            entries = filter_entries(scanned, "", depth, includes, excludes)
+            base = ""
     except Exception as e:
         return f"Error listing directory: {str(e)}"
+
+    if not entries:
+        return "(no entries)"
+    page = entries[offset:offset + limit]
+    if not page:
+        return f"(no more entries: {len(entries)} in total)"
+    items = []
+    for entry in page:
+        name = entry.path[len(base):]
+        if entry.is_dir:
+            items.append(f"[DIR] {name}")
+        else:
+            items.append(f"[FILE] {name} ({entry.size} bytes)")
+    shown_to = offset + len(page)
+    if shown_to < len(entries):
+        items.append(f"... {len(entries) - shown_to} more entries (use offset={shown_to})")
+    return "\n".join(items)
+
+
+@tool(isolate=False)
+def search_workspace(
+    query: str,
+    regex: bool = False,
+    case_sensitive: bool = False,
+    glob: str = "",
+    offset: int = 0,
+    limit: int = 20
+) -> str:
+    """
+    Searches the text of all files in the working directory (like grep, but indexed).
+    Results are ranked by relevance (most matching lines in the shortest files first).
+
+    Args:
+        query: Text to find (or a Python regular expression when regex=true).
+        regex: Treat query as a regular expression (default: False).
+        case_sensitive: Match case exactly (default: False).
+        glob: Only search files whose path or name matches this pattern, e.g. "*.md" (default: all).
+        offset: Number of matches to skip, for paging (default: 0).
+        limit: Maximum number of matches to return (default: 20, max 200).
+
+    Returns:
+        A header with match counts followed by "path:line: text" entries.
+    """
+    try:
+        if not query:
+            return "Error: query must not be empty"
+        offset = max(0, int(offset))
+        limit = min(200, max(1, int(limit)))
+        result = get_workspace_index().search(
+            query, regex=regex, case_sensitive=case_sensitive, glob=glob or None, offset=offset, limit=limit
+        )
+    except re.error as e:
+        return f"Error: invalid regular expression: {e}"
+    except Exception as e:
+        return f"Error searching workspace: {str(e)}"
+
+    if not result.total_hits:
+        return f"No matches for '{query}' ({result.files_searched} files searched)"
+    if not result.hits:
+        return f"No more matches for '{query}' ({result.total_hits} in total)"
+    shown_to = offset + len(result.hits)
+    lines = [
+        f"[{result.total_hits} matches in {result.files_matched} files for '{query}', "
+        f"showing {offset + 1}-{shown_to}]"
+    ]
+    for hit in result.hits:
+        text = hit.line.strip()
+        if len(text) > _SEARCH_LINE_CHARS:
+            text = text[:_SEARCH_LINE_CHARS] + "..."
+        lines.append(f"{hit.path}:{hit.line_number}: {text}")
+    if shown_to < result.total_hits:
+        lines.append(f"... {result.total_hits - shown_to} more (use offset={shown_to})")
+    return "\n".join(lines)
+
+
+# 写入类工具执行后更新目录快照（list_dir 与工作区索引都基于它）
+registry.add_write_listener(notify_directory_write)
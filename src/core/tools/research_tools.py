@@ -36,8 +36,7 @@ def get_researcher() -> "ResearcherAgent":
             work_dir=".",
             provider="tavily",
             enabled=True,
-            enable_cache=True,
-            cache_ttl_minutes=60
+            enable_cache=True
         )
     return _researcher_instance
 
@@ -173,7 +172,9 @@ def get_research_stats() -> dict:
             "total_queries": int,
             "cache_hits": int,
             "deep_research_count": int,
-            "cache_hit_rate": float
+            "cache_hit_rate": float,
+            "cache_tier_hit_rates": {"memory": float, "disk": float, "near_duplicate": float},
+            "cache": {...}  # entries, size, evictions and per-tier hits
         }
 
     Example:
@@ -181,12 +182,6 @@ def get_research_stats() -> dict:
         print(f"Cache hit rate: {stats['cache_hit_rate']:.1%}")
     """
     researcher = get_researcher()
-    stats = researcher.stats.copy()
-
-    # Calculate cache hit rate
-    if stats["total_queries"] > 0:
-        stats["cache_hit_rate"] = stats["cache_hits"] / stats["total_queries"]
-    else:
-        stats["cache_hit_rate"] = 0.0
-
+    stats = researcher.get_stats()
+    stats.setdefault("cache_hit_rate", 0.0)
     return stats
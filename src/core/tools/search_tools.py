@@ -2,17 +2,95 @@
 Professional Web Search Tool for Agentic Workflows
 Optimized for Market Research and Competitive Intelligence
 """
-import os
-import json
-from typing import Optional, Literal
-from src.core.tool_registry import tool
+from typing import List, Optional, Literal
+from src.core.tool_registry import ToolFailure, tool
+from src.core.web_search import (
+    SearchOutcome,
+    get_web_search_settings,
+    merge_results,
+    search,
+    search_many,
+)
 
-try:
-    from tavily import TavilyClient
-except ImportError:
-    TavilyClient = None
+# Registry backstop for a full batch (several waves of per-query timeouts);
+# override with tools.timeouts.web_search_batch
+BATCH_TIMEOUT_SECONDS = 180
 
-@tool
+
+def format_response(query: str, outcome: SearchOutcome) -> str:
+    """把单条查询的结果格式化为 Markdown（失败时返回 ToolFailure 错误信息）"""
+    if outcome.error:
+        return ToolFailure(outcome.error)
+    response = outcome.response
+    output = []
+
+    # 1. 提取 Tavily 生成的 AI 总结
+    if response.get("answer"):
+        output.append(f"### Direct Answer Summary\n{response['answer']}\n")
+
+    # 2. 格式化搜索结果
+    output.append("### Detailed Sources")
+    results = response.get("results", [])
+
+    if not results:
+        return f"No significant results found for query: '{query}'"
+
+    for i, result in enumerate(results, 1):
+        title = result.get('title', 'No Title')
+        url = result.get('url', '#')
+        # 增加内容长度到 800 字符左右，保证市场研究有足够素材
+        content = result.get('content', '')
+
+        source_block = (
+            f"#### Source {i}: {title}\n"
+            f"- **URL:** {url}\n"
+            f"- **Content Snippet:** {content}\n"
+        )
+        output.append(source_block)
+
+    return "\n".join(output)
+
+
+def format_batch(outcomes: List[SearchOutcome], max_sources: int = 15) -> str:
+    """把多条查询的结果合并成一份按相关度排序的 Markdown"""
+    merged = merge_results(outcomes)
+    raw_count = sum(len(outcome.results) for outcome in outcomes)
+    output = [f"### Batch Search: {len(outcomes)} queries, {len(merged)} unique sources ({raw_count} results before dedupe)"]
+    for outcome in outcomes:
+        if outcome.error:
+            status = outcome.error
+        else:
+            status = f"{len(outcome.results)} results" + (" (cached)" if outcome.cached else "")
+        output.append(f"- `{outcome.query}`: {status}")
+    output.append("")
+
+    answers = [(outcome.query, outcome.response.get("answer")) for outcome in outcomes if outcome.response]
+    answers = [(query, answer) for query, answer in answers if answer]
+    if answers:
+        output.append("### Direct Answer Summaries")
+        for query, answer in answers:
+            output.append(f"**{query}:** {answer}\n")
+
+    if not merged:
+        output.append("No significant results found for any query.")
+        return "\n".join(output)
+
+    shown = merged[:max_sources] if max_sources > 0 else merged
+    output.append("### Ranked Sources")
+    for i, result in enumerate(shown, 1):
+        output.append(
+            f"#### Source {i}: {result.title}\n"
+            f"- **URL:** {result.url}\n"
+            f"- **Matched Queries:** {', '.join(result.queries)}\n"
+            f"- **Content Snippet:** {result.content}\n"
+        )
+    if len(shown) < len(merged):
+        output.append(f"[{len(merged) - len(shown)} lower-ranked sources omitted]")
+    return "\n".join(output)
+
+
+# In-process: the persistent search cache and its hit events live in the main process
+@tool(timeout_seconds=60, cacheable=True, isolate=False)
 def web_search(
     query: str,
     search_depth: Literal["basic", "advanced"] = "advanced",
@@ -31,55 +109,39 @@ def web_search(
     Returns:
         A structured Markdown string containing search results and source links.
     """
-    if not TavilyClient:
-        return "Error: tavily-python not installed. Please run 'pip install tavily-python'."
-
-    api_key = os.environ.get("TAVILY_API_KEY")
-    if not api_key:
-        return "Error: TAVILY_API_KEY environment variable not set. Please set it to use web search."
-
-    try:
-        client = TavilyClient(api_key=api_key)
-
-        # 调用 Tavily API
-        # search_depth="advanced" 会消耗 2 个 credit，但对市场研究至关重要
-        response = client.search(
-            query=query,
-            search_depth=search_depth,
-            max_results=max_results,
-            days=days,
-            include_answer=True,
-            include_raw_content=False  # 设置为 True 如果需要全文解析，但要注意 Token 消耗
-        )
-
-        output = []
+    return format_response(query, search(query, search_depth, max_results, days))
 
-        # 1. 提取 Tavily 生成的 AI 总结
-        if response.get("answer"):
-            output.append(f"### Direct Answer Summary\n{response['answer']}\n")
 
-        # 2. 格式化搜索结果
-        output.append("### Detailed Sources")
-        results = response.get("results", [])
-
-        if not results:
-            return f"No significant results found for query: '{query}'"
-
-        for i, result in enumerate(results, 1):
-            title = result.get('title', 'No Title')
-            url = result.get('url', '#')
-            # 增加内容长度到 800 字符左右，保证市场研究有足够素材
-            content = result.get('content', '')
-
-            source_block = (
-                f"#### Source {i}: {title}\n"
-                f"- **URL:** {url}\n"
-                f"- **Content Snippet:** {content}\n"
-            )
-            output.append(source_block)
+@tool(timeout_seconds=BATCH_TIMEOUT_SECONDS, cacheable=True)
+async def web_search_batch(
+    queries: List[str],
+    search_depth: Literal["basic", "advanced"] = "advanced",
+    max_results: int = 5,
+    days: Optional[int] = 365,
+    max_sources: int = 15
+) -> str:
+    """
+    Runs several web searches concurrently and merges them into one ranked result list.
+    Sources found by several queries are listed once and ranked higher.
 
-        return "\n".join(output)
+    Args:
+        queries: The search queries (different angles on the topic; at most 8).
+        search_depth: 'basic' for quick facts, 'advanced' for in-depth analysis.
+        max_results: Results per query (1-10).
+        days: Limit results to the last N days.
+        max_sources: Max merged sources to return (default: 15, 0 = all).
 
-    except Exception as e:
-        # 增加错误上下文
-        return f"Search Failed for '{query}': {str(e)}"
+    Returns:
+        A Markdown string with per-query status, answer summaries and deduplicated, ranked sources.
+    """
+    if isinstance(queries, str):
+        queries = [queries]
+    max_queries = get_web_search_settings().max_queries
+    if len(queries) > max_queries:
+        return ToolFailure(f"Error: At most {max_queries} queries per batch (got {len(queries)}).")
+    outcomes = await search_many(queries, search_depth, max_results, days)
+    if not outcomes:
+        return ToolFailure("Error: No queries given.")
+    output = format_batch(outcomes, max_sources)
+    # A batch with any failed query is reported but not memoised, so a retry searches again
+    return ToolFailure(output) if any(outcome.error for outcome in outcomes) else output
@@ -1,20 +1,52 @@
 """
 Shell Execution Tools
 """
-import subprocess
-from pathlib import Path
+from src.core.shell_session import (
+    CommandResult,
+    get_shell_session,
+    get_shell_settings,
+    run_oneshot,
+)
 from src.core.tool_registry import tool
+from src.core.workspace import get_workspace
 
-@tool
-def run_command(command: str) -> str:
+# Registry backstop above the largest allowed per-call timeout (tools.shell.max_timeout_seconds <= 600);
+# the per-call timeout kills the command first, and cancellation by the registry kills it too
+REGISTRY_TIMEOUT_SECONDS = 615
+
+
+def _format_result(result: CommandResult, timeout_seconds: float) -> str:
+    output = result.stdout
+    if result.stderr:
+        output += f"\nSTDERR:\n{result.stderr}"
+    if result.timed_out:
+        message = f"Error: Command timed out after {timeout_seconds:g} seconds (process killed)."
+        if output.strip():
+            message += f"\nPartial output:\n{output}"
+        if result.note:
+            message += f"\n{result.note}"
+        return message
+    if result.exit_code:
+        output += f"\n[exit code {result.exit_code}]"
+    if result.note:
+        output = f"{result.note}\n{output}"
+    return output
+
+
+@tool(timeout_seconds=REGISTRY_TIMEOUT_SECONDS, invalidates="*")  # may write any file
+async def run_command(command: str, timeout_seconds: int = 0, session: bool = False) -> str:
     """
     Executes a shell command and returns the output.
-    
+    Long output is shortened to its beginning and end.
+
     Args:
         command: The command to execute (e.g., 'ls -la', 'python script.py').
-        
+        timeout_seconds: Kill the command after this many seconds (default: 0 = 30s, max 300s).
+        session: Run in this agent's persistent shell, keeping the working directory and
+            exported variables from earlier session commands (default: False).
+
     Returns:
-        Combined stdout and stderr.
+        Combined stdout and stderr (in a session, stderr is interleaved with stdout).
     """
     try:
         # Basic safety guards (best-effort; should be replaced by real sandbox)
@@ -26,21 +58,17 @@ def run_command(command: str) -> str:
         if len(command) > 500:
             return "Error: Command too long."
 
-        result = subprocess.run(
-            command,
-            shell=True,
-            capture_output=True,
-            text=True,
-            timeout=30,  # Tighter default timeout
-            cwd=str(Path.cwd())
-        )
-        
-        output = result.stdout
-        if result.stderr:
-            output += f"\nSTDERR:\n{result.stderr}"
-            
-        return output
-    except subprocess.TimeoutExpired:
-        return "Error: Command timed out after 60 seconds."
+        settings = get_shell_settings()
+        timeout = float(timeout_seconds) if timeout_seconds and timeout_seconds > 0 else settings.default_timeout_seconds
+        timeout = min(timeout, settings.max_timeout_seconds)
+
+        shell_session = get_shell_session() if session else None
+        if shell_session is not None and shell_session.available:
+            result = await shell_session.run(command, timeout)
+        else:
+            result = await run_oneshot(command, timeout, get_workspace())
+            if session:
+                result.note = "[no persistent shell session available; ran as a one-off command]"
+        return _format_result(result, timeout)
     except Exception as e:
         return f"Error executing command: {str(e)}"
@@ -0,0 +1,210 @@
+"""
+Web Search - 网页搜索后端
+
+web_search / web_search_batch 工具与 ResearcherAgent 共用的搜索实现：
+- 查询交给当前的搜索提供方（src.core.search_providers，research.provider），并记录其延迟
+- search: 单条查询，先查持久化搜索缓存（src.core.search_cache），命中时发出 search_cache_hit 事件
+- search_many: 多条查询并发执行（并发上限 + 单条查询超时），规范化后相同的查询只搜索一次
+- merge_results: 多条查询的结果按 URL（规范化后）和内容哈希去重，按倒数排名融合（RRF）排序
+
+通过 research.batch 配置并发上限、单条查询超时和每批最多查询数。
+"""
+import asyncio
+import hashlib
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from src.core.events import EventType
+from src.core.llm.telemetry import emit_llm_event
+from src.core.search_cache import get_search_cache, normalize_query
+from src.core.search_providers import SearchProviderError, get_search_provider, normalize_url
+from src.utils.logger import get_logger
+
+logger = get_logger()
+
+# 倒数排名融合的平滑常数
+_RRF_K = 60
+
+
+@dataclass
+class WebSearchSettings:
+    """批量搜索参数（configure_web_search）"""
+    max_concurrency: int = 4
+    query_timeout_seconds: float = 30.0
+    max_queries: int = 8
+
+
+_settings = WebSearchSettings()
+
+
+def configure_web_search(config=None):
+    """
+    配置批量搜索
+
+    Args:
+        config: SearchBatchConfig 实例
+    """
+    global _settings
+    if config is None:
+        _settings = WebSearchSettings()
+    else:
+        _settings = WebSearchSettings(
+            max_concurrency=config.max_concurrency,
+            query_timeout_seconds=config.query_timeout_seconds,
+            max_queries=config.max_queries,
+        )
+
+
+def get_web_search_settings() -> WebSearchSettings:
+    return _settings
+
+
+# ---- 单条查询 ----
+
+@dataclass
+class SearchOutcome:
+    """一条查询的结果（error 不为空时 response 为 None）"""
+    query: str
+    response: Optional[Dict] = None
+    error: Optional[str] = None
+    duration_seconds: float = 0.0
+    cached: bool = False
+
+    @property
+    def results(self) -> List[Dict]:
+        return (self.response or {}).get("results", [])
+
+
+def search(
+    query: str,
+    search_depth: str = "advanced",
+    max_results: int = 5,
+    days: Optional[int] = 365,
+    timeout_seconds: Optional[float] = None,
+) -> SearchOutcome:
+    """执行一条查询（阻塞；先查持久化缓存，只缓存有结果的响应）"""
+    provider = get_search_provider()
+    cache = get_search_cache() if provider.cacheable else None
+    cache_key = None
+    if cache is not None:
+        cache_key = cache.make_key(query, search_depth, max_results, days, provider.name)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            stats = cache.stats.to_dict()
+            emit_llm_event(
+                EventType.SEARCH_CACHE_HIT,
+                query=query,
+                search_depth=search_depth,
+                saved_seconds=round(cached.duration_seconds, 2),
+                age_seconds=round(cached.age_seconds),
+                hit_rate=stats["hit_rate"],
+                total_saved_seconds=stats["saved_seconds"],
+            )
+            return SearchOutcome(query, response=cached.response, cached=True)
+
+    started = time.monotonic()
+    try:
+        response = provider.search(query, search_depth, max_results, days, timeout_seconds or 60)
+    except SearchProviderError as e:
+        return SearchOutcome(query, error=str(e))
+    except Exception as e:  # pylint: disable=broad-except
+        duration = time.monotonic() - started
+        provider.stats.record(duration, error=True)
+        return SearchOutcome(query, error=f"Search Failed for '{query}': {str(e)}", duration_seconds=duration)
+
+    duration = time.monotonic() - started
+    provider.stats.record(duration)
+    if cache is not None and response.get("results"):
+        params = {"search_depth": search_depth, "max_results": max_results, "days": days}
+        cache.set(cache_key, query, params, response, duration)
+    return SearchOutcome(query, response=response, duration_seconds=duration)
+
+
+# ---- 批量查询 ----
+
+async def search_many(
+    queries: List[str],
+    search_depth: str = "advanced",
+    max_results: int = 5,
+    days: Optional[int] = 365,
+) -> List[SearchOutcome]:
+    """
+    并发执行多条查询（按输入顺序返回；规范化后重复的查询只保留第一条）
+
+    每条查询在线程中执行，受 max_concurrency 限制；超过 query_timeout_seconds 的查询记为失败。
+    """
+    unique: Dict[str, str] = {}
+    for query in queries:
+        if query and query.strip():
+            unique.setdefault(normalize_query(query), query.strip())
+    settings = _settings
+    semaphore = asyncio.Semaphore(max(settings.max_concurrency, 1))
+
+    async def _one(query: str) -> SearchOutcome:
+        async with semaphore:
+            started = time.monotonic()
+            try:
+                # HTTP 超时先生效；wait_for 兜底（超时的线程在 HTTP 超时后自行结束）
+                return await asyncio.wait_for(
+                    asyncio.to_thread(search, query, search_depth, max_results, days, settings.query_timeout_seconds),
+                    timeout=settings.query_timeout_seconds + 5,
+                )
+            except asyncio.TimeoutError:
+                return SearchOutcome(
+                    query,
+                    error=f"Search timed out after {settings.query_timeout_seconds:g}s for '{query}'",
+                    duration_seconds=time.monotonic() - started,
+                )
+
+    return list(await asyncio.gather(*(_one(query) for query in unique.values())))
+
+
+@dataclass
+class MergedResult:
+    """去重合并后的一条来源"""
+    title: str
+    url: str
+    content: str
+    score: float
+    queries: List[str] = field(default_factory=list)
+
+
+def _content_hash(content: str) -> Optional[str]:
+    text = re.sub(r"\W+", " ", content.lower()).strip()
+    if not text:
+        return None
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def merge_results(outcomes: List[SearchOutcome]) -> List[MergedResult]:
+    """
+    合并多条查询的结果：同一 URL 或相同内容视为同一来源，按倒数排名融合打分
+
+    得分 = Σ 1 / (60 + 该来源在各查询结果中的名次)，被多条查询命中、排名靠前的来源在前。
+    """
+    merged: List[MergedResult] = []
+    by_url: Dict[str, MergedResult] = {}
+    by_content: Dict[str, MergedResult] = {}
+    for outcome in outcomes:
+        for rank, result in enumerate(outcome.results, 1):
+            url = result.get("url") or ""
+            content = result.get("content") or ""
+            url_key = normalize_url(url) if url else None
+            content_key = _content_hash(content)
+            entry = (by_url.get(url_key) if url_key else None) or (by_content.get(content_key) if content_key else None)
+            if entry is None:
+                entry = MergedResult(title=result.get("title") or "No Title", url=url or "#", content=content, score=0.0)
+                merged.append(entry)
+            elif len(content) > len(entry.content):
+                entry.content = content
+            entry.score += 1.0 / (_RRF_K + rank)
+            if outcome.query not in entry.queries:
+                entry.queries.append(outcome.query)
+            if url_key:
+                by_url.setdefault(url_key, entry)
+            if content_key:
+                by_content.setdefault(content_key, entry)
+    merged.sort(key=lambda item: -item.score)
+    return merged
@@ -0,0 +1,55 @@
+"""
+Workspace Context - 工作区上下文
+
+通过 contextvars 为每个执行器绑定独立的工作目录，文件 / 命令工具据此解析相对路径，
+不再修改进程级当前目录（os.chdir），因此同一进程内可以并发运行多个执行器。
+
+未绑定工作区时回退到进程当前目录，保持旧行为。
+"""
+import contextvars
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Union
+
+_current_workspace: contextvars.ContextVar[Optional[Path]] = contextvars.ContextVar(
+    "workspace", default=None
+)
+
+
+def get_workspace() -> Path:
+    """获取当前工作区（未绑定时为进程当前目录）"""
+    return _current_workspace.get() or Path.cwd()
+
+
+def bind_workspace(path: Union[str, Path]) -> contextvars.Token:
+    """绑定当前上下文的工作区，返回用于恢复的 token"""
+    return _current_workspace.set(Path(path).resolve())
+
+
+def reset_workspace(token: contextvars.Token):
+    """恢复 bind_workspace 之前的工作区"""
+    _current_workspace.reset(token)
+
+
+@contextmanager
+def workspace(path: Union[str, Path]):
+    """
+    临时设置工作区
+
+    Example:
+        with workspace("/data/demo_act"):
+            read_file("report.md")  # -> /data/demo_act/report.md
+    """
+    token = bind_workspace(path)
+    try:
+        yield get_workspace()
+    finally:
+        reset_workspace(token)
+
+
+def resolve_path(path: Union[str, Path]) -> Path:
+    """按当前工作区解析路径（绝对路径原样返回）"""
+    candidate = Path(path).expanduser()
+    if candidate.is_absolute():
+        return candidate
+    return get_workspace() / candidate
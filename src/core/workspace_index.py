@@ -0,0 +1,280 @@
+"""
+Workspace Index - 工作区增量倒排索引
+
+为 search_workspace 工具在内存中维护工作目录的文本索引：
+- 每个文件按小写三元组（trigram）建立倒排表，字面量查询先用倒排表求交得到候选文件，
+  再逐行匹配；正则查询直接扫描内存中的文本
+- 增量维护：文件清单来自共享的目录快照（src.core.dir_snapshot，写入类工具执行后立即更新，
+  外部变化由定期重扫发现），每次查询前只重建 (mtime, size) 变化的文件
+- 跳过快照排除的路径（performance.exclude_patterns）、二进制文件和超大文件
+- 结果按文件相关度排序（匹配行数按文件长度归一化，文件名命中加分），并支持分页
+
+索引按工作区根目录缓存（get_workspace_index），只存在于主进程中。
+"""
+import fnmatch
+import math
+import re
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.core.dir_snapshot import get_directory_snapshot
+from src.core.workspace import get_workspace
+_BINARY_SNIFF_BYTES = 8192
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+@dataclass
+class _IndexedFile:
+    mtime_ns: int
+    size: int
+    lines: List[str]
+    trigrams: Set[str]
+
+
+@dataclass
+class SearchHit:
+    """单条匹配"""
+    path: str
+    line_number: int
+    line: str
+    score: float
+
+
+@dataclass
+class SearchResult:
+    """一次查询的结果（hits 为当前页）"""
+    hits: List[SearchHit]
+    total_hits: int
+    files_matched: int
+    files_searched: int
+    elapsed_ms: float
+
+
+@dataclass
+class IndexStats:
+    """索引统计"""
+    files: int = 0
+    trigrams: int = 0
+    syncs: int = 0
+    files_reindexed: int = 0
+    queries: int = 0
+    query_ms_total: float = 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            "files": self.files,
+            "trigrams": self.trigrams,
+            "syncs": self.syncs,
+            "files_reindexed": self.files_reindexed,
+            "queries": self.queries,
+            "avg_query_ms": round(self.query_ms_total / self.queries, 2) if self.queries else 0.0,
+        }
+
+
+class WorkspaceIndex:
+    """单个工作区根目录的增量索引（文件清单来自共享的目录快照）"""
+
+    def __init__(
+        self,
+        root: Path,
+        max_file_bytes: int = 1024 * 1024,
+        max_files: int = 20000,
+    ):
+        """
+        Args:
+            root: 工作区根目录
+            max_file_bytes: 超过该大小的文件不建索引
+            max_files: 最多索引的文件数
+        """
+        self.root = Path(root).resolve()
+        self.max_file_bytes = max_file_bytes
+        self.max_files = max_files
+        self._files: Dict[str, _IndexedFile] = {}
+        self._postings: Dict[str, Set[str]] = {}
+        # 未建索引的文件 {相对路径: (mtime_ns, size, 原因)}，未变化时不再读取
+        self._skipped: Dict[str, Tuple[int, int, str]] = {}
+        self._synced_generation = -1
+        self._lock = threading.RLock()
+        self.stats = IndexStats()
+
+    # ---- 维护 ----
+
+    def refresh(self, force: bool = False):
+        """与目录快照同步：只重建 (mtime, size) 变化的文件，移除已删除的文件"""
+        with self._lock:
+            generation, files = get_directory_snapshot(self.root).versioned_files(force=force)
+            if generation == self._synced_generation:
+                return
+            for rel_path, snapshot_entry in files.items():
+                entry = self._files.get(rel_path)
+                if entry is not None:
+                    known = (entry.mtime_ns, entry.size)
+                else:
+                    known = self._skipped.get(rel_path, (None, None, None))[:2]
+                if known != (snapshot_entry.mtime_ns, snapshot_entry.size):
+                    self._reindex(rel_path)
+            for rel_path in [p for p in self._files if p not in files]:
+                self._drop(rel_path)
+            for rel_path in [p for p in self._skipped if p not in files]:
+                del self._skipped[rel_path]
+            self._synced_generation = generation
+            self.stats.syncs += 1
+            self.stats.files = len(self._files)
+            self.stats.trigrams = len(self._postings)
+
+    def _reindex(self, rel_path: str):
+        self._drop(rel_path)
+        full_path = self.root / rel_path
+        try:
+            stat = full_path.stat()
+            if stat.st_size > self.max_file_bytes:
+                self._skipped[rel_path] = (stat.st_mtime_ns, stat.st_size, "too_large")
+                return
+            if len(self._files) >= self.max_files:
+                self._skipped[rel_path] = (stat.st_mtime_ns, stat.st_size, "max_files")
+                return
+            data = full_path.read_bytes()
+        except OSError:
+            return
+        if b"\0" in data[:_BINARY_SNIFF_BYTES]:
+            self._skipped[rel_path] = (stat.st_mtime_ns, stat.st_size, "binary")
+            return
+        text = data.decode("utf-8", errors="replace")
+        entry = _IndexedFile(
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            lines=text.splitlines(),
+            trigrams=_trigrams(text.lower()),
+        )
+        self._files[rel_path] = entry
+        for gram in entry.trigrams:
+            self._postings.setdefault(gram, set()).add(rel_path)
+        self.stats.files_reindexed += 1
+
+    def _drop(self, rel_path: str):
+        self._skipped.pop(rel_path, None)
+        entry = self._files.pop(rel_path, None)
+        if entry is None:
+            return
+        for gram in entry.trigrams:
+            paths = self._postings.get(gram)
+            if paths is not None:
+                paths.discard(rel_path)
+                if not paths:
+                    del self._postings[gram]
+
+    # ---- 查询 ----
+
+    def _candidates(self, needle: str, glob: Optional[str]) -> List[str]:
+        grams = _trigrams(needle.lower()) if needle else set()
+        if grams:
+            # 从最短的倒排表开始求交
+            postings = sorted((self._postings.get(gram, set()) for gram in grams), key=len)
+            paths = set(postings[0])
+            for posting in postings[1:]:
+                paths &= posting
+                if not paths:
+                    break
+        else:
+            paths = set(self._files)
+        if glob:
+            paths = {p for p in paths if fnmatch.fnmatch(p, glob) or fnmatch.fnmatch(p.rsplit("/", 1)[-1], glob)}
+        return sorted(paths)
+
+    def search(
+        self,
+        query: str,
+        regex: bool = False,
+        case_sensitive: bool = False,
+        glob: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 20,
+        max_hits_per_file: int = 20,
+    ) -> SearchResult:
+        """
+        查询索引
+
+        Raises:
+            re.error: 正则表达式无效
+        """
+        started = time.monotonic()
+        flags = 0 if case_sensitive else re.IGNORECASE
+        pattern = re.compile(query if regex else re.escape(query), flags)
+        with self._lock:
+            self.refresh()
+            candidates = self._candidates("" if regex else query, glob)
+            ranked: List[Tuple[float, str, List[Tuple[int, str]]]] = []
+            for rel_path in candidates:
+                entry = self._files[rel_path]
+                matches = [(number, line) for number, line in enumerate(entry.lines, 1) if pattern.search(line)]
+                if not matches:
+                    continue
+                name_hit = bool(pattern.search(rel_path.rsplit("/", 1)[-1]))
+                # 匹配越多、文件越短、文件名命中，得分越高
+                score = len(matches) / (1.0 + math.log1p(len(entry.lines) / 100)) + (3.0 if name_hit else 0.0)
+                ranked.append((score, rel_path, matches))
+            files_searched = len(candidates)
+            elapsed_ms = (time.monotonic() - started) * 1000
+            self.stats.queries += 1
+            self.stats.query_ms_total += elapsed_ms
+
+        ranked.sort(key=lambda item: (-item[0], item[1]))
+        hits: List[SearchHit] = []
+        for score, rel_path, matches in ranked:
+            for number, line in matches[:max_hits_per_file]:
+                hits.append(SearchHit(rel_path, number, line, round(score, 3)))
+        return SearchResult(
+            hits=hits[offset:offset + limit] if limit else hits[offset:],
+            total_hits=len(hits),
+            files_matched=len(ranked),
+            files_searched=files_searched,
+            elapsed_ms=round(elapsed_ms, 2),
+        )
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = self.stats.to_dict()
+            skipped: Dict[str, int] = {}
+            for _, _, reason in self._skipped.values():
+                skipped[reason] = skipped.get(reason, 0) + 1
+        stats["skipped"] = skipped
+        return stats
+
+
+# 全局配置与按根目录缓存的索引
+_index_settings: Dict = {}
+_indexes: Dict[Path, WorkspaceIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def configure_workspace_index(config=None):
+    """
+    配置工作区索引（已创建的索引被丢弃，下次使用时按新配置重建）
+
+    Args:
+        config: WorkspaceSearchConfig 实例
+    """
+    settings = {}
+    if config is not None:
+        settings.update(max_file_bytes=config.max_file_kb * 1024, max_files=config.max_files)
+    with _indexes_lock:
+        _index_settings.clear()
+        _index_settings.update(settings)
+        _indexes.clear()
+
+
+def get_workspace_index(root: Optional[Path] = None) -> WorkspaceIndex:
+    """获取指定根目录（默认当前工作区）的索引"""
+    root = Path(root or get_workspace()).resolve()
+    with _indexes_lock:
+        index = _indexes.get(root)
+        if index is None:
+            index = WorkspaceIndex(root, **_index_settings)
+            _indexes[root] = index
+        return index
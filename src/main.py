@@ -16,10 +16,25 @@ from src.config import get_config
 from src.utils.logger import setup_logger
 from src.core.agents.planner import PlannerAgent
 from src.core.agents.executor import ExecutorAgent
-from src.core.agents.researcher import ResearcherAgent
+from src.core.agents.researcher import ResearcherAgent, configure_research_cache
 from src.core.agents.sdk_client import run_claude_prompt
+from src.core.llm.call_context import CallClass, bind_llm_call_context
+from src.core.llm.cli_pool import configure_cli_pool, get_cli_pool, shutdown_cli_pool
+from src.core.llm.coalescer import configure_request_coalescer, get_request_coalescer
+from src.core.llm.hedging import configure_hedging, get_hedge_policy
+from src.core.llm.prompt_layout import get_prefix_monitor
+from src.core.llm.response_cache import configure_response_cache, get_response_cache
+from src.core.llm.scheduler import configure_llm_scheduler, get_llm_scheduler
+from src.core.llm.telemetry import get_llm_cost_tracker, set_llm_cost_tracker, set_llm_event_store
 # Import tools to register them
 import src.core.tools
+from src.core.tool_registry import registry as tool_registry
+from src.core.dir_snapshot import configure_directory_snapshots
+from src.core.search_cache import configure_search_cache, get_search_cache
+from src.core.search_providers import configure_search_provider, get_search_provider
+from src.core.shell_session import configure_shell, shutdown_shell_sessions
+from src.core.web_search import configure_web_search
+from src.core.workspace_index import configure_workspace_index
 from src.utils.state_manager import StateManager, WorkflowStatus
 # Import event and cost tracking
 from src.core.events import EventStore, EventType, CostTracker, TokenUsage
@@ -44,6 +59,8 @@ async def _sdk_health_check(work_dir: Path, timeout: int, logger, model: str = N
             timeout=timeout,
             max_retries=2,
             retry_delay=1.0,
+            use_cache=False,  # A cached "OK" would not prove connectivity
+            call_class=CallClass.HEALTH_CHECK,
         )
         if "OK" in response_text:
             logger.info("SDK health check passed.")
@@ -55,6 +72,77 @@ async def _sdk_health_check(work_dir: Path, timeout: int, logger, model: str = N
         return False
 
 
+def _prompt_cache_by_call_class(session_id):
+    """Per call class: cache-read vs uncached input tokens, plus cacheable-prefix reuse from PromptLayout."""
+    result = {}
+    cost_tracker = get_llm_cost_tracker()
+    if cost_tracker is not None:
+        for call_class, group in cost_tracker.get_breakdown(session_id, "agent_type").items():
+            tokens = group["tokens"]
+            result[call_class] = {
+                "calls": group["calls"],
+                "input_tokens": tokens["input_tokens"],
+                "cache_read_tokens": tokens["cache_read_tokens"],
+                "cache_creation_tokens": tokens["cache_creation_tokens"],
+                "cache_hit_ratio": tokens["cache_hit_ratio"],
+            }
+    for call_class, prefix_stats in get_prefix_monitor().get_stats().items():
+        result.setdefault(call_class, {})["prefix"] = prefix_stats
+    return result
+
+
+def _record_llm_runtime_stats(event_store, session_id, logger):
+    """Log scheduler / CLI pool / coalescing / hedging / response cache / search cache / search provider / prompt cache / tool counters and add them to the event log."""
+    stats = {}
+    scheduler = get_llm_scheduler()
+    if scheduler is not None:
+        stats["scheduler"] = scheduler.get_stats()
+    pool = get_cli_pool()
+    if pool is not None:
+        stats["cli_pool"] = pool.get_stats()
+    coalescer = get_request_coalescer()
+    if coalescer is not None:
+        stats["coalescing"] = coalescer.get_stats()
+        if stats["coalescing"]["calls_saved"]:
+            logger.info(f"🔗 LLM Coalescing: {stats['coalescing']['calls_saved']} calls saved")
+    hedge_policy = get_hedge_policy()
+    if hedge_policy is not None:
+        stats["hedging"] = hedge_policy.get_stats()
+    cache = get_response_cache()
+    if cache is not None:
+        stats["response_cache"] = cache.get_stats()
+        logger.info(
+            f"📦 LLM Response Cache: {stats['response_cache']['hits']} hits / "
+            f"{stats['response_cache']['misses']} misses"
+        )
+    search_cache = get_search_cache()
+    if search_cache is not None and (search_cache.stats.hits or search_cache.stats.misses):
+        stats["search_cache"] = search_cache.get_stats()
+        logger.info(
+            f"🔎 Web Search Cache: {stats['search_cache']['hits']} hits / "
+            f"{stats['search_cache']['misses']} misses, "
+            f"{stats['search_cache']['saved_seconds']}s saved"
+        )
+    search_provider = get_search_provider()
+    if search_provider.stats.calls:
+        stats["search_provider"] = search_provider.get_stats()
+    prompt_cache = _prompt_cache_by_call_class(session_id)
+    if prompt_cache:
+        stats["prompt_cache"] = prompt_cache
+        for call_class, entry in prompt_cache.items():
+            if "cache_read_tokens" in entry:
+                logger.info(
+                    f"🧊 Prompt cache [{call_class}]: {entry['cache_read_tokens']} cache-read / "
+                    f"{entry['input_tokens']} input tokens ({entry['cache_hit_ratio']:.1%})"
+                )
+    tool_stats = tool_registry.get_stats()
+    if tool_stats["tools"]:
+        stats["tools"] = tool_stats
+    if stats:
+        logger.info(f"⚙️ LLM Runtime: {stats}")
+        event_store.create_event(EventType.LLM_RUNTIME_STATS, session_id=session_id, **stats)
+
+
 async def run_leader_mode(config, work_dir, logger, event_store, cost_tracker, session_id):
     """
     Execute in Leader mode (v4.0): Dynamic orchestration with intelligent intervention.
@@ -99,7 +187,8 @@ async def run_leader_mode(config, work_dir, logger, event_store, cost_tracker, s
             quality_threshold=config.leader.quality_threshold,
             budget_limit_usd=config.cost_control.max_budget_usd if config.cost_control.enabled else None,
             session_id=session_id,
-            timeouts=timeout_dict
+            timeouts=timeout_dict,
+            cost_tracker=cost_tracker
         )
 
         # Execute with Leader
@@ -286,8 +375,42 @@ async def main(config_path: str = "config.yaml"):
     work_dir = Path(config.directories.work_dir)
     work_dir.mkdir(parents=True, exist_ok=True)
 
+    # LLM runtime: shared scheduler, warm CLI process pool, coalescing, hedging and response cache
+    configure_llm_scheduler(config.performance.scheduler)
+    configure_cli_pool(config.performance.cli_pool)
+    configure_request_coalescer(config.performance.coalescing)
+    configure_hedging(config.performance.hedging)
+    tool_registry.configure(
+        max_workers=config.tools.max_workers,
+        default_timeout_seconds=config.tools.default_timeout_seconds,
+        timeouts=config.tools.timeouts,
+        memo_scope=config.tools.memo_scope,
+    )
+    tool_registry.configure_sandbox(config.tools.sandbox)
+    configure_directory_snapshots(
+        exclude_patterns=config.performance.exclude_patterns,
+        rescan_interval_seconds=config.performance.snapshot_rescan_interval_seconds,
+    )
+    configure_workspace_index(config.tools.search)
+    configure_shell(config.tools.shell)
+    configure_response_cache(
+        config.performance.response_cache,
+        default_dir=str(Path(config.directories.logs_dir) / "cache" / "llm_responses"),
+    )
+    configure_search_cache(
+        config.research.search_cache,
+        default_dir=str(Path(config.directories.logs_dir) / "cache" / "web_search"),
+    )
+    configure_web_search(config.research.batch)
+    configure_search_provider(config.research, pool_size=config.research.batch.max_concurrency)
+    configure_research_cache(
+        config.research.cache,
+        default_dir=str(Path(config.directories.logs_dir) / "cache" / "research"),
+    )
+
     # Initialize event store and cost tracker
     event_store = EventStore(storage_dir=str(Path(config.directories.logs_dir) / "events"))
+    set_llm_event_store(event_store)
 
     # Initialize cost tracker with budget control
     if config.cost_control.enabled:
@@ -299,6 +422,7 @@ async def main(config_path: str = "config.yaml"):
     else:
         cost_tracker = CostTracker()
         logger.info("📊 Event store and cost tracker initialized (no budget limit)")
+    set_llm_cost_tracker(cost_tracker)
 
     # SDK connectivity health check before creating agents
     if not await _sdk_health_check(
@@ -320,9 +444,13 @@ async def main(config_path: str = "config.yaml"):
         session_file.write_text(session_id, encoding="utf-8")
         config.get_backup_session_file_path().write_text(session_id, encoding="utf-8")
 
+    # Attribute all LLM calls from this run to the session (scheduler fair sharing)
+    bind_llm_call_context(session_id=session_id)
+
     state_manager = StateManager(
         config.get_state_file_path(),
-        mirror_dir=config.get_mirror_dir_path()
+        mirror_dir=config.get_mirror_dir_path(),
+        incremental_mirror=config.performance.use_incremental_sync
     )
     state = state_manager.load_or_create(
         session_id=session_id,
@@ -366,8 +494,7 @@ async def main(config_path: str = "config.yaml"):
         work_dir=str(work_dir),
         provider=config.research.provider,
         enabled=config.research.enabled,
-        enable_cache=True,  # Enable research cache
-        cache_ttl_minutes=60,
+        enable_cache=config.research.cache.enabled,
         model=config.claude.model,
         timeout_seconds=config.claude.timeout_seconds,
         permission_mode=config.claude.permission_mode,
@@ -401,10 +528,13 @@ async def main(config_path: str = "config.yaml"):
 
             cost_report = cost_tracker.generate_report(session_id)
             logger.info(f"💰 Total Cost: ${cost_report.get('total_cost_usd', 0):.4f}")
+            logger.info(f"🧊 Prompt Cache Hit Ratio: {cost_report.get('cache_hit_ratio', 0):.1%}")
 
             event_stats = event_store.get_event_statistics(session_id)
             logger.info(f"📋 Total Events: {event_stats.get('total_events', 0)}")
 
+            _record_llm_runtime_stats(event_store, session_id, logger)
+
             try:
                 event_file = event_store.save_to_file(session_id)
                 logger.info(f"💾 Events saved to: {event_file}")
@@ -448,12 +578,15 @@ async def main(config_path: str = "config.yaml"):
             
             cost_report = cost_tracker.generate_report(session_id)
             logger.info(f"💰 Total Cost: ${cost_report.get('total_cost_usd', 0):.4f}")
+            logger.info(f"🧊 Prompt Cache Hit Ratio: {cost_report.get('cache_hit_ratio', 0):.1%}")
             logger.info(f"📈 Total Tokens: {cost_report.get('total_tokens', {}).get('total_tokens', 0)}")
             logger.info(f"🔧 Total API Calls: {cost_report.get('total_calls', 0)}")
             
             event_stats = event_store.get_event_statistics(session_id)
             logger.info(f"📋 Total Events: {event_stats.get('total_events', 0)}")
             
+            _record_llm_runtime_stats(event_store, session_id, logger)
+
             try:
                 event_file = event_store.save_to_file(session_id)
                 logger.info(f"💾 Events saved to: {event_file}")
@@ -480,6 +613,7 @@ async def main(config_path: str = "config.yaml"):
     while iteration < max_iterations:
         iteration += 1
         state.current_iteration = iteration
+        bind_llm_call_context(iteration=iteration)  # attribute LLM costs to this iteration
         logger.info(f"\n🔄 Global Iteration {iteration}/{max_iterations}")
         logger.log_event("iteration_start", {"iteration": iteration}, session_id=session_id, iteration=iteration)
 
@@ -640,28 +774,20 @@ async def main(config_path: str = "config.yaml"):
                 duration=executor_duration
             )
 
-            # Record cost (simplified: estimate tokens based on text length)
-            # In production, extract from SDK response
-            estimated_tokens = TokenUsage(
-                input_tokens=len(next_task) // 4,  # Rough estimate
-                output_tokens=len(result) // 4
-            )
-            cost_record = cost_tracker.record_cost(
-                session_id=session_id,
-                agent_type="executor",
-                model=config.claude.model or "claude-3-5-sonnet-20241022",
-                token_usage=estimated_tokens,
-                duration_seconds=executor_duration,
-                iteration=iteration
-            )
+            # Real per-call costs are recorded by run_claude_prompt; report this iteration's total
+            iteration_cost = cost_tracker.get_iteration_cost(session_id, iteration)
+            iteration_tokens = TokenUsage()
+            for record in cost_tracker.records:
+                if record.session_id == session_id and record.iteration == iteration:
+                    iteration_tokens.add(record.token_usage)
 
             event_store.create_event(
                 EventType.COST_RECORDED,
                 session_id=session_id,
                 iteration=iteration,
-                agent="executor",
-                cost_usd=cost_record.estimated_cost_usd,
-                tokens=estimated_tokens.total_tokens
+                agent="iteration",
+                cost_usd=iteration_cost,
+                tokens=iteration_tokens.total_tokens
             )
 
             iteration_duration = time.time() - iteration_start
@@ -671,7 +797,7 @@ async def main(config_path: str = "config.yaml"):
                 success=True
             )
             state_manager.save()
-            logger.log_cost(iteration, session_id, iteration_duration, cost=cost_record.estimated_cost_usd)
+            logger.log_cost(iteration, session_id, iteration_duration, cost=iteration_cost)
             continuous_errors = 0
 
             # Budget check
@@ -775,6 +901,7 @@ async def main(config_path: str = "config.yaml"):
     # Cost report
     cost_report = cost_tracker.generate_report(session_id)
     logger.info(f"💰 Total Cost: ${cost_report.get('total_cost_usd', 0):.4f}")
+    logger.info(f"🧊 Prompt Cache Hit Ratio: {cost_report.get('cache_hit_ratio', 0):.1%}")
     logger.info(f"📈 Total Tokens: {cost_report.get('total_tokens', {}).get('total_tokens', 0)}")
     logger.info(f"🔧 Total API Calls: {cost_report.get('total_calls', 0)}")
 
@@ -795,6 +922,12 @@ async def main(config_path: str = "config.yaml"):
         logger.info(f"🔬 Research Queries: {research_stats.get('total_queries', 0)}")
         if 'cache_hit_rate' in research_stats:
             logger.info(f"📦 Cache Hit Rate: {research_stats['cache_hit_rate']:.1%}")
+            tier_rates = ", ".join(
+                f"{tier} {rate:.1%}" for tier, rate in research_stats["cache_tier_hit_rates"].items()
+            )
+            logger.info(f"   By tier: {tier_rates}")
+
+    _record_llm_runtime_stats(event_store, session_id, logger)
 
     # Save event log
     try:
@@ -806,8 +939,17 @@ async def main(config_path: str = "config.yaml"):
     logger.info("=" * 60 + "\n")
 
 
+async def _run_main():
+    try:
+        await main()
+    finally:
+        await shutdown_cli_pool()
+        await shutdown_shell_sessions()
+        tool_registry.shutdown()
+
+
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        asyncio.run(_run_main())
     except KeyboardInterrupt:
         print("\n👋 Exiting...")
@@ -10,6 +10,8 @@ import shutil
 import json
 from enum import Enum
 
+from src.core.dir_snapshot import get_directory_snapshot, scan_directory
+
 
 class WorkflowStatus(str, Enum):
     """工作流状态枚举"""
@@ -239,12 +241,15 @@ class StateManager:
         self,
         state_file_path: Path,
         mirror_dir: Optional[Path] = None,
-        mirror_on_terminal: bool = True
+        mirror_on_terminal: bool = True,
+        incremental_mirror: bool = False
     ):
         self.state_file_path = state_file_path
         self._state: Optional[ExecutionState] = None
         self.mirror_dir = mirror_dir
         self.mirror_on_terminal = mirror_on_terminal
+        # True: 只复制变化的文件（基于工作目录快照，跳过 exclude_patterns）；False: 整体重新复制
+        self.incremental_mirror = incremental_mirror
         self._last_mirror_signature: Optional[tuple] = None
 
     def load_or_create(
@@ -324,9 +329,12 @@ class StateManager:
 
         mirror_dir.mkdir(parents=True, exist_ok=True)
         dst = mirror_dir / f"{work_dir.name}_mirror"
-        if dst.exists():
-            shutil.rmtree(dst)
-        shutil.copytree(work_dir, dst)
+        if self.incremental_mirror:
+            self._sync_mirror(work_dir, dst)
+        else:
+            if dst.exists():
+                shutil.rmtree(dst)
+            shutil.copytree(work_dir, dst)
 
         for session_name in ("session_id.txt", "session_id.backup.txt"):
             session_file = dst / session_name
@@ -335,6 +343,41 @@ class StateManager:
 
         self._last_mirror_signature = signature
 
+    @staticmethod
+    def _sync_mirror(work_dir: Path, dst: Path):
+        """按工作目录快照增量同步镜像：复制新增 / 变化（大小或 mtime 不同）的文件，删除多余的文件"""
+        entries = get_directory_snapshot(work_dir).entries(force=True)
+        existing = {entry.path: entry for entry in scan_directory(dst)} if dst.exists() else {}
+        dst.mkdir(parents=True, exist_ok=True)
+
+        for rel_path, entry in sorted(entries.items()):
+            target = dst / rel_path
+            current = existing.get(rel_path)
+            if current is not None and current.is_dir != entry.is_dir:
+                if current.is_dir:
+                    shutil.rmtree(target)
+                else:
+                    target.unlink()
+                current = None
+            if entry.is_dir:
+                target.mkdir(parents=True, exist_ok=True)
+                continue
+            if current is not None and (current.size, current.mtime_ns) == (entry.size, entry.mtime_ns):
+                continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                shutil.copy2(work_dir / rel_path, target)  # 保留 mtime，下次同步据此跳过
+            except FileNotFoundError:
+                continue  # 快照之后被删除
+
+        # 倒序删除：先删目录中的文件，再删目录
+        for rel_path in sorted(set(existing) - set(entries), reverse=True):
+            target = dst / rel_path
+            if existing[rel_path].is_dir:
+                shutil.rmtree(target, ignore_errors=True)
+            elif target.exists():
+                target.unlink()
+
     @staticmethod
     def _is_subpath(path: Path, parent: Path) -> bool:
         try:
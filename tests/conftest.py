@@ -0,0 +1,9 @@
+"""
+测试配置：把仓库根目录加入 sys.path，以 `src.` 包路径导入（与 src/main.py 相同）
+"""
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
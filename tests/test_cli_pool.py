@@ -0,0 +1,160 @@
+"""
+CLIProcessPool 回归测试：max_total_processes 硬上限、LRU 回收、空闲回收、启动取消
+"""
+import asyncio
+
+import pytest
+
+from src.core.llm.cli_pool import CLIProcessPool, PooledCLIProcess, PoolFullError
+
+KEY_A = ("model-a", "default", "/tmp", None)
+KEY_B = ("model-b", "default", "/tmp", None)
+
+
+@pytest.fixture
+def started(monkeypatch):
+    """用不启动子进程的假 owner task 替换 PooledCLIProcess.start，返回所有启动过的进程"""
+    processes = []
+
+    async def fake_start(self, spawn_timeout):
+        loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._owner = loop.create_task(asyncio.sleep(3600))
+        processes.append(self)
+        await asyncio.sleep(0)
+
+    monkeypatch.setattr(PooledCLIProcess, "start", fake_start)
+    return processes
+
+
+async def _settle():
+    """让后台预热任务跑完"""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def _alive(processes):
+    return [proc for proc in processes if proc.alive]
+
+
+def test_total_processes_never_exceed_cap(started):
+    async def scenario():
+        pool = CLIProcessPool(size=2, max_total_processes=3)
+        leased = []
+        for key in (KEY_A, KEY_B, KEY_A, KEY_B):
+            try:
+                leased.append(await pool.acquire(key))
+            except PoolFullError:
+                pass
+            await _settle()
+            assert len(_alive(started)) <= 3
+            assert pool._total_processes() <= 3
+        for proc in leased:
+            pool.release(proc)
+            await _settle()
+            assert len(_alive(started)) <= 3
+        await pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_pool_full_raises_instead_of_spawning(started):
+    async def scenario():
+        pool = CLIProcessPool(size=1, max_total_processes=1)
+        first = await pool.acquire(KEY_A)
+        await _settle()
+        with pytest.raises(PoolFullError):
+            await pool.acquire(KEY_B)
+        with pytest.raises(PoolFullError):
+            await pool.acquire(KEY_A)
+        assert len(started) == 1
+        assert pool.stats.overflows == 2
+        pool.release(first)
+        await pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_synchronous_spawn_counts_toward_cap(monkeypatch):
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def slow_start(self, spawn_timeout):
+            self._queue = asyncio.Queue()
+            self._owner = asyncio.get_running_loop().create_task(asyncio.sleep(3600))
+            await gate.wait()
+
+        monkeypatch.setattr(PooledCLIProcess, "start", slow_start)
+        pool = CLIProcessPool(size=1, max_total_processes=1)
+        pending = asyncio.get_running_loop().create_task(pool.acquire(KEY_A))
+        await _settle()
+        assert pool._total_processes() == 1
+        with pytest.raises(PoolFullError):
+            await pool.acquire(KEY_B)
+        gate.set()
+        pool.release(await pending)
+        await pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_lru_idle_process_of_other_key_is_evicted_at_cap(started):
+    async def scenario():
+        pool = CLIProcessPool(size=1, max_uses=2, max_total_processes=1)
+        first = await pool.acquire(KEY_A)
+        pool.release(first)
+        await _settle()
+        assert first.alive
+        second = await pool.acquire(KEY_B)
+        assert not first.alive
+        assert pool.stats.evicted == 1
+        assert len(_alive(started)) == 1
+        pool.release(second)
+        await pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_reap_idle_retires_idle_processes_and_forgets_stale_keys(started):
+    async def scenario():
+        pool = CLIProcessPool(size=1, max_uses=2, max_idle_seconds=60, max_total_processes=4)
+        pool.release(await pool.acquire(KEY_A))
+        await _settle()
+        assert _alive(started)
+        for proc in pool._idle[KEY_A]:
+            proc.last_used_at -= 120
+        pool._last_demand[KEY_A] -= 120
+        pool.reap_idle()
+        assert KEY_A not in pool._idle and KEY_A not in pool._last_demand
+        assert not _alive(started)
+        pool._schedule_refill(KEY_A)
+        await _settle()
+        assert not _alive(started)
+        await pool.close()
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("cancel", [True, False])
+def test_interrupted_start_kills_owner_task(monkeypatch, cancel):
+    async def never_ready(self):
+        await asyncio.sleep(3600)
+
+    monkeypatch.setattr(PooledCLIProcess, "_run", never_ready)
+
+    async def scenario():
+        proc = PooledCLIProcess(key=KEY_A)
+        if cancel:
+            task = asyncio.get_running_loop().create_task(proc.start(spawn_timeout=60))
+            await _settle()
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        else:
+            with pytest.raises(asyncio.TimeoutError):
+                await proc.start(spawn_timeout=0.01)
+        await _settle()
+        assert proc._owner.cancelled()
+        assert not proc.alive
+
+    asyncio.run(scenario())
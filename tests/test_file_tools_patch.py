@@ -0,0 +1,121 @@
+"""
+apply_patch / _parse_hunks / _find_block / _atomic_write 回归测试
+"""
+import os
+import stat
+
+import pytest
+
+from src.core.tools.file_tools import _atomic_write, _find_block, _parse_hunks, apply_patch
+from src.core.workspace import workspace
+
+
+@pytest.fixture
+def work_dir(tmp_path):
+    with workspace(tmp_path):
+        yield tmp_path
+
+
+def _patch(work_dir, content: str, patch: str, name: str = "doc.txt"):
+    path = work_dir / name
+    path.write_bytes(content.encode("utf-8"))
+    result = apply_patch(name, patch)
+    return result, path.read_bytes().decode("utf-8")
+
+
+def test_parse_hunks_skips_file_headers_and_no_newline_marker():
+    patch = (
+        "--- a/doc.txt\n"
+        "+++ b/doc.txt\n"
+        "@@ -2,2 +2,2 @@\n"
+        " two\n"
+        "-three\n"
+        "+THREE\n"
+        "\\ No newline at end of file\n"
+    )
+    assert _parse_hunks(patch) == [(2, ["two", "three"], ["two", "THREE"])]
+
+
+def test_parse_hunks_pure_insertion_has_no_old_lines():
+    assert _parse_hunks("@@ -2,0 +3,1 @@\n+inserted\n") == [(2, [], ["inserted"])]
+
+
+def test_find_block_prefers_match_nearest_expected():
+    lines = ["x", "a", "b", "x", "a", "b"]
+    assert _find_block(lines, ["a", "b"], expected=4, start=0) == 4
+    assert _find_block(lines, ["a", "b"], expected=0, start=0) == 1
+    assert _find_block(lines, ["a", "b"], expected=0, start=2) == 4
+
+
+def test_find_block_missing_block_and_empty_block():
+    assert _find_block(["a", "b"], ["c"], expected=0, start=0) == -1
+    assert _find_block(["a", "b"], [], expected=5, start=0) == 2
+    assert _find_block(["a", "b"], [], expected=0, start=1) == 1
+
+
+def test_apply_patch_replaces_lines(work_dir):
+    result, content = _patch(work_dir, "one\ntwo\nthree\n", "@@ -2,2 +2,2 @@\n two\n-three\n+THREE\n")
+    assert result.startswith("Successfully patched")
+    assert content == "one\ntwo\nTHREE\n"
+
+
+def test_apply_patch_pure_insertion_goes_after_anchor_line(work_dir):
+    _, content = _patch(work_dir, "one\ntwo\nthree\n", "@@ -2,0 +3,1 @@\n+inserted\n")
+    assert content == "one\ntwo\ninserted\nthree\n"
+
+
+def test_apply_patch_insertion_at_top_of_file(work_dir):
+    _, content = _patch(work_dir, "one\ntwo\n", "@@ -0,0 +1,1 @@\n+zero\n")
+    assert content == "zero\none\ntwo\n"
+
+
+def test_apply_patch_tolerates_wrong_line_numbers(work_dir):
+    _, content = _patch(work_dir, "a\nb\nc\nd\n", "@@ -10,2 +10,2 @@\n c\n-d\n+D\n")
+    assert content == "a\nb\nc\nD\n"
+
+
+def test_apply_patch_later_hunks_account_for_earlier_shift(work_dir):
+    patch = (
+        "@@ -1,1 +1,3 @@\n"
+        "-a\n"
+        "+a1\n"
+        "+a2\n"
+        "+a3\n"
+        "@@ -4,1 +6,1 @@\n"
+        "-d\n"
+        "+D\n"
+    )
+    _, content = _patch(work_dir, "a\nb\nc\nd\n", patch)
+    assert content == "a1\na2\na3\nb\nc\nD\n"
+
+
+def test_apply_patch_preserves_crlf(work_dir):
+    _, content = _patch(work_dir, "one\r\ntwo\r\n", "@@ -2,1 +2,1 @@\n-two\n+TWO\n")
+    assert content == "one\r\nTWO\r\n"
+
+
+def test_apply_patch_mismatch_leaves_file_unchanged(work_dir):
+    result, content = _patch(work_dir, "one\ntwo\n", "@@ -1,1 +1,1 @@\n-missing\n+x\n")
+    assert result.startswith("Error: hunk 1 does not match")
+    assert content == "one\ntwo\n"
+
+
+@pytest.mark.skipif(os.name != "posix", reason="POSIX permissions")
+def test_atomic_write_new_file_follows_umask(tmp_path):
+    previous = os.umask(0o027)
+    try:
+        _atomic_write(tmp_path / "new.txt", b"data")
+    finally:
+        os.umask(previous)
+    assert stat.S_IMODE((tmp_path / "new.txt").stat().st_mode) == 0o640
+
+
+@pytest.mark.skipif(os.name != "posix", reason="POSIX permissions")
+def test_atomic_write_keeps_mode_of_existing_file(tmp_path):
+    target = tmp_path / "existing.txt"
+    target.write_bytes(b"old")
+    os.chmod(target, 0o600)
+    _atomic_write(target, b"new")
+    assert stat.S_IMODE(target.stat().st_mode) == 0o600
+    assert target.read_bytes() == b"new"
+    assert [path.name for path in tmp_path.iterdir()] == ["existing.txt"]
@@ -0,0 +1,121 @@
+"""
+ResearchCache 回归测试：查询规范化、关键词保护、MinHash/LSH 近似匹配、共享目录、失败搜索不缓存
+"""
+import asyncio
+
+import pytest
+
+from src.core.agents import researcher
+from src.core.agents.researcher import (
+    ResearchCache,
+    ResearcherAgent,
+    minhash_signature,
+    normalize_query_tokens,
+    query_key_terms,
+)
+from src.core.web_search import SearchOutcome
+
+
+@pytest.fixture
+def cache():
+    return ResearchCache()
+
+
+def test_normalization_ignores_case_punctuation_and_plurals():
+    assert normalize_query_tokens("EV Markets: growth?") == normalize_query_tokens("ev market growth")
+
+
+def test_question_words_and_negations_are_kept():
+    tokens = normalize_query_tokens("why did Tesla not cut prices")
+    assert {"why", "not"} <= tokens
+
+
+def test_key_terms_cover_numbers_names_question_words_and_negations():
+    terms = query_key_terms("Why is the EV market in Beijing not growing in 2025 电动车")
+    assert {"why", "ev", "beijing", "not", "2025", "电"} <= terms
+    assert "market" not in terms
+
+
+def test_exact_hit_from_memory_tier(cache):
+    cache.set("When did Tesla cut prices", "answer")
+    hit = cache.lookup("when did tesla cut prices?")
+    assert hit is not None and hit.tier == "memory" and hit.result == "answer"
+
+
+@pytest.mark.parametrize("cached, query", [
+    ("when did Tesla cut prices", "why did Tesla cut prices"),
+    ("market sizing for SaaS", "who does market sizing for SaaS"),
+    ("use kubernetes for small team deployment of web services staging",
+     "do not use kubernetes for small team deployment of web services staging"),
+    ("AI chip startups in Beijing and Shenzhen market share revenue 2024",
+     "AI chip startups in Shanghai and Shenzhen market share revenue 2024"),
+    ("AI chip startups in Beijing and Shenzhen market share revenue 2024",
+     "AI chip startups in Beijing and Shenzhen market share revenue 2023"),
+])
+def test_queries_with_different_meaning_do_not_collide(cache, cached, query):
+    cache.set(cached, "cached answer")
+    assert cache.lookup(query) is None
+
+
+def test_near_duplicate_hit_for_same_meaning(cache):
+    cache.set("AI chip startups in Beijing and Shenzhen market share revenue 2024", "answer")
+    hit = cache.lookup("AI chip startups in Beijing and Shenzhen market share revenue 2024 overview")
+    assert hit is not None
+    assert hit.tier == "near_duplicate"
+    assert hit.similarity >= cache.similarity_threshold
+
+
+def test_near_duplicate_below_threshold_misses():
+    cache = ResearchCache(similarity_threshold=0.95)
+    cache.set("AI chip startups in Beijing and Shenzhen market share revenue 2024", "answer")
+    assert cache.lookup("AI chip startups in Beijing and Shenzhen market share revenue 2024 overview") is None
+
+
+def test_near_duplicate_disabled():
+    cache = ResearchCache(near_duplicate=False)
+    cache.set("electric vehicle battery supply chain risks analysis", "answer")
+    assert cache.lookup("electric vehicle battery supply chain risks analysis overview") is None
+
+
+def test_minhash_signature_estimates_jaccard():
+    a = frozenset(f"token{i}" for i in range(40))
+    b = frozenset(f"token{i}" for i in range(4, 44))
+    signature_a, signature_b = minhash_signature(a), minhash_signature(b)
+    estimate = sum(x == y for x, y in zip(signature_a, signature_b)) / len(signature_a)
+    assert abs(estimate - len(a & b) / len(a | b)) < 0.2
+    assert minhash_signature(a) == signature_a
+    assert minhash_signature(frozenset()) == ()
+
+
+def test_instances_sharing_a_directory_see_each_other(tmp_path):
+    first = ResearchCache(cache_dir=str(tmp_path))
+    second = ResearchCache(cache_dir=str(tmp_path))
+    first.set("lithium price forecast", "from first")
+    hit = second.lookup("lithium price forecast")
+    assert hit is not None and hit.tier == "disk" and hit.result == "from first"
+
+    first.set("cobalt supply chain risks analysis report for battery makers in europe", "cobalt")
+    hit = second.lookup("cobalt supply chain risks analysis report for battery makers in europe overview")
+    assert hit is not None and hit.tier == "near_duplicate"
+
+
+def test_persisted_entries_survive_restart(tmp_path):
+    ResearchCache(cache_dir=str(tmp_path)).set("lithium price forecast", "persisted")
+    hit = ResearchCache(cache_dir=str(tmp_path)).lookup("lithium price forecast")
+    assert hit is not None and hit.result == "persisted"
+
+
+@pytest.mark.parametrize("outcome, cached", [
+    (SearchOutcome("q", error="Search Failed for 'q': network down"), False),
+    (SearchOutcome("q", response={"results": []}), False),
+    (SearchOutcome("q", response={"results": [{"title": "t", "url": "https://x", "content": "c"}]}), True),
+])
+def test_research_caches_only_successful_searches(monkeypatch, tmp_path, outcome, cached):
+    async def fake_prompt(prompt, *args, **kwargs):
+        return "summary", None
+
+    monkeypatch.setattr(researcher, "search", lambda query: outcome)
+    monkeypatch.setattr(researcher, "run_claude_prompt", fake_prompt)
+    agent = ResearcherAgent(str(tmp_path))
+    assert asyncio.run(agent.research("lithium price forecast")) == "summary"
+    assert (agent.cache.lookup("lithium price forecast") is not None) == cached